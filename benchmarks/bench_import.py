@@ -0,0 +1,100 @@
+"""Benchmarks how long `import k3ng` takes, and checks it doesn't pull in the heavy stacks
+
+Each sample imports the package in a fresh interpreter, as a short-lived script would.
+Reports the import time as JSON and exits non-zero if a module that should only be
+imported on use (HTTP, RPC, asyncio, numpy) was imported anyway, or `--max-ms` was exceeded.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from argparse import ArgumentParser
+from typing import Any
+
+# Imported only by the parts of the package that need them
+LAZY_MODULES = ("requests", "rpyc", "asyncio", "numpy", "sgp4")
+
+# Prints the modules that `import k3ng` loaded, timed by -X importtime on stderr
+PROBE = (
+    "import sys, json; before = set(sys.modules); import k3ng; "
+    "print(json.dumps(sorted(set(sys.modules) - before)))"
+)
+
+
+def sample(module: str) -> tuple[float, list[str]]:
+    """Import time (s) of `module` in a fresh interpreter, and the modules it loaded"""
+    env = dict(os.environ)
+    # Without cached bytecode every run would be timing the compiler instead
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.replace("k3ng", module)],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+
+    # Lines are "import time: self | cumulative | name", the top level import is last
+    total = next(
+        int(line.split("|")[1])
+        for line in reversed(proc.stderr.splitlines())
+        if line.rstrip().endswith(f"| {module}")
+    )
+    return total / 1e6, json.loads(proc.stdout)
+
+
+def bench_import(module: str, repeat: int) -> dict[str, Any]:
+    sample(module)  # Warm up the bytecode cache
+    samples = []
+    loaded: list[str] = []
+    for _ in range(repeat):
+        elapsed, loaded = sample(module)
+        samples.append(elapsed)
+
+    return {
+        "n": len(samples),
+        "p50_ms": statistics.median(samples) * 1e3,
+        "min_ms": min(samples) * 1e3,
+        "max_ms": max(samples) * 1e3,
+        "modules": len(loaded),
+        "lazy_imported": sorted(
+            name for name in loaded if name.split(".")[0] in LAZY_MODULES
+        ),
+    }
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        prog="bench_import", description="Benchmark the import time of k3ng"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=20, help="Fresh interpreters to time"
+    )
+    parser.add_argument(
+        "--module", default="k3ng", help="Module to import (e.g. k3ng.aio)"
+    )
+    parser.add_argument(
+        "--max-ms", type=float, help="Fail if the median import takes longer"
+    )
+    parser.add_argument("-o", "--output", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = bench_import(args.module, args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.module == "k3ng" and results["lazy_imported"]:
+        sys.exit(f"import k3ng imported {', '.join(results['lazy_imported'])}")
+    if args.max_ms is not None and results["p50_ms"] > args.max_ms:
+        sys.exit(f"import {args.module} took {results['p50_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Benchmarks the K3NG command and parsing hot paths against the firmware emulator
+
+Reports p50/p99 latency per command, sustained position polling throughput and per-message
+parse cost, as JSON so runs can be compared.
+"""
+
+import json
+import logging
+import statistics
+import sys
+import time
+import timeit
+from argparse import ArgumentParser
+from typing import Any, Callable
+
+from k3ng import K3NG, TLE, Satellite
+from k3ng.emulator import K3NGEmulator
+from k3ng.k3ng import PassInfo, TrackingStatus, parse_status_log
+
+ISS_ID = 25544
+ISS = TLE(
+    "ISS",
+    "1 25544U 98067A   24001.50000000  .00016717  00000-0  10270-3 0  9005",
+    "2 25544  51.6400 208.9163 0006317  69.9862  25.2906 15.49560532432107",
+)
+
+STATUS = [
+    "Satellite:ISS",
+    "AZ:120 EL:10 Lat:43.65 Long:-79.38 AOS TRACKING_ACTIVE",
+    "Next AOS:2024-01-01 12:00:00 Az:120 LOS:2024-01-01 12:10:00 Az:240 Max El:45",
+    "LOS in ~1h5m",
+]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def summarise(samples: list[float]) -> dict[str, Any]:
+    return {
+        "n": len(samples),
+        "p50_ms": percentile(samples, 50) * 1e3,
+        "p99_ms": percentile(samples, 99) * 1e3,
+        "mean_ms": statistics.fmean(samples) * 1e3,
+        "max_ms": max(samples) * 1e3,
+    }
+
+
+def bench_latency(func: Callable[[], Any], repeat: int) -> dict[str, Any]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarise(samples)
+
+
+def bench_commands(rot: K3NG, repeat: int) -> dict[str, Any]:
+    sat = Satellite(ISS_ID, ISS)
+    rot.load_tle(sat)
+    rot.select_satellite(sat)
+
+    commands: dict[str, Callable[[], Any]] = {
+        "get_azimuth": rot.get_azimuth,
+        "get_elevation": rot.get_elevation,
+        "get_position": rot.get_position,
+        "get_version": rot.get_version,
+        "get_time": rot.get_time,
+        "get_tracking_status": rot.get_tracking_status,
+        "get_trackable": rot.get_trackable,
+        "set_azimuth": lambda: rot.set_azimuth(0),
+        "stop": rot.stop,
+    }
+    return {name: bench_latency(func, repeat) for name, func in commands.items()}
+
+
+def bench_throughput(rot: K3NG, duration: float) -> dict[str, Any]:
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        rot.get_position()
+        count += 1
+    elapsed = time.perf_counter() - start
+    return {"samples": count, "seconds": elapsed, "samples_per_s": count / elapsed}
+
+
+def bench_parsers(number: int) -> dict[str, Any]:
+    results = {}
+    parsers: dict[str, Callable[[], Any]] = {
+        "TrackingStatus.from_str": lambda: TrackingStatus.from_str(STATUS),
+        "PassInfo.from_status": lambda: PassInfo.from_status(STATUS[2]),
+    }
+    for name, func in parsers.items():
+        best = min(timeit.repeat(func, number=number, repeat=5))
+        results[name] = {"us_per_msg": best / number * 1e6}
+
+    log = STATUS * number
+    best = min(timeit.repeat(lambda: parse_status_log(log), number=1, repeat=5))
+    results["parse_status_log"] = {"us_per_msg": best / number * 1e6}
+    return results
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        prog="bench_k3ng", description="Benchmark K3NG against the firmware emulator"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Emulated reply latency (s)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=50, help="Samples per command latency"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=5.0, help="Length of the throughput run (s)"
+    )
+    parser.add_argument(
+        "--parse-number", type=int, default=10000, help="Messages per parser timing"
+    )
+    parser.add_argument("-o", "--output", help="Write results to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with K3NGEmulator(latency=args.latency) as emulator:
+        rot = K3NG(emulator.port)
+        try:
+            results = {
+                "emulated_latency_s": args.latency,
+                "commands": bench_commands(rot, args.repeat),
+                "throughput": bench_throughput(rot, args.duration),
+                "parsers": bench_parsers(args.parse_number),
+            }
+        finally:
+            rot.close()
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ from argparse import ArgumentParser
 import rpyc  # type: ignore
 from IPython import get_ipython  # type: ignore
 
-from k3ng import K3NGService
+from k3ng.service import K3NGService
 
 parser = ArgumentParser(
     prog="ipython_start_rpc",
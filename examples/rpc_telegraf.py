@@ -1,9 +1,79 @@
+import json
+import sys
 import time
 from argparse import ArgumentParser
+from typing import Any
 
 import rpyc  # type: ignore
 
-from k3ng import K3NGService
+from k3ng.service import K3NGService
+
+
+def format_telemetry(telemetry: dict[str, Any]) -> str:
+    """Position and tracking state as a line of Influx line protocol"""
+    state = telemetry["tracking"]
+
+    # Measurement
+    measurement = "rotator"
+    # Tags
+    if state is not None:
+        measurement += f",satname={state['satname']},sat_state={state['sat_state']},"
+        measurement += f"next_event={state['next_event']}"
+    measurement += " "
+    # Fields
+    if state is not None:
+        measurement += f"next_event_mins={state['next_event_mins']},"
+        measurement += f"is_tracking={int(state['is_tracking'])},"
+    measurement += f"azimuth={telemetry['azimuth']},"
+    measurement += f"elevation={telemetry['elevation']} "
+    # Timestamp
+    measurement += str(int(telemetry["timestamp"] * 1e9))
+    return measurement
+
+
+def format_stats(stats: dict[str, Any]) -> list[str]:
+    """Serial traffic and per-command latency as lines of Influx line protocol"""
+    timestamp = time.time_ns()
+    lines = [
+        f"rotator_serial bytes_sent={stats['bytes_sent']}i,"
+        f"bytes_received={stats['bytes_received']}i {timestamp}"
+    ]
+    for command, latency in stats["commands"].items():
+        tag = command or "none"
+        fields = ",".join(
+            f"{key}={value}i" if key == "count" else f"{key}={value}"
+            for key, value in latency.items()
+        )
+        lines.append(f"rotator_command,command={tag} {fields} {timestamp}")
+    return lines
+
+
+def execd(rpc_port: int, interval: float) -> None:
+    """Keep one connection open and emit metrics whenever Telegraf asks, or every interval
+
+    With `signal = "STDIN"` in the execd input, Telegraf writes a line to stdin for each
+    gather. With an interval, metrics are emitted on our own schedule instead.
+    """
+    conn = None
+    while True:
+        if interval > 0:
+            time.sleep(interval)
+        elif not sys.stdin.readline():
+            # Telegraf closed stdin, so it is shutting us down
+            return
+
+        try:
+            if conn is None or conn.closed:
+                conn = rpyc.connect("localhost", rpc_port)
+            lines = [format_telemetry(json.loads(conn.root.get_telemetry()))]
+            lines += format_stats(json.loads(conn.root.get_stats()))
+        except (OSError, EOFError) as ex:
+            print(f"Unable to reach the rotator daemon: {ex}", file=sys.stderr)
+            conn = None
+            continue
+
+        print("\n".join(lines), flush=True)
+
 
 if __name__ == "__main__":
     parser = ArgumentParser(
@@ -17,27 +87,23 @@ if __name__ == "__main__":
         default=K3NGService.DEFAULT_PORT,
         help="Port of RPC server on localhost",
     )
+    parser.add_argument(
+        "--execd",
+        action="store_true",
+        help="Keep running for Telegraf's execd input, emitting on each line on stdin",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.0,
+        help="With --execd, emit every this many seconds instead of on stdin",
+    )
 
     args = parser.parse_args()
 
-    rot = rpyc.connect("localhost", args.rpc_port).root.K3NG
-
-    az = rot.get_azimuth()
-    el = rot.get_elevation()
-    state = rot.get_tracking_status()
-
-    # Format for Telegraf usage
-    # Measurement
-    measurement = "rotator,"
-    # Tags
-    measurement += f"satname={state.satname},sat_state={state.sat_state.name},"
-    measurement += f"next_event={state.next_event.name} "
-    # Fields
-    measurement += f"next_event_mins={state.next_event_mins},"
-    measurement += f"azimuth={az},"
-    measurement += f"elevation={el},"
-    measurement += f"is_tracking={int(state.is_tracking)} "
-    # Timestamp
-    measurement += str(time.time_ns())
-
-    print(measurement)
+    if args.execd:
+        execd(args.rpc_port, args.interval)
+    else:
+        # One call for everything, returned as JSON rather than netrefs
+        root = rpyc.connect("localhost", args.rpc_port).root
+        print(format_telemetry(json.loads(root.get_telemetry())))
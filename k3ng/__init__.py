@@ -1,3 +1,22 @@
-from .k3ng import K3NG, TLE, K3NGService, Satellite
+from typing import TYPE_CHECKING, Any
 
-__all__ = ["TLE", "Satellite", "K3NG", "K3NGService"]
+from .k3ng import K3NG, TLE, Satellite
+
+if TYPE_CHECKING:
+    from .aio import AsyncK3NG
+    from .service import K3NGService
+
+__all__ = ["TLE", "Satellite", "K3NG", "AsyncK3NG", "K3NGService"]
+
+# These pull in asyncio and rpyc, so they are only imported when used, keeping `import k3ng`
+# cheap for scripts that just talk to the serial port
+_LAZY = {"AsyncK3NG": ".aio", "K3NGService": ".service"}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY:
+        # pylint: disable-next=import-outside-toplevel
+        import importlib
+
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
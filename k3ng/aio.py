@@ -0,0 +1,540 @@
+"""asyncio-native command and control of the K3NG rotator controller"""
+
+import asyncio
+import datetime
+import logging
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from .k3ng import (
+    RESPONSE_QUIET,
+    RESPONSE_TIMEOUT,
+    SEND_DELAY,
+    TLE,
+    Satellite,
+    TLESyncResult,
+    TrackingStatus,
+    _autopark_command,
+    _check_autopark_set,
+    _check_clock_drift,
+    _check_clock_set,
+    _check_extended,
+    _check_loc,
+    _check_park_set,
+    _check_parking,
+    _check_pin,
+    _check_port,
+    _check_selected,
+    _check_tles_cleared,
+    _check_tles_loaded,
+    _check_tracking_set,
+    _clock_command,
+    _LineBuffer,
+    _parse_analog,
+    _parse_autopark,
+    _parse_azimuth,
+    _parse_clock,
+    _parse_elevation,
+    _parse_park_location,
+    _parse_tles,
+    _parse_trackable,
+    _parse_tracking_status,
+    _plan_tle_sync,
+    _read_tle_file,
+    _tracking_reply_done,
+)
+
+READ_CHUNK = 4096
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncK3NG:
+    """Class for controlling K3NG over serial from an asyncio event loop
+
+    Mirrors the interface of `K3NG`, but every command is a coroutine. Create instances with
+    `await AsyncK3NG.open(port)` rather than calling the constructor directly.
+    """
+
+    # pylint: disable=too-many-public-methods
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        timeout: float = RESPONSE_TIMEOUT,
+    ) -> None:
+        self._reader = reader
+        self._writer = writer
+        self.timeout = timeout
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._last_send = 0.0
+
+        self._rx = _LineBuffer()
+        self._rx_event = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def open(
+        cls, ser_port: str, timeout: float = RESPONSE_TIMEOUT
+    ) -> "AsyncK3NG":
+        """Open a serial port and prime the connection to the rotator"""
+        # Only needed for the async client, so don't make everyone install it
+        import serial_asyncio  # type: ignore # pylint: disable=import-outside-toplevel
+
+        _check_port(ser_port)
+        reader, writer = await serial_asyncio.open_serial_connection(
+            url=ser_port, baudrate=9600
+        )
+        rot = cls(reader, writer, timeout)
+        await rot.flush()
+
+        # See K3NG.__init__, the extended commands won't work without this
+        ret = await rot.query("\\-")
+        if not ret:
+            await rot.close()
+            raise RuntimeError("Unable to communicate with rotator")
+
+        return rot
+
+    async def close(self) -> None:
+        """Close the serial connection"""
+        self._receiver.cancel()
+        self._writer.close()
+        await self._writer.wait_closed()
+
+    async def __aenter__(self) -> "AsyncK3NG":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    #  ╭──────────────────────────────────────────────────────────╮
+    #  │                     General Commands                     │
+    #  ╰──────────────────────────────────────────────────────────╯
+
+    async def _receive(self) -> None:
+        """Feed everything arriving on the serial port into the receive buffer"""
+        while True:
+            data = await self._reader.read(READ_CHUNK)
+            if not data:
+                logger.error("Serial connection closed")
+                return
+            self._rx.feed(data)
+            self.bytes_received += len(data)
+            self._rx_event.set()
+
+    async def _wait_rx(self, timeout: float) -> bool:
+        """Wait up to `timeout` for more data to arrive"""
+        self._rx_event.clear()
+        try:
+            await asyncio.wait_for(self._rx_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _wait(
+        self, done: Callable[[deque[str]], bool], timeout: Optional[float] = None
+    ) -> bool:
+        """Receive until `done` is satisfied by the pending lines, or the deadline passes"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (self.timeout if timeout is None else timeout)
+        while not done(self._rx.lines):
+            remaining = deadline - loop.time()
+            if remaining <= 0 or not await self._wait_rx(remaining):
+                logger.debug("Timed out waiting for response")
+                return False
+        return True
+
+    async def _wait_quiet(self, timeout: Optional[float] = None) -> None:
+        """Receive until a reply of unknown length has arrived and the line has gone quiet"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (self.timeout if timeout is None else timeout)
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            if self._rx.lines:
+                remaining = min(remaining, RESPONSE_QUIET)
+            if not await self._wait_rx(remaining) and self._rx.lines:
+                return
+
+    def _discard_input(self) -> None:
+        """Drop anything left over from a previous exchange"""
+        stale = self._rx.pop_all()
+        if stale:
+            logger.debug("Discarding stale input: %s", str(stale))
+
+    def read(self) -> list[str]:
+        """Read all pending lines"""
+        response = self._rx.pop_all()
+
+        logger.debug("RX: %s", str(response))
+        return response
+
+    async def _send(self, data: str) -> None:
+        """Transmit raw data without waiting for anything in return"""
+        logger.debug("TX: %s", repr(data))
+        # Paced from the last send, like `K3NG._send`
+        loop = asyncio.get_running_loop()
+        gap = self._last_send + SEND_DELAY - loop.time()
+        if gap > 0:
+            await asyncio.sleep(gap)
+        encoded = data.encode()
+        self._writer.write(encoded)
+        self.bytes_sent += len(encoded)
+        await self._writer.drain()
+        self._last_send = loop.time()
+
+    async def write(self, cmd: str) -> None:
+        """Send a command and consume its echo"""
+        await self._send(cmd + "\r")
+
+        echo = cmd.strip()
+        if echo and await self._wait(lambda lines: len(lines) > 0, RESPONSE_QUIET):
+            if self._rx.lines[0].strip() == echo:
+                self._rx.lines.popleft()
+
+    async def query(
+        self, cmd, lines: Optional[int] = None, timeout: Optional[float] = None
+    ) -> list[str]:
+        """Send a command and get the response, see `K3NG.query`"""
+        async with self._lock:
+            return await self._query(cmd, lines, timeout)
+
+    async def _query(
+        self, cmd, lines: Optional[int] = None, timeout: Optional[float] = None
+    ) -> list[str]:
+        """`query`, for when the lock is already held"""
+        self._discard_input()
+        await self.write(cmd)
+        if lines is None:
+            await self._wait_quiet(timeout)
+        else:
+            await self._wait(lambda rx: len(rx) >= lines, timeout)
+        return self.read()
+
+    async def _query_tracking(self) -> list[str]:
+        """Get the tracking status reply, see `K3NG._query_tracking`"""
+        async with self._lock:
+            self._discard_input()
+            await self.write("\\~")
+            await self._wait(_tracking_reply_done)
+            return self.read()
+
+    async def query_extended(self, cmd) -> str:
+        """Send an extended command and parse the response"""
+        if len(cmd) < 2 or "\\?" in cmd:
+            raise ValueError("Invalid extended command")
+
+        async with self._lock:
+            self._discard_input()
+            await self.write("\\?" + cmd)
+
+            await self._wait(lambda rx: any(line.startswith("\\!") for line in rx))
+            ret = self.read()
+
+        if not ret:
+            raise RuntimeError("No response from rotator")
+        resp = next((line for line in ret if line.startswith("\\!")), ret[0])
+
+        return _check_extended(resp)
+
+    async def query_many(self, cmds: list[str]) -> dict[str, str]:
+        """Send several extended commands back-to-back, see `K3NG.query_many`"""
+        if any(len(cmd) < 2 or "\\?" in cmd for cmd in cmds):
+            raise ValueError("Invalid extended command")
+
+        codes = [cmd[0:2] for cmd in cmds]
+        if len(set(codes)) != len(codes):
+            raise ValueError("Duplicate extended command")
+
+        async with self._lock:
+            self._discard_input()
+            await self._send("".join(f"\\?{cmd}\r" for cmd in cmds))
+
+            await self._wait(
+                lambda rx: sum(line.startswith("\\!") for line in rx) >= len(cmds)
+            )
+            ret = self.read()
+
+        responses = {line[4:6]: line for line in ret if line.startswith("\\!")}
+
+        results = {}
+        for code in codes:
+            if code not in responses:
+                raise RuntimeError(f"No response from rotator for {code}")
+            results[code] = _check_extended(responses[code])
+
+        return results
+
+    async def flush(self) -> None:
+        """Flush the input buffer"""
+        await self.write("\r")
+        await self._writer.drain()
+        self._rx.clear()
+
+    #  ╭──────────────────────────────────────────────────────────╮
+    #  │                       Basic Config                       │
+    #  ╰──────────────────────────────────────────────────────────╯
+
+    async def get_version(self) -> str:
+        """Get the version of the K3NG firmware"""
+        return await self.query_extended("CV")
+
+    async def get_time(self) -> datetime.datetime:
+        """Get the stored time on the K3NG"""
+        return _parse_clock(await self.query("\\C", lines=1))
+
+    async def set_time(self, in_time: Optional[str] = None) -> None:
+        """Set the time on the K3NG to the current UTC time"""
+        cmd, expected = _clock_command(in_time)
+        _check_clock_set(await self.query(cmd, lines=1), expected)
+        await self.check_time()
+
+    async def check_time(self) -> None:
+        """Verify that the stored time is pretty close to the current time"""
+        _check_clock_drift(await self.get_time())
+
+    async def get_loc(self) -> str:
+        """Get the stored location from the K3NG"""
+        return await self.query_extended("RG")
+
+    async def set_loc(self, loc) -> None:
+        """Set the location of the K3NG in maidenhead coordinates"""
+        _check_loc(loc)
+        await self.query("\\G" + loc)
+
+    async def save_to_eeprom(self) -> None:
+        """Store the current configuration to EEPROM"""
+        async with self._lock:
+            await self.write("\\Q")
+            # This command restarts, so we reprime the buffer
+            await asyncio.sleep(1)
+            await self.flush()
+        await self.query("\\-")
+
+    #  ╭──────────────────────────────────────────────────────────╮
+    #  │                         Movement                         │
+    #  ╰──────────────────────────────────────────────────────────╯
+
+    async def get_elevation(self) -> float:
+        """Get the current elevation"""
+        return _parse_elevation(await self.query_extended("EL"))
+
+    async def set_elevation(self, el: float) -> None:
+        """Command the rotator to a given elevation"""
+        await self.query_extended(f"GE{el:05.2f}")
+
+    async def get_azimuth(self) -> float:
+        """Get the current azimuth"""
+        return _parse_azimuth(await self.query_extended("AZ"))
+
+    async def get_position(self) -> tuple[float, float]:
+        """Get the current azimuth and elevation in a single exchange"""
+        ret = await self.query_many(["AZ", "EL"])
+        return (_parse_azimuth(ret["AZ"]), _parse_elevation(ret["EL"]))
+
+    async def set_azimuth(self, az: float) -> None:
+        """Command the rotator to a given azimuth"""
+        await self.query_extended(f"GA{az:05.2f}")
+
+    async def down(self) -> None:
+        """Command the rotator to move down"""
+        await self.query_extended("RD")
+
+    async def up(self) -> None:
+        """Command the rotator to move up"""
+        await self.query_extended("RU")
+
+    async def left(self) -> None:
+        """Command the rotator to move left"""
+        await self.query_extended("RL")
+
+    ccw = left
+
+    async def right(self) -> None:
+        """Command the rotator to move right"""
+        await self.query_extended("RR")
+
+    cw = right
+
+    async def stop_azimuth(self) -> None:
+        """Command the rotator to stop moving the azimuth axis"""
+        await self.query_extended("SA")
+
+    async def stop_elevation(self) -> None:
+        """Command the rotator to stop moving the elevation axis"""
+        await self.query_extended("SE")
+
+    async def stop(self) -> None:
+        """Command the rotator to stop moving all axes"""
+        await self.query_extended("SS")
+
+    #  ╭──────────────────────────────────────────────────────────╮
+    #  │                       Calibration                        │
+    #  ╰──────────────────────────────────────────────────────────╯
+
+    async def cal_full_up(self) -> int:
+        """Set the full up calibration location"""
+        return int(await self.query_extended("EF"))
+
+    async def cal_full_down(self) -> int:
+        """Set the full down calibration location"""
+        return int(await self.query_extended("EO"))
+
+    async def cal_full_cw(self) -> int:
+        """Set the full clockwise calibration location"""
+        return int(await self.query_extended("AF"))
+
+    async def cal_full_ccw(self) -> int:
+        """Set the full counterclockwise calibration location"""
+        return int(await self.query_extended("AO"))
+
+    #  ╭──────────────────────────────────────────────────────────╮
+    #  │                         Features                         │
+    #  ╰──────────────────────────────────────────────────────────╯
+
+    async def park(self) -> None:
+        """Command the rotator to the parked location"""
+        _check_parking(await self.query("\\P", lines=1))
+
+    async def get_autopark(self) -> int:
+        """Determine if the rotator is in autopark or not"""
+        return _parse_autopark(await self.query("\\Y", lines=1))
+
+    async def set_autopark(self, duration: int) -> None:
+        """Set the state of the autopark, see `K3NG.set_autopark`"""
+        ret = await self.query(_autopark_command(duration), lines=1)
+        _check_autopark_set(ret, duration)
+
+    async def set_park_location(self, az: int, el: int) -> None:
+        """Set the park location to the current location"""
+        _check_park_set(await self.query(f"\\PA{az:03}", lines=1), "Azimuth", az)
+        _check_park_set(await self.query(f"\\PE{el:03}", lines=1), "Elevation", el)
+
+    async def get_park_location(self) -> tuple[int, int]:
+        """Get the park location"""
+        return _parse_park_location(await self.query("\\PA", lines=1))
+
+    async def load_tle(self, sat: Satellite) -> None:
+        """Load a TLE into the K3NG rotator controller"""
+        await self.load_tles([sat.tle])
+
+    async def load_tles(self, tles: list[TLE]) -> None:
+        """Load several TLEs into the K3NG rotator controller in one upload"""
+        if not tles:
+            return
+
+        async with self._lock:
+            await self._load_tles(tles)
+
+    async def _load_tles(self, tles: list[TLE]) -> None:
+        """`load_tles`, for when the lock is already held"""
+        self._discard_input()
+        await self.write("\\#")
+        await asyncio.sleep(0.5)
+        for tle in tles:
+            await self.write(tle.title)
+            await self.write(tle.line_one)
+            await self.write(tle.line_two)
+        await self.write("\r")
+        await self._wait(
+            lambda rx: len(rx) >= 1 + len(tles),
+            timeout=5 * self.timeout * len(tles),
+        )
+        _check_tles_loaded(self.read(), tles)
+
+    async def load_tle_from_file(self, tle_file: str) -> Satellite:
+        """Load the TLE in a file into the K3NG rotator controller"""
+        sat = Satellite(0, _read_tle_file(tle_file))
+        await self.load_tle(sat)
+
+        return sat
+
+    async def read_tles(self) -> list[TLE]:
+        """Read the stored TLEs in the K3NG"""
+        async with self._lock:
+            return await self._read_tles()
+
+    async def _read_tles(self) -> list[TLE]:
+        """`read_tles`, for when the lock is already held"""
+        return _parse_tles(await self._query("\\@", timeout=10 * self.timeout))
+
+    async def sync_tles(self, satellites: list[Satellite]) -> TLESyncResult:
+        """Make sure the K3NG stores the TLEs of `satellites`, see `K3NG.sync_tles`"""
+        start = time.monotonic()
+        sent = self.bytes_sent
+
+        # Held throughout, so nothing else can change the stored TLEs mid-sync
+        async with self._lock:
+            upload, unchanged, clear = _plan_tle_sync(
+                await self._read_tles(), [sat.tle for sat in satellites]
+            )
+            if clear:
+                _check_tles_cleared(await self._query("\\!", lines=1))
+            if upload:
+                await self._load_tles(upload)
+
+        result = TLESyncResult(
+            uploaded=[tle.title for tle in upload],
+            unchanged=[tle.title for tle in unchanged],
+            cleared=clear,
+            bytes_written=self.bytes_sent - sent,
+            elapsed=time.monotonic() - start,
+        )
+        logger.info("Synced TLEs: %s", result)
+        return result
+
+    async def clear_tles(self) -> None:
+        """Clear the TLEs stored to the K3NG"""
+        _check_tles_cleared(await self.query("\\!", lines=1))
+
+    async def get_trackable(self) -> list[str]:
+        """Get a list of trackable satellites"""
+        return _parse_trackable(await self.query("\\|"))
+
+    async def get_tracking_status(self) -> TrackingStatus:
+        """Get the state of the K3NG tracking"""
+        return _parse_tracking_status(await self._query_tracking())
+
+    async def select_satellite(self, sat: Satellite) -> None:
+        """Select a satellite to track"""
+        _check_selected(await self.query("\\$" + sat.tle.title[0:5], lines=2))
+
+    async def get_next_pass(self, sat: Satellite) -> list[str]:
+        """Get the next calculated pass"""
+        return await self.query(f"\\%{sat.tle.title[0:6]}")
+
+    async def enable_tracking(self) -> None:
+        """Enable tracking of the selected satellite"""
+        _check_tracking_set(await self.query("\\^1", lines=1), True)
+
+    async def disable_tracking(self) -> None:
+        """Disable tracking of the selected satellite"""
+        _check_tracking_set(await self.query("\\^0", lines=1), False)
+
+    async def load_and_track(self, sat_id: int) -> None:
+        """Helper to load and begin tracking a satellite"""
+        # Fetching the TLE is blocking network I/O, keep it off the event loop
+        sat = await asyncio.get_running_loop().run_in_executor(None, Satellite, sat_id)
+        await self.set_time()
+        await self.load_tle(sat)
+        await self.check_time()
+        await self.select_satellite(sat)
+        await self.enable_tracking()
+        await self.get_tracking_status()
+
+    async def get_raw_analog(self, pin: int) -> int:
+        """Returns the raw ADC reading of a valid analog pin"""
+        _check_pin(pin)
+        return _parse_analog(await self.query_extended(f"AR{pin:02}"))
+
+    async def get_raw_voltage(
+        self, pin: int, vref: float = 5.0, numbits: int = 10
+    ) -> float:
+        """Returns the raw voltage of a valid analog pin"""
+        return await self.get_raw_analog(pin) * vref / (2**numbits)
@@ -0,0 +1,375 @@
+"""Compact binary RPC for a shared K3NG, lighter and safer than exposing it over rpyc
+
+Every message is a frame: a little-endian u32 length, then a u32 request ID and a u8 (the
+command code in requests, the status in responses), then the body. Only the commands in
+`COMMANDS` can be called, with their arguments and results packed as fixed struct formats,
+or as UTF-8 ("s") or JSON ("j") for the few that return structured data. Responses carry
+the ID of their request, so a client may send several requests without waiting.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from .k3ng import K3NG
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 18867
+# Larger frames are refused, whichever end sends them
+MAX_FRAME = 1 << 20
+# Threads running rotator commands for the server; they mostly wait on the serial link
+WORKERS = 8
+# Threads kept for urgent commands, so they never queue behind the others for a thread
+URGENT_WORKERS = 2
+
+_LENGTH = struct.Struct("<I")
+_HEADER = struct.Struct("<IB")
+_BODY = _HEADER.size
+
+
+@dataclass(frozen=True)
+class Command:
+    """A callable K3NG method, with how its arguments and result are encoded
+
+    `urgent` commands (the stops) run on their own threads, see `BinaryRPCServer`.
+    """
+
+    code: int
+    name: str
+    args: str = ""
+    result: str = ""
+    urgent: bool = False
+
+
+COMMANDS = (
+    Command(1, "get_position", result="dd"),
+    Command(2, "get_azimuth", result="d"),
+    Command(3, "get_elevation", result="d"),
+    Command(4, "set_azimuth", "d"),
+    Command(5, "set_elevation", "d"),
+    Command(6, "stop", urgent=True),
+    Command(7, "stop_azimuth", urgent=True),
+    Command(8, "stop_elevation", urgent=True),
+    Command(9, "up"),
+    Command(10, "down"),
+    Command(11, "left"),
+    Command(12, "right"),
+    Command(13, "park"),
+    Command(14, "get_park_location", result="ii"),
+    Command(15, "set_park_location", "ii"),
+    Command(16, "get_autopark", result="i"),
+    Command(17, "set_autopark", "i"),
+    Command(18, "get_version", result="s"),
+    Command(19, "get_loc", result="s"),
+    Command(20, "set_loc", "s"),
+    Command(21, "set_time"),
+    Command(22, "enable_tracking"),
+    Command(23, "disable_tracking"),
+    Command(24, "load_and_track", "I"),
+    Command(25, "get_tracking_status", result="j"),
+    Command(26, "get_telemetry", result="j"),
+    Command(27, "get_stats", result="j"),
+    Command(28, "estimate_move_time", "dd", "d"),
+)
+
+_BY_CODE = {command.code: command for command in COMMANDS}
+_BY_NAME = {command.name: command for command in COMMANDS}
+
+# Response statuses
+STATUS_OK = 0
+STATUS_ERROR = 1
+STATUS_INVALID = 2
+
+
+def _pack(fmt: str, values: tuple) -> bytes:
+    if fmt == "s":
+        return str(values[0]).encode()
+    if fmt == "j":
+        value = values[0]
+        if hasattr(value, "as_dict"):
+            value = value.as_dict()
+        return json.dumps(value).encode()
+    return struct.pack("<" + fmt, *values)
+
+
+def _unpack(fmt: str, data: bytes) -> tuple:
+    if fmt == "s":
+        return (data.decode(),)
+    if fmt == "j":
+        return (json.loads(data),)
+    return struct.unpack("<" + fmt, data)
+
+
+def _result(fmt: str, value: Any) -> tuple:
+    """A method's return value as the tuple to pack"""
+    if not fmt:
+        return ()
+    if len(fmt) > 1 and fmt not in ("s", "j"):
+        return tuple(value)
+    return (value,)
+
+
+def _parse(frame: bytes) -> tuple[int, int, bytes]:
+    """Request ID, code or status, and body of a received frame (without its length)"""
+    request_id, code = _HEADER.unpack_from(frame)
+    return request_id, code, frame[_BODY:]
+
+
+def _frame(request_id: int, code: int, body: bytes = b"") -> bytes:
+    header = _HEADER.pack(request_id, code)
+    return _LENGTH.pack(len(header) + len(body)) + header + body
+
+
+#  ╭──────────────────────────────────────────────────────────╮
+#  │                          Server                          │
+#  ╰──────────────────────────────────────────────────────────╯
+
+
+class BinaryRPCServer:
+    """Serves `COMMANDS` on a K3NG to any number of clients from one event loop
+
+    Listens on TCP (`host`:`port`) and/or a Unix socket (`path`). Commands run on a small
+    thread pool, and urgent ones on a separate pool, so a `stop` never waits for a thread
+    behind other clients' commands. The K3NG's own scheduling then runs it next on the
+    serial link.
+    """
+
+    def __init__(
+        self,
+        rot: K3NG,
+        host: str = "127.0.0.1",
+        port: Optional[int] = DEFAULT_PORT,
+        path: Optional[str] = None,
+    ) -> None:
+        if port is None and path is None:
+            raise ValueError("Nothing to listen on")
+
+        self.rot = rot
+        self.host = host
+        self.port = port
+        self.path = path
+        self._executor = ThreadPoolExecutor(WORKERS, thread_name_prefix="k3ng-binrpc")
+        self._urgent_executor = ThreadPoolExecutor(
+            URGENT_WORKERS, thread_name_prefix="k3ng-binrpc-urgent"
+        )
+
+    async def serve(self) -> None:
+        """Listen and serve until cancelled"""
+        servers = []
+        if self.port is not None:
+            servers.append(
+                await asyncio.start_server(self._handle, self.host, self.port)
+            )
+        if self.path is not None:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            servers.append(await asyncio.start_unix_server(self._handle, self.path))
+
+        logger.info(
+            "Binary RPC listening on %s", [s.sockets[0].getsockname() for s in servers]
+        )
+        try:
+            await asyncio.gather(*(server.serve_forever() for server in servers))
+        finally:
+            for server in servers:
+                server.close()
+            if self.path is not None and os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def start(self) -> threading.Thread:
+        """Serve from a background thread with its own event loop"""
+        thread = threading.Thread(
+            target=asyncio.run, args=(self.serve(),), name="k3ng-binrpc", daemon=True
+        )
+        thread.start()
+        return thread
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        # Responses are written from their own tasks, one at a time
+        write_lock = asyncio.Lock()
+        pending: set[asyncio.Task] = set()
+        try:
+            while True:
+                length = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))[0]
+                if not _HEADER.size <= length <= MAX_FRAME:
+                    logger.warning("Dropping client sending a %s byte frame", length)
+                    return
+                frame = await reader.readexactly(length)
+                request_id, code, body = _parse(frame)
+
+                # Answered out of order, so a quick command isn't held up by a slow one
+                task = asyncio.create_task(
+                    self._respond(writer, write_lock, request_id, code, body)
+                )
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            # Still answer what was asked before the client stopped sending
+            await asyncio.gather(*pending, return_exceptions=True)
+            writer.close()
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        write_lock: asyncio.Lock,
+        request_id: int,
+        code: int,
+        body: bytes,
+    ) -> None:
+        command = _BY_CODE.get(code)
+        if command is None:
+            status, ret = STATUS_INVALID, f"Unknown command {code}".encode()
+        else:
+            status, ret = await self._call(command, body)
+
+        async with write_lock:
+            if writer.is_closing():
+                return
+            try:
+                writer.write(_frame(request_id, status, ret))
+                await writer.drain()
+            except ConnectionError:
+                logger.debug("Client went away before its response")
+
+    async def _call(self, command: Command, body: bytes) -> tuple[int, bytes]:
+        try:
+            args = _unpack(command.args, body) if command.args else ()
+        except (struct.error, ValueError) as ex:
+            return STATUS_INVALID, f"Bad arguments for {command.name}: {ex}".encode()
+
+        func: Callable[..., Any] = getattr(self.rot, command.name)
+        executor = self._urgent_executor if command.urgent else self._executor
+        loop = asyncio.get_running_loop()
+        try:
+            value = await loop.run_in_executor(executor, func, *args)
+            return STATUS_OK, _pack(command.result, _result(command.result, value))
+        except ValueError as ex:
+            # Bad arguments the method itself rejected, raised again by the client
+            return STATUS_INVALID, str(ex).encode()
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            # Any failure goes back to the client rather than taking the server down
+            logger.debug("%s failed: %s", command.name, ex)
+            return STATUS_ERROR, f"{type(ex).__name__}: {ex}".encode()
+
+
+#  ╭──────────────────────────────────────────────────────────╮
+#  │                          Client                          │
+#  ╰──────────────────────────────────────────────────────────╯
+
+
+class BinaryRPCClient:
+    """Blocking client for `BinaryRPCServer`, with a method per command in `COMMANDS`
+
+    Connects over TCP, or to the Unix socket at `path` if given. Failed commands raise
+    RuntimeError, and invalid ones ValueError, like they would locally.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = DEFAULT_PORT,
+        path: Optional[str] = None,
+        timeout: float = 10.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.path = path
+        self.timeout = timeout
+        self.sock = self._connect()
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def _connect(self) -> socket.socket:
+        if self.path is not None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            return sock
+
+        sock = socket.create_connection((self.host, self.port), self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def close(self) -> None:
+        """Close the connection"""
+        self.sock.close()
+
+    def __enter__(self) -> "BinaryRPCClient":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name not in _BY_NAME:
+            raise AttributeError(name)
+        return lambda *args: self.call(name, *args)
+
+    def _recv(self, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Connection closed by server")
+            data += chunk
+        return bytes(data)
+
+    def call(self, name: str, *args: Any) -> Any:
+        """Run a command on the server and return its result"""
+        command = _BY_NAME.get(name)
+        if command is None:
+            raise ValueError(f"Unknown command {name}")
+        if len(args) != (1 if command.args in ("s", "j") else len(command.args)):
+            raise ValueError(f"{name} takes {command.args or 'no'} arguments")
+
+        with self._lock:
+            self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+            request_id = self._next_id
+            try:
+                self.sock.sendall(
+                    _frame(request_id, command.code, _pack(command.args, args))
+                )
+
+                # Requests aren't pipelined here, so the next response is ours
+                length = _LENGTH.unpack(self._recv(_LENGTH.size))[0]
+                if not _HEADER.size <= length <= MAX_FRAME:
+                    raise RuntimeError(f"Invalid response length {length}")
+                frame = self._recv(length)
+            except socket.timeout:
+                # The late response, or the rest of it, would be taken for the next one's,
+                # so start again on a new connection
+                logger.warning("%s timed out, reconnecting", name)
+                self.sock.close()
+                self.sock = self._connect()
+                raise
+
+        response_id, status, body = _parse(frame)
+        if response_id != request_id:
+            raise RuntimeError(
+                f"Response to {response_id} while waiting on {request_id}"
+            )
+        if status == STATUS_INVALID:
+            raise ValueError(body.decode())
+        if status != STATUS_OK:
+            raise RuntimeError(body.decode())
+
+        if not command.result:
+            return None
+        values = _unpack(command.result, body)
+        return values if len(values) > 1 else values[0]
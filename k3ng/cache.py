@@ -0,0 +1,197 @@
+"""Persistent on-disk store of TLEs, so satellites can be loaded quickly and offline"""
+
+import datetime
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "k3ng"
+)
+
+
+def tle_epoch(line_one: str) -> datetime.datetime:
+    """Epoch of a TLE, from columns 19-32 of line one (YYDDD.DDDDDDDD)"""
+    field = line_one[18:32].strip()
+    year = int(field[0:2])
+    # Two digit years: 57-99 are 1957-1999, 00-56 are 2000-2056
+    year += 1900 if year >= 57 else 2000
+    day = float(field[2:])
+    return datetime.datetime(
+        year, 1, 1, tzinfo=datetime.timezone.utc
+    ) + datetime.timedelta(days=day - 1)
+
+
+@dataclass
+class CachedTLE:
+    """A TLE as stored in the cache"""
+
+    norad_id: int
+    title: str
+    line_one: str
+    line_two: str
+    fetched: float
+    epoch: float
+    # Validators from the HTTP response, for conditional refreshes
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def age(self) -> float:
+        """Seconds since this TLE was fetched"""
+        return time.time() - self.fetched
+
+    def epoch_age(self) -> float:
+        """Seconds since the epoch of this TLE"""
+        return time.time() - self.epoch
+
+
+class TLECache:
+    """TLEs keyed by NORAD ID, persisted as JSON
+
+    Entries are fresh for `max_age` seconds after they are fetched. Stale entries are still
+    kept so they can be used when offline, until their TLE epoch is more than
+    `max_epoch_age` seconds old. At most `max_entries` are kept, dropping the least recently
+    fetched first.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path, None] = None,
+        max_age: float = 6 * 3600,
+        max_epoch_age: float = 30 * 86400,
+        max_entries: int = 5000,
+    ) -> None:
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_DIR / "tles.json"
+        self.max_age = max_age
+        self.max_epoch_age = max_epoch_age
+        self.max_entries = max_entries
+
+        self._entries: Optional[dict[int, CachedTLE]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[int, CachedTLE]:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as file:
+                    for record in json.load(file):
+                        self._entries[record["norad_id"]] = CachedTLE(**record)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, TypeError, KeyError) as ex:
+                logger.warning("Ignoring unreadable TLE cache %s: %s", self.path, ex)
+        return self._entries
+
+    def save(self) -> None:
+        """Write the cache to disk"""
+        with self._lock:
+            entries = list(self._load().values())
+
+        tmp_path = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # A unique name, so concurrent saves can't interleave writes to the same file
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=self.path.parent, suffix=".tmp", delete=False
+            ) as file:
+                tmp_path = file.name
+                json.dump([asdict(entry) for entry in entries], file)
+            os.replace(tmp_path, self.path)
+        except OSError as ex:
+            logger.warning("Unable to save TLE cache %s: %s", self.path, ex)
+            if tmp_path is not None:
+                Path(tmp_path).unlink(missing_ok=True)
+
+    def get(
+        self, norad_id: int, max_age: Optional[float] = None
+    ) -> Optional[CachedTLE]:
+        """Get a TLE fetched within `max_age` seconds (the cache's max_age by default)
+
+        Pass `max_age=float("inf")` to accept stale entries. Entries whose epoch is older
+        than `max_epoch_age` are never returned, even before they are evicted.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            entry = self._load().get(norad_id)
+
+        if entry is None or entry.age() > max_age:
+            return None
+        if entry.epoch_age() > self.max_epoch_age:
+            return None
+        return entry
+
+    def put(
+        self,
+        norad_id: int,
+        title: str,
+        line_one: str,
+        line_two: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        save: bool = True,
+    ) -> CachedTLE:
+        """Store a freshly fetched TLE"""
+        entry = CachedTLE(
+            norad_id=norad_id,
+            title=title,
+            line_one=line_one,
+            line_two=line_two,
+            fetched=time.time(),
+            epoch=tle_epoch(line_one).timestamp(),
+            etag=etag,
+            last_modified=last_modified,
+        )
+        with self._lock:
+            self._load()[norad_id] = entry
+            self._evict()
+
+        if save:
+            self.save()
+        return entry
+
+    def touch(self, norad_id: int, save: bool = True) -> Optional[CachedTLE]:
+        """Mark a TLE as fetched now, after the server confirmed it is unchanged"""
+        with self._lock:
+            entry = self._load().get(norad_id)
+            if entry is not None:
+                entry.fetched = time.time()
+
+        if entry is not None and save:
+            self.save()
+        return entry
+
+    def evict(self) -> int:
+        """Drop expired entries, returning how many were dropped"""
+        with self._lock:
+            count = self._evict()
+        if count:
+            self.save()
+        return count
+
+    def _evict(self) -> int:
+        entries = self._load()
+        expired = [
+            key
+            for key, entry in entries.items()
+            if entry.epoch_age() > self.max_epoch_age
+        ]
+
+        excess = len(entries) - len(expired) - self.max_entries
+        if excess > 0:
+            by_fetch = sorted(
+                (entry for key, entry in entries.items() if key not in expired),
+                key=lambda entry: entry.fetched,
+            )
+            expired += [entry.norad_id for entry in by_fetch[:excess]]
+
+        for key in expired:
+            del entries[key]
+        return len(expired)
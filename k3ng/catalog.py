@@ -0,0 +1,230 @@
+"""Indexed reader for large 2LE/3LE catalog files, so satellites can be loaded offline"""
+
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from .k3ng import TLE, Satellite, _sanitise_title
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"K3NGIDX1"
+# magic, catalog size, catalog mtime (ns), number of entries, length of the names blob
+_HEADER = struct.Struct("<8sqqqq")
+
+# Alpha-5 NORAD IDs replace the leading digit with a letter, skipping I and O
+_ALPHA5 = "ABCDEFGHJKLMNPQRSTUVWXYZ"
+
+
+def _norad_id(line_one: bytes) -> int:
+    """NORAD ID from columns 3-7 of line one, including Alpha-5 IDs"""
+    field = line_one[2:7].decode("ascii").strip()
+    if field[:1].isalpha():
+        return (_ALPHA5.index(field[0].upper()) + 10) * 10000 + int(field[1:])
+    return int(field)
+
+
+def _name_key(name: str) -> str:
+    return _sanitise_title(name.strip()).upper() if name.strip() else ""
+
+
+class TLECatalog:
+    """Memory-mapped 2LE/3LE catalog with lookups by NORAD ID or name
+
+    The catalog is indexed once, mapping NORAD IDs and sanitised names to the byte offset
+    of each element set, and the index is saved next to the file (`<file>.idx`). It is
+    rebuilt when the file's size or modification time changes. Elements without a title
+    line (2LE) are titled by their NORAD ID.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + INDEX_SUFFIX)
+
+        self._file = open(self.path, "rb")  # pylint: disable=consider-using-with
+        stat = os.fstat(self._file.fileno())
+        self._stamp = (stat.st_size, stat.st_mtime_ns)
+        self._map: Optional[mmap.mmap] = None
+        if stat.st_size > 0:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._ids: dict[int, int] = {}
+        self._names: dict[str, int] = {}
+        if not self._load_index():
+            self._build_index()
+            self._save_index()
+
+    def close(self) -> None:
+        """Unmap and close the catalog file"""
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "TLECatalog":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, norad_id: object) -> bool:
+        return norad_id in self._ids
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    #  ╭──────────────────────────────────────────────────────────╮
+    #  │                         Lookups                          │
+    #  ╰──────────────────────────────────────────────────────────╯
+
+    def get(self, norad_id: int) -> Optional[TLE]:
+        """TLE of a NORAD ID, or None if it isn't in the catalog"""
+        offset = self._ids.get(norad_id)
+        return None if offset is None else self._read(offset)
+
+    def find(self, name: str) -> Optional[TLE]:
+        """TLE of a satellite by name (as sanitised for the K3NG), or None"""
+        offset = self._names.get(_name_key(name))
+        return None if offset is None else self._read(offset)
+
+    def satellite(self, norad_id: int) -> Satellite:
+        """Satellite for a NORAD ID, without going to the network"""
+        tle = self.get(norad_id)
+        if tle is None:
+            raise KeyError(f"NORAD ID {norad_id} not in {self.path}")
+        return Satellite(norad_id, tle)
+
+    def _line(self, pos: int) -> tuple[str, int]:
+        """The line starting at `pos`, and where the next one starts"""
+        assert self._map is not None
+        end = self._map.find(b"\n", pos)
+        end = len(self._map) if end < 0 else end + 1
+        return self._map[pos:end].decode("ascii", errors="replace").strip(), end
+
+    def _read(self, offset: int) -> TLE:
+        first, pos = self._line(offset)
+        if first.startswith("1 "):
+            line_one = first
+            title = str(_norad_id(first.encode()))
+        else:
+            line_one, pos = self._line(pos)
+            title = _sanitise_title(first)
+        line_two, _ = self._line(pos)
+        return TLE(title, line_one, line_two)
+
+    #  ╭──────────────────────────────────────────────────────────╮
+    #  │                          Index                           │
+    #  ╰──────────────────────────────────────────────────────────╯
+
+    def _build_index(self) -> None:
+        self._ids = {}
+        self._names = {}
+        if self._map is None:
+            return
+
+        mapped = self._map
+        size = len(mapped)
+        title: Optional[bytes] = None
+        title_offset = 0
+        pos = 0
+        while pos < size:
+            end = mapped.find(b"\n", pos)
+            end = size if end < 0 else end + 1
+            line = mapped[pos:end].strip()
+
+            if line.startswith(b"1 "):
+                offset = title_offset if title is not None else pos
+                try:
+                    norad_id = _norad_id(line)
+                except ValueError:
+                    logger.warning("Skipping malformed TLE at byte %s", pos)
+                else:
+                    self._ids.setdefault(norad_id, offset)
+                    if title is not None:
+                        name = _name_key(title.decode("ascii", errors="replace"))
+                        if name:
+                            self._names.setdefault(name, offset)
+                title = None
+            elif line and not line.startswith(b"2 "):
+                title = line
+                title_offset = pos
+
+            pos = end
+
+        logger.info("Indexed %s TLEs in %s", len(self._ids), self.path)
+
+    def _load_index(self) -> bool:
+        try:
+            with open(self.index_path, "rb") as file:
+                data = file.read()
+            magic, size, mtime, count, names_len = _HEADER.unpack_from(data)
+        except (OSError, struct.error):
+            return False
+
+        if magic != INDEX_MAGIC or (size, mtime) != self._stamp:
+            return False
+
+        try:
+            column = struct.Struct(f"<{count}q")
+            ids = column.unpack_from(data, _HEADER.size)
+            offsets = column.unpack_from(data, _HEADER.size + column.size)
+            name_offsets = column.unpack_from(data, _HEADER.size + 2 * column.size)
+            names_start = _HEADER.size + 3 * column.size
+            blob = data[names_start:]
+            if len(blob) != names_len:
+                raise ValueError("Truncated names")
+            names = blob.decode("ascii").split("\n")
+        except (ValueError, UnicodeDecodeError, struct.error) as ex:
+            logger.warning("Ignoring unreadable index %s: %s", self.index_path, ex)
+            return False
+
+        self._ids = {
+            norad_id: offset for norad_id, offset in zip(ids, offsets) if norad_id >= 0
+        }
+        self._names = {
+            name: offset for name, offset in zip(names, name_offsets) if offset >= 0
+        }
+        return True
+
+    def _save_index(self) -> None:
+        # One row per name or NORAD ID: ids without a name have an empty name and names
+        # without their own id row use -1
+        ids = array("q", self._ids.keys())
+        offsets = array("q", self._ids.values())
+        by_offset = {offset: name for name, offset in self._names.items()}
+        names = [by_offset.pop(offset, "") for offset in offsets]
+        name_offsets = array("q", (o if n else -1 for o, n in zip(offsets, names)))
+        for offset, name in by_offset.items():
+            ids.append(-1)
+            offsets.append(-1)
+            names.append(name)
+            name_offsets.append(offset)
+
+        blob = "\n".join(names).encode("ascii")
+        header = _HEADER.pack(INDEX_MAGIC, *self._stamp, len(ids), len(blob))
+
+        tmp_path = None
+        try:
+            # A unique name, so two processes indexing the same catalog don't clash
+            with tempfile.NamedTemporaryFile(
+                "wb", dir=self.index_path.parent, suffix=".tmp", delete=False
+            ) as file:
+                tmp_path = file.name
+                file.write(header)
+                file.write(ids.tobytes())
+                file.write(offsets.tobytes())
+                file.write(name_offsets.tobytes())
+                file.write(blob)
+            os.replace(tmp_path, self.index_path)
+        except OSError as ex:
+            logger.warning("Unable to save index %s: %s", self.index_path, ex)
+            if tmp_path is not None:
+                Path(tmp_path).unlink(missing_ok=True)
@@ -0,0 +1,384 @@
+"""Pseudo-terminal emulator of the K3NG firmware, for testing without an Arduino
+
+Answers the subset of the K3NG command set used by this library, with a configurable
+response latency and a simple model of the rotator slewing towards its targets.
+
+Run `python -m k3ng.emulator` and point `K3NG` at the printed port.
+"""
+
+import datetime
+import logging
+import os
+import pty
+import select
+import threading
+import time
+import tty
+from argparse import ArgumentParser
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Axis:
+    """A single rotator axis, moving at a constant rate towards a target or in a direction"""
+
+    def __init__(self, position: float, rate: float, low: float, high: float) -> None:
+        self.rate = rate
+        self.low = low
+        self.high = high
+        self._position = position
+        self._target: Optional[float] = None
+        self._direction = 0
+        self._updated = time.monotonic()
+
+    @property
+    def position(self) -> float:
+        """Current position, advanced to now"""
+        now = time.monotonic()
+        step = self.rate * (now - self._updated)
+        self._updated = now
+
+        if self._target is not None:
+            error = self._target - self._position
+            if abs(error) <= step:
+                self._position = self._target
+                self._target = None
+            else:
+                self._position += step if error > 0 else -step
+        elif self._direction:
+            self._position += self._direction * step
+            self._position = min(max(self._position, self.low), self.high)
+
+        return self._position
+
+    def go_to(self, target: float) -> None:
+        """Slew to `target`, clamped to the axis limits"""
+        _ = self.position
+        self._target = min(max(target, self.low), self.high)
+        self._direction = 0
+
+    def move(self, direction: int) -> None:
+        """Turn towards the limit in `direction`, -1 or 1, until stopped"""
+        _ = self.position
+        self._target = None
+        self._direction = direction
+
+    def stop(self) -> None:
+        """Stop where the axis is now"""
+        _ = self.position
+        self._target = None
+        self._direction = 0
+
+
+class K3NGEmulator:
+    """Emulates a K3NG rotator controller on a pseudo-terminal
+
+    `port` is the path to hand to `K3NG`. Every reply is delayed by `latency` seconds, and
+    the axes slew at `az_rate`/`el_rate` degrees per second.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    VERSION = "2024.01.01.01"
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        az_rate: float = 6.0,
+        el_rate: float = 6.0,
+        az_range: tuple[float, float] = (0.0, 360.0),
+        grid: str = "FN03hp",
+    ) -> None:
+        self.latency = latency
+        self.azimuth = _Axis(0.0, az_rate, *az_range)
+        self.elevation = _Axis(0.0, el_rate, 0.0, 90.0)
+        self.grid = grid
+
+        self.clock_offset = datetime.timedelta()
+        self.park_location = (0, 0)
+        self.autopark = 0
+        self.tles: list[tuple[str, str, str]] = []
+        self.selected: Optional[str] = None
+        self.tracking = False
+        self.analog = [512] * 6
+
+        self._tle_upload: Optional[list[str]] = None
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="k3ng-emulator", daemon=True
+        )
+
+    def start(self) -> "K3NGEmulator":
+        """Start answering commands"""
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop answering commands and close the pseudo-terminal"""
+        self._stopping.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        os.close(self._master)
+        os.close(self._slave)
+
+    def __enter__(self) -> "K3NGEmulator":
+        return self.start()
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    #  ╭──────────────────────────────────────────────────────────╮
+    #  │                        Serial I/O                        │
+    #  ╰──────────────────────────────────────────────────────────╯
+
+    def _run(self) -> None:
+        buf = bytearray()
+        while not self._stopping.is_set():
+            ready, _, _ = select.select([self._master], [], [], 0.05)
+            if not ready:
+                continue
+
+            try:
+                buf += os.read(self._master, 4096)
+            except OSError:
+                return
+
+            while b"\r" in buf or b"\n" in buf:
+                end = min(i for i in (buf.find(b"\r"), buf.find(b"\n")) if i >= 0)
+                line = buf[:end].decode("utf-8", errors="replace").strip()
+                del buf[: end + 1]
+                self._handle(line)
+
+    def _send(self, lines: list[str]) -> None:
+        os.write(self._master, "".join(line + "\r\n" for line in lines).encode())
+
+    def _handle(self, line: str) -> None:
+        if self._tle_upload is not None:
+            if line:
+                self._send([line])
+                self._tle_upload.append(line)
+            else:
+                self._reply(self._finish_tle_upload())
+            return
+
+        if not line:
+            return
+
+        # The firmware echoes commands as they are typed
+        self._send([line])
+
+        if line.startswith("\\?"):
+            self._reply([self._extended(line[2:4], line[4:])])
+        elif line.startswith("\\"):
+            self._reply(self._backslash(line[1:]))
+
+    def _reply(self, lines: list[str]) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        self._send(lines)
+
+    #  ╭──────────────────────────────────────────────────────────╮
+    #  │                    Extended commands                     │
+    #  ╰──────────────────────────────────────────────────────────╯
+
+    def _extended(self, code: str, arg: str) -> str:
+        # pylint: disable=too-many-return-statements,too-many-branches
+        try:
+            if code == "AZ":
+                return f"\\!OKAZ{self.azimuth.position:010.6f}"
+            if code == "EL":
+                return f"\\!OKEL{self.elevation.position:010.6f}"
+            if code == "GA":
+                self.azimuth.go_to(float(arg))
+            elif code == "GE":
+                self.elevation.go_to(float(arg))
+            elif code in ("RL", "RR"):
+                self.azimuth.move(-1 if code == "RL" else 1)
+            elif code in ("RD", "RU"):
+                self.elevation.move(-1 if code == "RD" else 1)
+            elif code == "SA":
+                self.azimuth.stop()
+            elif code == "SE":
+                self.elevation.stop()
+            elif code == "SS":
+                self.azimuth.stop()
+                self.elevation.stop()
+            elif code == "CV":
+                return f"\\!OKCV{self.VERSION}"
+            elif code == "RG":
+                return f"\\!OKRG{self.grid}"
+            elif code in ("AF", "AO"):
+                return f"\\!OK{code}{round(self.azimuth.position)}"
+            elif code in ("EF", "EO"):
+                return f"\\!OK{code}{round(self.elevation.position)}"
+            elif code == "AR":
+                pin = int(arg)
+                return f"\\!OKAR{pin:02}{self.analog[pin]:04d}"
+            else:
+                return f"\\!??{code}00"
+        except (ValueError, IndexError):
+            return f"\\!??{code}01"
+
+        return f"\\!OK{code}"
+
+    #  ╭──────────────────────────────────────────────────────────╮
+    #  │                    Backslash commands                    │
+    #  ╰──────────────────────────────────────────────────────────╯
+
+    def _now(self) -> datetime.datetime:
+        return datetime.datetime.now(tz=datetime.timezone.utc) + self.clock_offset
+
+    @staticmethod
+    def _fmt_time(when: datetime.datetime) -> str:
+        return when.strftime("%Y-%m-%d %H:%M:%S")
+
+    def _backslash(self, cmd: str) -> list[str]:
+        # pylint: disable=too-many-return-statements,too-many-branches
+        if cmd == "-":
+            return [f"K3NG Rotator Controller Emulator {self.VERSION}"]
+        if cmd == "C":
+            return [self._fmt_time(self._now()) + "Z"]
+        if cmd.startswith("O") and len(cmd) == 15:
+            new_time = datetime.datetime.strptime(cmd[1:], "%Y%m%d%H%M%S").replace(
+                tzinfo=datetime.timezone.utc
+            )
+            self.clock_offset = new_time - datetime.datetime.now(
+                tz=datetime.timezone.utc
+            )
+            return [f"Clock set to {self._fmt_time(self._now())}Z"]
+        if cmd.startswith("G"):
+            self.grid = cmd[1:]
+            return [f"Coordinates set to: {self.grid}"]
+        if cmd == "Q":
+            return ["Saving settings to EEPROM and restarting..."]
+        if cmd == "PA":
+            return [
+                f"Park azimuth: {self.park_location[0]} elevation: {self.park_location[1]}"
+            ]
+        if cmd.startswith("PA"):
+            self.park_location = (int(cmd[2:]), self.park_location[1])
+            return [f"Park azimuth set to {self.park_location[0]}"]
+        if cmd.startswith("PE"):
+            self.park_location = (self.park_location[0], int(cmd[2:]))
+            return [f"Park elevation set to {self.park_location[1]}"]
+        if cmd == "P":
+            self.azimuth.go_to(self.park_location[0])
+            self.elevation.go_to(self.park_location[1])
+            return ["Parking..."]
+        if cmd == "Y":
+            return [self._autopark_status()]
+        if cmd.startswith("Y"):
+            self.autopark = int(cmd[1:])
+            return [self._autopark_status()]
+        if cmd == "#":
+            self._tle_upload = []
+            return []
+        if cmd == "@":
+            return ["TLE file:"] + [line for tle in self.tles for line in tle]
+        if cmd == "!":
+            self.tles = []
+            self.selected = None
+            return ["Erased the TLE file area"]
+        if cmd == "|":
+            return [
+                f"{title}\t{self._fmt_time(self._now())}" for title, _, _ in self.tles
+            ]
+        if cmd == "~":
+            return self._tracking_status()
+        if cmd.startswith("$"):
+            return self._select(cmd[1:])
+        if cmd.startswith("%"):
+            return [self._next_pass()]
+        if cmd in ("^0", "^1"):
+            self.tracking = cmd == "^1"
+            state = "activated" if self.tracking else "deactivated"
+            return [f"Satellite tracking {state}."]
+
+        return ["Error"]
+
+    def _autopark_status(self) -> str:
+        if self.autopark == 0:
+            return "Autopark is off"
+        return f"Autopark is on, timer: {self.autopark} minute(s)"
+
+    def _finish_tle_upload(self) -> list[str]:
+        lines = self._tle_upload or []
+        self._tle_upload = None
+
+        if len(lines) % 3 != 0:
+            return ["TLE corrupt, please check the input"]
+
+        loaded = []
+        for i in range(0, len(lines), 3):
+            title, line_one, line_two = lines[i], lines[i + 1], lines[i + 2]
+            if not (line_one.startswith("1 ") and line_two.startswith("2 ")):
+                return ["TLE corrupt, please check the input"]
+            self.tles.append((title, line_one, line_two))
+            loaded.append(title)
+
+        return [f"File was loaded with {len(loaded)} TLE(s):"] + loaded
+
+    def _select(self, name: str) -> list[str]:
+        for title, _, _ in self.tles:
+            if title.upper().startswith(name.upper()):
+                self.selected = title
+                return [f"Satellite: {title}", "Loading TLE and calculating..."]
+        return [f"Satellite {name} not found"]
+
+    def _next_pass(self) -> str:
+        aos = self._now().replace(microsecond=0) + datetime.timedelta(minutes=65)
+        los = aos + datetime.timedelta(minutes=10)
+        return (
+            f"Next AOS:{aos.strftime('%Y-%m-%d')} {aos.strftime('%H:%M:%S')} Az:120 "
+            f"LOS:{los.strftime('%Y-%m-%d')} {los.strftime('%H:%M:%S')} Az:240 Max El:45"
+        )
+
+    def _tracking_status(self) -> list[str]:
+        if self.selected is None:
+            return ["No satellite selected"]
+
+        state = "TRACKING_ACTIVE" if self.tracking else "TRACKING_INACTIVE"
+        return [
+            f"Satellite:{self.selected}",
+            f"AZ:{round(self.azimuth.position)} EL:{round(self.elevation.position)} "
+            f"Lat:43.65 Long:-79.38 LOS {state}",
+            self._next_pass(),
+            "AOS in ~1h5m",
+        ]
+
+
+def main() -> None:
+    """Run the emulator until interrupted, printing the port to connect to"""
+    parser = ArgumentParser(
+        prog="k3ng.emulator",
+        description="Emulates a K3NG rotator controller on a pseudo-terminal",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Delay before each reply (s)"
+    )
+    parser.add_argument(
+        "--az-rate", type=float, default=6.0, help="Azimuth slew rate (deg/s)"
+    )
+    parser.add_argument(
+        "--el-rate", type=float, default=6.0, help="Elevation slew rate (deg/s)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    with K3NGEmulator(args.latency, args.az_rate, args.el_rate) as emulator:
+        print(emulator.port, flush=True)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,290 @@
 """Command and control of the K3NG rotator controller"""
 
+import bisect
 import datetime
+import functools
+import heapq
+import itertools
 import logging
+import math
 import os
 import re
 import sys
+import threading
 import time
-from dataclasses import dataclass
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from enum import IntEnum
 from pathlib import Path
-from typing import List, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
 
-import requests
-import rpyc  # type: ignore
 import serial
 
+from .cache import TLECache
+from .motion import AxisModel, MotionModel, fit_run
+
+# Only needed to fetch TLEs, so it is imported on first use and serial-only scripts don't
+# pay for it
+if TYPE_CHECKING:
+    import requests
+
+SATNOGS_TLE_URL = "https://db.satnogs.org/api/tle/"
+
+# Least time between transmissions, so the controller isn't sent commands back to back
 SEND_DELAY = 0.03
 RECV_DELAY = 0.00
+# Longest time to wait for an expected reply before giving up on it
+RESPONSE_TIMEOUT = 1.0
+# Replies of unknown length are considered complete once the line is quiet for this long
+RESPONSE_QUIET = 0.1
+# How often to check the serial port while waiting on a reply
+POLL_INTERVAL = 0.002
+# Exchanges per command kept for the latency percentiles in `K3NG.get_stats`
+LATENCY_HISTORY = 1000
+# Upper bounds (s) of the command latency histogram buckets, see `CommandStats.histogram`
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# The whole reply to `\~` when no satellite has been selected
+NO_SATELLITE = "No satellite selected"
 
 logger = logging.getLogger(__name__)
 
 
-def exposify(cls):
-    """Decorator to append `exposed_` for all public members of a class"""
-    for key in dir(cls):
-        val = getattr(cls, key)
-        if callable(val) and not key.startswith("_"):
-            setattr(cls, "exposed_%s" % (key,), val)
-    return cls
+def _check_extended(resp: str) -> str:
+    """Validate an extended command response, returning its payload"""
+    status = resp[0:5]
+    if "\\!??" in status:
+        raise RuntimeError(f"Response error: {resp}")
+
+    if "OK" not in status:
+        raise RuntimeError(f"Invalid response: {resp}")
+
+    return resp[6:]
+
+
+def _no_satellite(lines: Iterable[str]) -> bool:
+    """Whether a tracking status (`\\~`) reply says no satellite is selected"""
+    return next(iter(lines), "").startswith(NO_SATELLITE)
+
+
+def _tracking_reply_done(lines: deque[str]) -> bool:
+    """Whether a tracking status reply has all arrived, whether it's 4 lines or 1"""
+    return len(lines) >= 4 or _no_satellite(lines)
+
+
+def _parse_azimuth(ret: str) -> float:
+    return float(ret)
+
+
+def _parse_elevation(ret: str) -> float:
+    # replace is to accomodate for a quirk in reporting at EL=0
+    return float(ret.replace("0-0.", "00."))
+
+
+def _check_port(ser_port: str) -> Path:
+    """Ensure we have r/w on a serial port"""
+    port = Path(ser_port)
+    if not port.exists():
+        raise FileNotFoundError(port)
+
+    if not os.access(
+        port,
+        os.R_OK | os.W_OK,
+        effective_ids=(os.access in os.supports_effective_ids),
+    ):
+        if os.geteuid() != 0:
+            logger.critical(
+                "Unable to acquire read/write permissions on %s.\n"
+                + "Please change permissions, or run this script as superuser.",
+                port,
+            )
+            sys.exit(1)
+
+    return port
+
+
+def _check_tles_loaded(ret: list[str], tles: list["TLE"]) -> None:
+    """Validate the response to a TLE upload"""
+    if not ret:
+        raise RuntimeError("TLE not loaded")
+    if "corrupt" in ret[0]:
+        logger.critical("TLE corrupted on write")
+        logger.info(ret)
+        raise RuntimeError("TLE corrupted")
+    if "truncated" in ret[0]:
+        logger.critical("File was truncated due to lack of EEPROM storage.")
+        logger.info(ret)
+        raise RuntimeError("TLE truncated")
+    loaded = "\n".join(ret[1:])
+    if any(tle.title not in loaded for tle in tles):
+        logger.critical("TLE not loaded")
+        logger.info(ret)
+        raise RuntimeError("TLE not loaded")
+
+
+def _parse_tles(ret: list[str]) -> list["TLE"]:
+    """Pick the stored TLEs out of the response to `\\@`"""
+    tles = []
+    i = 0
+    while i + 2 < len(ret):
+        if ret[i + 1].startswith("1 ") and ret[i + 2].startswith("2 "):
+            tles.append(TLE(ret[i], ret[i + 1], ret[i + 2]))
+            i += 3
+        else:
+            i += 1
+    return tles
+
+
+def _plan_tle_sync(
+    stored: list["TLE"], wanted: list["TLE"]
+) -> tuple[list["TLE"], list["TLE"], bool]:
+    """Work out what to upload so that `wanted` is stored
+
+    Returns the TLEs to upload, those already stored and whether the stored TLEs have to
+    be cleared first. The firmware can only append TLEs, so changing a stored one means
+    rewriting all of them, in which case nothing counts as already stored.
+    """
+    stored_by_title = {tle.title: tle for tle in stored}
+    wanted_by_title = {tle.title: tle for tle in wanted}
+
+    unchanged = [tle for tle in wanted_by_title.values() if tle in stored]
+    new = [tle for tle in wanted_by_title.values() if tle.title not in stored_by_title]
+    changed = [
+        tle
+        for tle in wanted_by_title.values()
+        if tle.title in stored_by_title and tle not in stored
+    ]
+
+    if not changed:
+        return new, unchanged, False
+
+    # Keep what else is stored, with the changed TLEs replaced
+    upload = [wanted_by_title.get(tle.title, tle) for tle in stored] + new
+    return upload, [], True
+
+
+class _LineBuffer:
+    """Incrementally splits received bytes into decoded lines
+
+    Bytes are accumulated in a single reusable buffer. Only complete lines (terminated by CR
+    and/or LF) are decoded, anything after the last terminator is kept for the next feed.
+    """
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self.lines: deque[str] = deque()
+
+    def feed(self, data: bytes) -> int:
+        """Add received bytes, returning the number of new (non-empty) lines"""
+        self._buf += data
+        end = max(self._buf.rfind(b"\r"), self._buf.rfind(b"\n"))
+        if end < 0:
+            return 0
+
+        with memoryview(self._buf) as view:
+            complete = view[: end + 1].tobytes()
+        del self._buf[: end + 1]
+
+        count = 0
+        for raw in complete.splitlines():
+            if raw:
+                self.lines.append(raw.decode("utf-8", errors="replace"))
+                count += 1
+        return count
+
+    def pop_all(self) -> list[str]:
+        """Remove and return all complete lines"""
+        lines = list(self.lines)
+        self.lines.clear()
+        return lines
+
+    def clear(self) -> None:
+        """Discard all buffered data, complete or not"""
+        self._buf.clear()
+        self.lines.clear()
+
+
+class Priority(IntEnum):
+    """Priority of a command waiting for the serial link, lowest goes first"""
+
+    STOP = 0
+    COMMAND = 1
+    TELEMETRY = 2
+    BULK = 3
+
+
+class CommandScheduler:
+    """Grants exclusive use of the serial link to one exchange at a time
+
+    Commands waiting for the link are granted it in priority order, then in order of arrival.
+    The thread holding the link can re-enter it, so compound commands can be built out of
+    smaller ones without giving up the link in between.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._owner: Optional[int] = None
+        self._depth = 0
+        self._waiting: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+
+    @contextmanager
+    def exchange(self, priority: Priority = Priority.COMMAND) -> Iterator[None]:
+        """Hold the serial link for the duration of the context"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._owner == me:
+                self._depth += 1
+            else:
+                ticket = (int(priority), next(self._seq))
+                heapq.heappush(self._waiting, ticket)
+                try:
+                    self._cond.wait_for(
+                        lambda: self._owner is None and self._waiting[0] == ticket
+                    )
+                finally:
+                    # Also when interrupted, so a ticket left at the head of the queue
+                    # can't block every exchange after it
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                self._owner = me
+                self._depth = 1
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._owner = None
+                    self._cond.notify_all()
+
+
+def _exchange(priority: Priority):
+    """Decorator to run a K3NG method as a single, uninterrupted exchange with the rotator"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self._scheduler.exchange(priority):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
 
 
 @dataclass
@@ -44,6 +301,113 @@ class TLE:
         self.line_two = self.line_two.strip()
 
 
+@dataclass
+class TLESyncResult:
+    """Outcome of syncing TLEs to the K3NG"""
+
+    uploaded: list[str]
+    unchanged: list[str]
+    cleared: bool
+    bytes_written: int
+    elapsed: float
+
+
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> "requests.Session":
+    """Shared HTTP session, so repeated fetches reuse the connection"""
+    global _session  # pylint: disable=global-statement
+    with _session_lock:
+        if _session is None:
+            # pylint: disable-next=import-outside-toplevel
+            import requests
+
+            _session = requests.Session()
+    return _session
+
+
+def _sanitise_title(title: str) -> str:
+    # Some TLE titles start with "0 " (i.e. "0 ISS") and others don't ("ISS")
+    # We opt to be consistent and NOT start with "0 ".
+    if title[0:2] == "0 ":
+        title = title[2:]
+
+    # K3NG doesn't like special characters or spaces
+    title = re.sub("[^A-Za-z0-9 ]+", "", title)
+    return title.replace(" ", "")
+
+
+def _retrieve_tle(
+    sat_id: int, cache: Optional[TLECache], refresh: bool = False, save: bool = True
+) -> "TLE":
+    """Get the TLE for a NORAD ID from the cache or SatNOGS
+
+    Unless refreshing, a fresh cached TLE is returned without any request. Otherwise a
+    cached TLE is revalidated with a conditional request, so an unchanged TLE costs no
+    transfer. If the request fails, a stale cached TLE is used rather than failing.
+    """
+    cached = None
+    if cache is not None:
+        cached = cache.get(sat_id, max_age=float("inf"))
+        if cached is not None and not refresh and cached.age() <= cache.max_age:
+            logger.info("Using cached TLE for NORAD ID %s", sat_id)
+            return TLE(cached.title, cached.line_one, cached.line_two)
+
+    # pylint: disable-next=import-outside-toplevel
+    import requests
+
+    headers = {}
+    if cached is not None and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached is not None and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+
+    params = {"format": "json", "norad_cat_id": str(sat_id)}
+    try:
+        resp = _get_session().get(
+            SATNOGS_TLE_URL, params=params, headers=headers, timeout=5
+        )
+        resp.raise_for_status()
+        if resp.status_code == 304:
+            # Only a conditional request should get this, so there's a cached TLE to use
+            if cached is None or cache is None:
+                raise requests.HTTPError(
+                    f"Not Modified for NORAD ID {sat_id} without a cached TLE",
+                    response=resp,
+                )
+            logger.info("TLE for NORAD ID %s is unchanged", sat_id)
+            cache.touch(sat_id, save=save)
+            return TLE(cached.title, cached.line_one, cached.line_two)
+        tle = resp.json()[0]
+    except requests.RequestException as ex:
+        if cached is None:
+            raise
+        logger.warning(
+            "Unable to fetch TLE for NORAD ID %s (%s), using cached TLE from %s",
+            sat_id,
+            ex,
+            datetime.datetime.fromtimestamp(cached.fetched),
+        )
+        return TLE(cached.title, cached.line_one, cached.line_two)
+
+    ret = TLE(_sanitise_title(tle["tle0"]), tle["tle1"], tle["tle2"])
+    if cache is not None:
+        cache.put(
+            sat_id,
+            ret.title,
+            ret.line_one,
+            ret.line_two,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+            save=save,
+        )
+
+    logger.info("Retrieved TLE for NORAD ID %s: %s", sat_id, ret)
+    return ret
+
+
 @dataclass
 class Satellite:
     """Class to store info about a satellite"""
@@ -51,6 +415,9 @@ class Satellite:
     id: int
     tle: TLE
 
+    # TLEs are looked up here before going to the network, set to None to always fetch
+    cache: ClassVar[Optional[TLECache]] = TLECache()
+
     def __init__(self, sat_id: int, tle: Optional[TLE] = None):
         self.id = sat_id
         if tle is None:
@@ -58,33 +425,92 @@ class Satellite:
         else:
             self.tle = tle
 
-    def retrieve_tle(self) -> TLE:
-        """Retrieve a TLE given a NORAD ID"""
-        params = {"format": "json", "norad_cat_id": str(self.id)}
-        resp = requests.get(
-            "https://db.satnogs.org/api/tle/", params=params, timeout=5
-        ).json()
-
-        # Some TLE titles start with "0 " (i.e. "0 ISS") and others don't ("ISS")
-        # We opt to be consistent and NOT start with "0 ".
-        if resp[0]["tle0"][0:2] == "0 ":
-            self.tle = TLE(resp[0]["tle0"][2:], resp[0]["tle1"], resp[0]["tle2"])
-        else:
-            self.tle = TLE(resp[0]["tle0"], resp[0]["tle1"], resp[0]["tle2"])
+    def retrieve_tle(self, refresh: bool = False) -> TLE:
+        """Retrieve a TLE given a NORAD ID
 
-        # K3NG doesn't like special characters or spaces
-        self.tle.title = re.sub("[^A-Za-z0-9 ]+", "", self.tle.title)
-        self.tle.title = self.tle.title.replace(" ", "")
+        A fresh TLE from the cache is used if there is one (unless refreshing). If fetching
+        fails, a stale one from the cache is used rather than failing.
+        """
+        self.tle = _retrieve_tle(self.id, self.cache, refresh)
+        return self.tle
 
-        logger.info("Retrieved TLE for NORAD ID %s: %s", self.id, self.tle)
+    @classmethod
+    def fetch_many(
+        cls, sat_ids: Sequence[int], max_workers: int = 8, refresh: bool = False
+    ) -> dict[int, "Satellite"]:
+        """Retrieve the TLEs of many satellites at once
+
+        Satellites with a fresh cached TLE cost nothing, the rest are fetched concurrently
+        (at most `max_workers` at a time) over one connection pool. With `refresh`, every
+        cached TLE is revalidated with a conditional request, so calling this periodically
+        only transfers TLEs that changed. Satellites that can't be retrieved are logged and
+        left out of the result.
+        """
+        # pylint: disable-next=import-outside-toplevel
+        import requests
+
+        ids = list(dict.fromkeys(sat_ids))
+
+        def retrieve(sat_id: int) -> TLE:
+            return _retrieve_tle(sat_id, cls.cache, refresh, save=False)
+
+        sats = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {sat_id: executor.submit(retrieve, sat_id) for sat_id in ids}
+            for sat_id, future in futures.items():
+                try:
+                    sats[sat_id] = cls(sat_id, future.result())
+                except (
+                    requests.RequestException,
+                    IndexError,
+                    KeyError,
+                    ValueError,
+                ) as ex:
+                    logger.warning(
+                        "Unable to retrieve TLE for NORAD ID %s: %s", sat_id, ex
+                    )
+
+        if cls.cache is not None:
+            cls.cache.save()
+
+        return sats
 
-        return self.tle
+
+_DATETIME = r"(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)"
+_PASS_RE = re.compile(
+    rf"AOS:{_DATETIME}\s+Az:(-?\d+)\s+LOS:{_DATETIME}\s+Az:(-?\d+)\s+Max\s+El:(-?\d+)"
+)
+_SATINFO_RE = re.compile(
+    r"AZ:(-?\d+)\s+EL:(-?\d+)\s+Lat:(\S+)\s+Long:(\S+)\s+(\S+)\s+(\S+)"
+)
+_EVENT_RE = re.compile(r"(\S+)\s+in\s+~?(?:(\d+)h)?(\d+)m")
+
+
+def _match(regex: re.Pattern, text: str) -> re.Match:
+    match = regex.search(text)
+    if match is None:
+        raise ValueError(f"Unable to parse: {text}")
+    return match
+
+
+# Consecutive statuses almost always report the same pass, so cache the times
+@functools.lru_cache(maxsize=64)
+def _parse_time(text: str) -> datetime.datetime:
+    # The format is fixed, so the C ISO parser is much faster than strptime
+    return datetime.datetime.fromisoformat(text)
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_timestamp(text: str) -> float:
+    return _parse_time(text).replace(tzinfo=datetime.timezone.utc).timestamp()
 
 
 @dataclass
 class PassInfo:
     """Class to store info about the stored pass"""
 
+    __slots__ = ("start_time", "start_az", "end_time", "end_az", "max_el")
+
     start_time: datetime.datetime
     start_az: int
     end_time: datetime.datetime
@@ -97,19 +523,21 @@ class PassInfo:
         Parse a K3NG message with the expected format:
         Next AOS:YYYY-MM-DD HH:MM:SS Az:XX LOS:YYYY-MM-DD HH:MM:SS Az:XX Max El:XX
         """
+        aos, aos_az, los, los_az, max_el = _match(_PASS_RE, statestr).groups()
 
-        splitstr = statestr.split()
-        aos_date = datetime.datetime.strptime(
-            splitstr[1][4:] + " " + splitstr[2], "%Y-%m-%d %H:%M:%S"
-        )
-        los_date = datetime.datetime.strptime(
-            splitstr[4][4:] + " " + splitstr[5], "%Y-%m-%d %H:%M:%S"
+        return cls(
+            _parse_time(aos), int(aos_az), _parse_time(los), int(los_az), int(max_el)
         )
-        aos_az = int(splitstr[3][3:])
-        los_az = int(splitstr[6][3:])
-        max_el = int(splitstr[8][3:])
 
-        return cls(aos_date, aos_az, los_date, los_az, max_el)
+    def as_dict(self) -> dict[str, Any]:
+        """Plain values only, suitable for sending to another process"""
+        return {
+            "start_time": self.start_time.isoformat(),
+            "start_az": self.start_az,
+            "end_time": self.end_time.isoformat(),
+            "end_az": self.end_az,
+            "max_el": self.max_el,
+        }
 
 
 class SignalState(IntEnum):
@@ -135,6 +563,19 @@ class TrackingStatus:
     """Class to store the state of K3NG's tracking"""
 
     # pylint: disable=too-many-instance-attributes
+    __slots__ = (
+        "satname",
+        "sat_state",
+        "is_tracking",
+        "cur_az",
+        "cur_el",
+        "cur_lat",
+        "cur_long",
+        "next_pass",
+        "next_event",
+        "next_event_mins",
+    )
+
     satname: str
     sat_state: SignalState
     is_tracking: bool
@@ -155,40 +596,461 @@ class TrackingStatus:
         [see PassInfo.from_status]
         [AOS | LOS] in XhXm
         """
-        # pylint: disable=too-many-locals
-
-        sat = statestr[0][10:]
-        satinfo = statestr[1].split()
-        cur_az = int(satinfo[0][3:])
-        cur_el = int(satinfo[1][3:])
-        cur_lat = float(satinfo[2][4:])
-        cur_long = float(satinfo[3][5:])
-        sat_state = SignalState.from_str(satinfo[4])
-        is_tracking = satinfo[5] == "TRACKING_ACTIVE"
-        next_pass = PassInfo.from_status(statestr[2])
-
-        next_event_str = statestr[3].split()
-        next_event = SignalState.from_str(next_event_str[0])
-        timestring = next_event_str[2].replace("~", "")
-        if "h" not in timestring:
-            mins = int(timestring[:-1])
-        else:
-            splitdur = timestring.split("h")
-            mins = int(splitdur[0]) * 60 + int(splitdur[1][:-1])
+        satinfo = _match(_SATINFO_RE, statestr[1])
+        event = _match(_EVENT_RE, statestr[3])
 
         return cls(
-            satname=sat,
-            cur_az=cur_az,
-            cur_el=cur_el,
-            cur_lat=cur_lat,
-            cur_long=cur_long,
-            sat_state=sat_state,
-            is_tracking=is_tracking,
-            next_pass=next_pass,
-            next_event=next_event,
-            next_event_mins=mins,
+            satname=statestr[0][10:],
+            cur_az=int(satinfo.group(1)),
+            cur_el=int(satinfo.group(2)),
+            cur_lat=float(satinfo.group(3)),
+            cur_long=float(satinfo.group(4)),
+            sat_state=SignalState.from_str(satinfo.group(5)),
+            is_tracking=satinfo.group(6) == "TRACKING_ACTIVE",
+            next_pass=PassInfo.from_status(statestr[2]),
+            next_event=SignalState.from_str(event.group(1)),
+            next_event_mins=_event_mins(event),
         )
 
+    def as_dict(self) -> dict[str, Any]:
+        """Plain values only, suitable for sending to another process"""
+        return {
+            "satname": self.satname,
+            "sat_state": self.sat_state.name,
+            "is_tracking": self.is_tracking,
+            "cur_az": self.cur_az,
+            "cur_el": self.cur_el,
+            "cur_lat": self.cur_lat,
+            "cur_long": self.cur_long,
+            "next_pass": self.next_pass.as_dict(),
+            "next_event": self.next_event.name,
+            "next_event_mins": self.next_event_mins,
+        }
+
+
+def _event_mins(match: re.Match) -> int:
+    """Minutes until the next event from an _EVENT_RE match"""
+    return int(match.group(2) or 0) * 60 + int(match.group(3))
+
+
+def parse_status_log(lines: Iterable[str]) -> dict[str, Any]:
+    """Parse a captured log of tracking status (`\\~`) responses into columns
+
+    Every status found in the log becomes one row, without building a `TrackingStatus` for
+    it. Other lines in the log, and statuses that don't parse, are skipped. Numeric columns
+    are `array`s (times are POSIX timestamps in UTC), names are a list.
+    """
+    columns: dict[str, Any] = {
+        "satname": [],
+        "sat_state": array("b"),
+        "is_tracking": array("b"),
+        "cur_az": array("d"),
+        "cur_el": array("d"),
+        "cur_lat": array("d"),
+        "cur_long": array("d"),
+        "next_pass_start": array("d"),
+        "next_pass_start_az": array("i"),
+        "next_pass_end": array("d"),
+        "next_pass_end_az": array("i"),
+        "next_pass_max_el": array("i"),
+        "next_event": array("b"),
+        "next_event_mins": array("i"),
+    }
+
+    appends = [column.append for column in columns.values()]
+
+    block: list[str] = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith("Satellite:"):
+            block = [line]
+            continue
+        if not block:
+            continue
+
+        block.append(line)
+        if len(block) < 4:
+            continue
+
+        try:
+            cur_az, cur_el, cur_lat, cur_long, sat_state, tracking = _match(
+                _SATINFO_RE, block[1]
+            ).groups()
+            aos, aos_az, los, los_az, max_el = _match(_PASS_RE, block[2]).groups()
+            event = _match(_EVENT_RE, block[3])
+            row = (
+                block[0][10:],
+                SignalState.from_str(sat_state),
+                tracking == "TRACKING_ACTIVE",
+                int(cur_az),
+                int(cur_el),
+                float(cur_lat),
+                float(cur_long),
+                _parse_timestamp(aos),
+                int(aos_az),
+                _parse_timestamp(los),
+                int(los_az),
+                int(max_el),
+                SignalState.from_str(event.group(1)),
+                _event_mins(event),
+            )
+        except ValueError as ex:
+            logger.debug("Skipping status: %s", ex)
+        else:
+            for append, value in zip(appends, row):
+                append(value)
+        block = []
+
+    return columns
+
+
+@dataclass
+class Telemetry:
+    """Snapshot of the rotator position and tracking state"""
+
+    timestamp: float
+    azimuth: float
+    elevation: float
+    tracking: Optional[TrackingStatus]
+    received: float = field(default_factory=time.monotonic, repr=False)
+
+    def age(self) -> float:
+        """Seconds since this snapshot was taken"""
+        return time.monotonic() - self.received
+
+    def as_dict(self, fields: Optional[list[str]] = None) -> dict[str, Any]:
+        """Plain values only, suitable for sending to another process
+
+        `fields` selects from TELEMETRY_FIELDS, the timestamp is always included.
+        """
+        ret: dict[str, Any] = {"timestamp": self.timestamp}
+        if fields is None or "azimuth" in fields:
+            ret["azimuth"] = self.azimuth
+        if fields is None or "elevation" in fields:
+            ret["elevation"] = self.elevation
+        if fields is None or "tracking" in fields:
+            ret["tracking"] = None if self.tracking is None else self.tracking.as_dict()
+        return ret
+
+
+TELEMETRY_FIELDS = ("timestamp", "azimuth", "elevation", "tracking")
+
+
+class CommandStats:
+    """Latency of one kind of command, over its lifetime and its recent history"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: deque[float] = deque(maxlen=LATENCY_HISTORY)
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, elapsed: float) -> None:
+        """Add the duration of one exchange"""
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self.recent.append(elapsed)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+
+    def histogram(self) -> list[tuple[float, int]]:
+        """Cumulative counts of exchanges up to each of `LATENCY_BUCKETS`, then all"""
+        bounds = LATENCY_BUCKETS + (math.inf,)
+        return list(zip(bounds, itertools.accumulate(self.buckets)))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Plain values only, suitable for sending to another process
+
+        Percentiles are over the last `LATENCY_HISTORY` exchanges, in seconds.
+        """
+        recent = sorted(self.recent)
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": recent[len(recent) // 2] if recent else 0.0,
+            "p99": recent[int(len(recent) * 0.99)] if recent else 0.0,
+            "max": self.max,
+        }
+
+
+class TelemetryPoller:
+    """Samples the rotator position and tracking status in the background
+
+    The latest sample is kept in `snapshot`, so any number of readers can share a constant
+    load on the serial link.
+    """
+
+    def __init__(
+        self,
+        rot: "K3NG",
+        rate_hz: float,
+        tracking: bool = True,
+        on_sample: Optional[Callable[[Telemetry], None]] = None,
+    ) -> None:
+        if rate_hz <= 0:
+            raise ValueError("Polling rate must be positive")
+
+        self.rot = rot
+        self.rate_hz = rate_hz
+        self.tracking = tracking
+        self.on_sample = on_sample
+        self.snapshot: Optional[Telemetry] = None
+
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="k3ng-telemetry", daemon=True
+        )
+
+    def start(self) -> None:
+        """Start polling"""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling and wait for the current sample to finish"""
+        self._stopping.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self) -> None:
+        period = 1 / self.rate_hz
+        next_poll = time.monotonic()
+        while not self._stopping.is_set():
+            try:
+                # pylint: disable-next=protected-access
+                self.snapshot = self.rot._sample_telemetry(self.tracking)
+            except serial.SerialException as ex:
+                logger.warning("Telemetry poll failed: %s", ex)
+                self._reconnect()
+            except (RuntimeError, ValueError) as ex:
+                # ValueError from a garbled reply, which the next poll may well not get
+                logger.warning("Telemetry poll failed: %s", ex)
+            else:
+                if self.on_sample is not None:
+                    try:
+                        self.on_sample(self.snapshot)
+                    except Exception:  # pylint: disable=broad-exception-caught
+                        logger.exception("Telemetry callback failed")
+
+            # Don't try to catch up if a sample overran its slot
+            next_poll = max(next_poll + period, time.monotonic())
+            self._stopping.wait(next_poll - time.monotonic())
+
+    def _reconnect(self) -> None:
+        """Try to get the serial link back, leaving it to the next poll if it fails"""
+        try:
+            self.rot.reconnect()
+        except (RuntimeError, serial.SerialException, OSError) as ex:
+            logger.warning("Reconnect failed: %s", ex)
+
+
+class Subscription:
+    """Delivers polled telemetry samples to a callback at up to `rate_hz`
+
+    Samples are handed over from the poller without blocking it. Delivery happens on the
+    subscription's own thread and only the newest undelivered sample is kept, so a slow
+    consumer misses samples rather than holding anything up. Those, and samples skipped to
+    keep to the rate, are counted in `dropped`.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[dict[str, Any]], Any],
+        rate_hz: float,
+        fields: Optional[list[str]] = None,
+    ) -> None:
+        if rate_hz <= 0:
+            raise ValueError("Subscription rate must be positive")
+        if fields is not None and not set(fields) <= set(TELEMETRY_FIELDS):
+            raise ValueError(f"Fields must be in {TELEMETRY_FIELDS}")
+
+        self.callback = callback
+        self.rate_hz = rate_hz
+        self.fields = None if fields is None else list(fields)
+        self.dropped = 0
+        self.active = True
+
+        self._period = 1 / rate_hz
+        self._next_due = -float("inf")
+        self._pending: Optional[Telemetry] = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="k3ng-subscription", daemon=True
+        )
+        self._thread.start()
+
+    def offer(self, snapshot: Telemetry) -> None:
+        """Queue a sample for delivery, replacing any that hasn't been delivered yet"""
+        # Half a period early is close enough, so jitter in the polling doesn't skip
+        # samples when it runs at (or just above) the subscription's rate
+        if snapshot.received < self._next_due - self._period / 2:
+            with self._lock:
+                self.dropped += 1
+            return
+
+        # Due times step by whole periods to keep to the rate on average, restarting from
+        # this sample if they have fallen behind (the first sample, or after a gap)
+        self._next_due += self._period
+        if self._next_due <= snapshot.received:
+            self._next_due = snapshot.received + self._period
+
+        with self._lock:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = snapshot
+        self._ready.set()
+
+    def cancel(self) -> None:
+        """Stop delivering samples"""
+        self.active = False
+        self._ready.set()
+
+    def _run(self) -> None:
+        while True:
+            self._ready.wait()
+            if not self.active:
+                return
+
+            with self._lock:
+                snapshot = self._pending
+                self._pending = None
+                self._ready.clear()
+
+            if snapshot is None:
+                continue
+
+            try:
+                self.callback(snapshot.as_dict(self.fields))
+            except Exception:  # pylint: disable=broad-exception-caught
+                # The subscriber has most likely gone away (e.g. a closed RPC connection)
+                logger.warning("Subscriber callback failed, cancelling", exc_info=True)
+                self.active = False
+                return
+
+
+#  ╭──────────────────────────────────────────────────────────╮
+#  │              Replies, shared with AsyncK3NG              │
+#  ╰──────────────────────────────────────────────────────────╯
+
+# Largest difference (s) between the host's clock and the controller's that is fine
+CLOCK_TOLERANCE = 10.0
+
+
+def _clock_command(in_time: Optional[str]) -> tuple[str, datetime.datetime]:
+    """The command to set the clock to `in_time` (UTC now if None), and the time it sets"""
+    if in_time is None:
+        # Determine UTC time now
+        current_time = datetime.datetime.now(tz=datetime.timezone.utc)
+        in_time = current_time.strftime("%Y%m%d%H%M%S")
+        logger.debug("Setting to current UTC time: %s", current_time)
+
+    if len(in_time) != 14:
+        raise ValueError("Invalid time length")
+
+    expected = datetime.datetime.strptime(in_time, "%Y%m%d%H%M%S")
+    return "\\O" + in_time, expected.replace(tzinfo=datetime.timezone.utc)
+
+
+def _parse_clock(ret: list[str]) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(ret[0])
+
+
+def _check_clock_set(ret: list[str], expected: datetime.datetime) -> None:
+    ret_time = datetime.datetime.fromisoformat(" ".join(ret[0].split(" ")[3:5]))
+    if abs(ret_time - expected) > datetime.timedelta(seconds=CLOCK_TOLERANCE):
+        raise ValueError("Time did not save!")
+
+
+def _check_clock_drift(ret_time: datetime.datetime) -> None:
+    current_time = datetime.datetime.now(tz=datetime.timezone.utc)
+    if abs(ret_time - current_time) > datetime.timedelta(seconds=CLOCK_TOLERANCE):
+        logger.warning("Time difference greater than 10 seconds!")
+
+
+def _check_loc(loc: str) -> None:
+    if len(loc) != 6:
+        raise ValueError("Invalid location length")
+
+
+def _check_parking(ret: list[str]) -> None:
+    if "Parking" not in ret[0]:
+        raise RuntimeError("Not parking")
+
+
+def _parse_autopark(ret: list[str]) -> int:
+    if "Autopark is off" in ret[0]:
+        return 0
+
+    return int(ret[0].split()[4])
+
+
+def _autopark_command(duration: int) -> str:
+    # 0 disables it, otherwise the duration is in minutes
+    return "\\Y0" if duration == 0 else f"\\Y {duration:04d}"
+
+
+def _check_autopark_set(ret: list[str], duration: int) -> None:
+    expected = "off" if duration == 0 else f"{duration} minute"
+    if expected not in ret[0]:
+        raise RuntimeError(f"Autopark not set ({ret[0]})")
+
+
+def _check_park_set(ret: list[str], axis: str, value: int) -> None:
+    if str(value) not in ret[0]:
+        raise RuntimeError(f"{axis} park not set")
+
+
+def _parse_park_location(ret: list[str]) -> tuple[int, int]:
+    ret_split = ret[0].split(" ")
+    return (int(ret_split[2]), int(ret_split[4]))
+
+
+def _read_tle_file(tle_file: str) -> TLE:
+    """The first element set in a 3LE file"""
+    # Only the first element set is used, so don't read the rest of a large file
+    with open(tle_file, "r", encoding="utf-8") as file:
+        tle_file_data = list(itertools.islice(file, 3))
+
+    return TLE(tle_file_data[0], tle_file_data[1], tle_file_data[2])
+
+
+def _check_tles_cleared(ret: list[str]) -> None:
+    if "Erased the TLE file area" not in ret[0]:
+        raise RuntimeError("Failed to clear TLEs")
+
+
+def _parse_trackable(ret: list[str]) -> list[str]:
+    return [line.replace("\t", "    ") for line in ret]
+
+
+def _parse_tracking_status(ret: list[str]) -> TrackingStatus:
+    if _no_satellite(ret):
+        raise RuntimeError("No satellite selected")
+    return TrackingStatus.from_str(ret)
+
+
+def _check_selected(ret: list[str]) -> None:
+    if "Loading" not in ret[1]:
+        raise RuntimeError("Unable to select satellite")
+
+
+def _check_tracking_set(ret: list[str], enabled: bool) -> None:
+    state = "activated" if enabled else "deactivated"
+    if ret[0] != f"Satellite tracking {state}.":
+        logger.error(ret)
+        raise RuntimeError(f"Tracking not {'enabled' if enabled else 'disabled'}")
+
+
+def _check_pin(pin: int) -> None:
+    if pin < 0 or pin > 5:
+        raise ValueError("Invalid pin number")
+
+
+def _parse_analog(retval: str) -> int:
+    # Return value is 0{pin}XXXX where XXXX=VAL
+    return int(retval[2:])
+
 
 class K3NG:
     """Class for controlling K3NG over serial"""
@@ -196,26 +1058,34 @@ class K3NG:
     # pylint: disable=too-many-public-methods
 
     # TODO: add pass_active check
-    def __init__(self, ser_port: str) -> None:
-        # Ensure we have r/w
-        self.port = Path(ser_port)
-        if not self.port.exists():
-            raise FileNotFoundError(self.port)
-
-        if not os.access(
-            self.port,
-            os.R_OK | os.W_OK,
-            effective_ids=(os.access in os.supports_effective_ids),
-        ):
-            if os.geteuid() != 0:
-                logger.critical(
-                    "Unable to acquire read/write permissions on %s.\n"
-                    + "Please change permissions, or run this script as superuser.",
-                    self.port,
-                )
-                sys.exit(1)
-
-        self.ser = serial.Serial(ser_port, 9600, timeout=1, inter_byte_timeout=0.5)
+    def __init__(self, ser_port: str, timeout: float = RESPONSE_TIMEOUT) -> None:
+        self.port = _check_port(ser_port)
+        self.ser = self._open_port()
+        self._scheduler = CommandScheduler()
+        self._rx = _LineBuffer()
+        self._poller: Optional[TelemetryPoller] = None
+        self._subscriptions: list[Subscription] = []
+        self.max_age = 0.0
+        self.timeout = timeout
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.timeouts = 0
+        self.error_responses = 0
+        self.reconnects = 0
+        self._last_send = 0.0
+        self.command_stats: dict[str, CommandStats] = {}
+        self._stats_lock = threading.Lock()
+        self.motion = MotionModel.load()
+        # Per axis (azimuth, elevation): the last target sent, if still heading there, and
+        # the direction last moved in, -1, 1 or 0 if unknown, for the backlash on reversal
+        self._targets: list[Optional[float]] = [None, None]
+        self._directions = [0, 0]
+        self._prime()
+
+    def _open_port(self) -> serial.Serial:
+        return serial.Serial(str(self.port), 9600, timeout=1, inter_byte_timeout=0.5)
+
+    def _prime(self) -> None:
         self.flush()
 
         # This is just a dummy command to "prime" the connection
@@ -224,77 +1094,244 @@ class K3NG:
         if not ret:
             raise RuntimeError("Unable to communicate with rotator")
 
+    @_exchange(Priority.STOP)
+    def reconnect(self) -> None:
+        """Reopen the serial port, e.g. after the controller was unplugged and plugged in
+
+        Like creating a new `K3NG`, this resets the Arduino.
+        """
+        self.reconnects += 1
+        logger.warning("Reconnecting to %s", self.port)
+        try:
+            self.ser.close()
+        except serial.SerialException as ex:
+            logger.debug("Error closing the old port: %s", ex)
+        self.ser = self._open_port()
+        self._rx.clear()
+        self._prime()
+
+    def close(self) -> None:
+        """Stop any background polling and close the serial port"""
+        self.stop_polling()
+        self.ser.close()
+
     #  ╭──────────────────────────────────────────────────────────╮
     #  │                     General Commands                     │
     #  ╰──────────────────────────────────────────────────────────╯
 
+    def _fill(self) -> int:
+        """Drain everything the serial port has pending into the receive buffer"""
+        pending = self.ser.in_waiting
+        if pending > 0:
+            self._rx.feed(self.ser.read(pending))
+            self.bytes_received += pending
+        return pending
+
+    @_exchange(Priority.COMMAND)
     def read(self) -> list[str]:
         """Read all pending lines"""
-        response = []
-        line = ""
-
-        while self.ser.in_waiting > 0:
+        while self._fill() > 0:
             time.sleep(RECV_DELAY)
-            ch = self.ser.read()
-            ch_decoded = ch.decode("utf-8")
-            if ch_decoded in ("\r", "\n"):
-                response.append(line)
-                line = ""
-            else:
-                line += ch_decoded
 
-        response = list(filter(None, response))
+        response = self._rx.pop_all()
 
         logger.debug("RX: %s", str(response))
         return response
 
-    def write(self, cmd: str) -> None:
-        """Send a command"""
-        logger.debug("TX: %s", cmd)
-        # TODO: does this actually do anything? I think we can just send the cmd
-        for _ in cmd[0]:
-            time.sleep(SEND_DELAY)
-            self.ser.write(cmd.encode())
-        time.sleep(SEND_DELAY)
-        self.ser.write(("\r").encode())
-        time.sleep(0.2)
-        self.ser.readline()
-
-    def query(self, cmd) -> list[str]:
-        """Send a command and get the response"""
-        self.write(cmd)
-        time.sleep(0.2)
-        return self.read()
+    def _wait(
+        self,
+        done: Callable[[deque[str]], bool],
+        timeout: Optional[float] = None,
+        count_timeout: bool = True,
+    ) -> bool:
+        """Receive until `done` is satisfied by the pending lines, or the deadline passes
 
+        Running out of time is counted in `timeouts` unless `count_timeout` is False.
+        """
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while not done(self._rx.lines):
+            if time.monotonic() >= deadline:
+                logger.debug("Timed out waiting for response")
+                if count_timeout:
+                    self.timeouts += 1
+                return False
+            if self._fill() == 0:
+                time.sleep(POLL_INTERVAL)
+        return True
+
+    def _wait_quiet(self, timeout: Optional[float] = None) -> None:
+        """Receive until a reply of unknown length has arrived and the line has gone quiet"""
+        start = time.monotonic()
+        deadline = start + (self.timeout if timeout is None else timeout)
+        last_rx = start
+        while True:
+            now = time.monotonic()
+            if self._fill() > 0:
+                last_rx = now
+            elif self._rx.lines and now - last_rx >= RESPONSE_QUIET:
+                return
+            if now >= deadline:
+                return
+            time.sleep(POLL_INTERVAL)
+
+    def _discard_input(self) -> None:
+        """Drop anything left over from a previous exchange"""
+        self._fill()
+        stale = self._rx.pop_all()
+        if stale:
+            logger.debug("Discarding stale input: %s", str(stale))
+
+    @contextmanager
+    def _timed(self, command: str) -> Iterator[None]:
+        """Record how long the exchange in the context takes under `command`
+
+        RuntimeErrors raised in the context are counted as error responses.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        except RuntimeError:
+            self.error_responses += 1
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            with self._stats_lock:
+                stats = self.command_stats.get(command)
+                if stats is None:
+                    stats = self.command_stats[command] = CommandStats()
+                stats.record(elapsed)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Serial traffic and per-command latency, as plain values"""
+        with self._stats_lock:
+            commands = {
+                cmd: stats.as_dict() for cmd, stats in self.command_stats.items()
+            }
+        return {
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "timeouts": self.timeouts,
+            "error_responses": self.error_responses,
+            "reconnects": self.reconnects,
+            "commands": commands,
+        }
+
+    def latency_histograms(self) -> dict[str, tuple[list[tuple[float, int]], float]]:
+        """Per-command latency histogram and total seconds, see `CommandStats.histogram`"""
+        with self._stats_lock:
+            return {
+                cmd: (stats.histogram(), stats.total)
+                for cmd, stats in self.command_stats.items()
+            }
+
+    def _send(self, data: str) -> None:
+        """Transmit raw data without waiting for anything in return"""
+        logger.debug("TX: %s", repr(data))
+        # Only back to back sends wait; after waiting on a reply the gap has passed already
+        gap = self._last_send + SEND_DELAY - time.monotonic()
+        if gap > 0:
+            time.sleep(gap)
+        self.bytes_sent += self.ser.write(data.encode()) or 0
+        self._last_send = time.monotonic()
+
+    @_exchange(Priority.COMMAND)
+    def write(self, cmd: str) -> None:
+        """Send a command and consume its echo"""
+        self._send(cmd + "\r")
+
+        # The echo comes straight back, so don't wait as long as for a reply. A slow echo
+        # isn't a missing reply, so it isn't counted as a timeout
+        echo = cmd.strip()
+        if echo and self._wait(lambda lines: len(lines) > 0, RESPONSE_QUIET, False):
+            if self._rx.lines[0].strip() == echo:
+                self._rx.lines.popleft()
+
+    @_exchange(Priority.COMMAND)
+    def query(
+        self, cmd, lines: Optional[int] = None, timeout: Optional[float] = None
+    ) -> list[str]:
+        """Send a command and get the response
+
+        If the number of lines in the response is known, this returns as soon as they have
+        arrived. Otherwise it returns once the rotator stops sending.
+        """
+        # Basic commands are a backslash and a letter, the rest are arguments
+        with self._timed(cmd.strip()[0:2]):
+            self._discard_input()
+            self.write(cmd)
+            if lines is None:
+                self._wait_quiet(timeout)
+            else:
+                self._wait(lambda rx: len(rx) >= lines, timeout)
+            return self.read()
+
+    @_exchange(Priority.COMMAND)
+    def _query_tracking(self) -> list[str]:
+        """Get the tracking status reply, without waiting out the timeout when it's short"""
+        with self._timed("\\~"):
+            self._discard_input()
+            self.write("\\~")
+            self._wait(_tracking_reply_done)
+            return self.read()
+
+    @_exchange(Priority.COMMAND)
     def query_extended(self, cmd) -> str:
         """Send an extended command and parse the response"""
-        time.sleep(0.2)
         if len(cmd) < 2 or "\\?" in cmd:
             raise ValueError("Invalid extended command")
 
-        self.write("\\?" + cmd)
+        with self._timed(cmd[0:2]):
+            self._discard_input()
+            self.write("\\?" + cmd)
 
-        time.sleep(0.2)
+            # Extended responses are a single line starting with "\!"
+            self._wait(lambda rx: any(line.startswith("\\!") for line in rx))
+            ret = self.read()
+            if not ret:
+                raise RuntimeError("No response from rotator")
+            resp = next((line for line in ret if line.startswith("\\!")), ret[0])
 
-        try:
-            resp = self.read()[0]
-        except IndexError as ex:
-            raise RuntimeError("No response from rotator") from ex
+            return _check_extended(resp)
+
+    @_exchange(Priority.COMMAND)
+    def query_many(self, cmds: list[str]) -> dict[str, str]:
+        """Send several extended commands back-to-back and parse all the responses
+
+        The responses are matched to their commands by the two letter code they echo, so the
+        result is keyed by that code and each code can only be used once per call.
+        """
+        if any(len(cmd) < 2 or "\\?" in cmd for cmd in cmds):
+            raise ValueError("Invalid extended command")
+
+        codes = [cmd[0:2] for cmd in cmds]
+        if len(set(codes)) != len(codes):
+            raise ValueError("Duplicate extended command")
 
-        status = resp[0:5]
-        if "\\!??" in status:
-            raise RuntimeError(f"Response error: {resp}")
+        with self._timed("+".join(codes)):
+            self._discard_input()
+            self._send("".join(f"\\?{cmd}\r" for cmd in cmds))
 
-        if "OK" not in status:
-            raise RuntimeError(f"Invalid response: {resp}")
+            self._wait(
+                lambda rx: sum(line.startswith("\\!") for line in rx) >= len(cmds)
+            )
+            ret = self.read()
+            responses = {line[4:6]: line for line in ret if line.startswith("\\!")}
 
-        return resp[6:]
+            results = {}
+            for code in codes:
+                if code not in responses:
+                    raise RuntimeError(f"No response from rotator for {code}")
+                results[code] = _check_extended(responses[code])
 
+            return results
+
+    @_exchange(Priority.COMMAND)
     def flush(self) -> None:
         """Flush the input buffer"""
         self.write("\r")
         self.ser.flush()
         self.ser.reset_input_buffer()
+        self._rx.clear()
 
     #  ╭──────────────────────────────────────────────────────────╮
     #  │                       Basic Config                       │
@@ -307,51 +1344,32 @@ class K3NG:
 
     def get_time(self) -> datetime.datetime:
         """Get the stored time on the K3NG"""
-        retval = self.query("\\C")
-        return datetime.datetime.fromisoformat(retval[0])
+        return _parse_clock(self.query("\\C", lines=1))
 
+    @_exchange(Priority.COMMAND)
     def set_time(self, in_time: Optional[str] = None) -> None:
         """Set the time on the K3NG to the current UTC time"""
-        if in_time is None:
-            # Determine UTC time now
-            current_time = datetime.datetime.now(tz=datetime.timezone.utc)
-            in_time = current_time.strftime("%Y%m%d%H%M%S")
-            logger.debug("Setting to current UTC time: %s", current_time)
-
-        if len(in_time) != 14:
-            raise ValueError("Invalid time length")
-
-        ret = self.query("\\O" + in_time)
-        ret_split = " ".join(ret[0].split(" ")[3:5])
-        ret_time = datetime.datetime.fromisoformat(ret_split)
-
-        if abs(ret_time - current_time) > datetime.timedelta(seconds=10):
-            raise ValueError("Time did not save!")
-
+        cmd, expected = _clock_command(in_time)
+        _check_clock_set(self.query(cmd, lines=1), expected)
         self.check_time()
 
     def check_time(self):
         """Verify that the stored time is pretty close to the current time"""
-        current_time = datetime.datetime.now(tz=datetime.timezone.utc)
-        ret_time = self.get_time()
-
-        if abs(ret_time - current_time) > datetime.timedelta(seconds=10):
-            logger.warning("Time difference greater than 10 seconds!")
+        _check_clock_drift(self.get_time())
 
     def get_loc(self) -> str:
         """Get the stored location from the K3NG"""
         # TODO: make this be able to return coords or grid
-        return self.query_extended("RG")[0]
+        return self.query_extended("RG")
 
     def set_loc(self, loc) -> None:
         """Set the location of the K3NG in maidenhead coordinates"""
-        if len(loc) != 6:
-            raise ValueError("Invalid location length")
-
+        _check_loc(loc)
         self.query("\\G" + loc)
 
         # TODO: check retval
 
+    @_exchange(Priority.COMMAND)
     def save_to_eeprom(self) -> None:
         """Store the current configuration to EEPROM"""
         self.write("\\Q")
@@ -366,54 +1384,209 @@ class K3NG:
 
     def get_elevation(self) -> float:
         """Get the current elevation"""
-        ret = self.query_extended("EL")
-        # replace is to accomodate for a quirk in reporting at EL=0
-        return float(ret.replace("0-0.", "00.").strip("0"))
+        snapshot = self._cached_telemetry()
+        if snapshot is not None:
+            return snapshot.elevation
+
+        with self._scheduler.exchange(Priority.TELEMETRY):
+            ret = self.query_extended("EL")
+        return _parse_elevation(ret)
 
     def set_elevation(self, el: float) -> None:
         """Command the rotator to a given elevation"""
         self.query_extended(f"GE{el:05.2f}")
+        self._commanded(1, el)
 
     def get_azimuth(self) -> float:
         """Get the current azimuth"""
-        ret = self.query_extended("AZ")
-        return float(ret.strip("0"))
+        snapshot = self._cached_telemetry()
+        if snapshot is not None:
+            return snapshot.azimuth
+
+        with self._scheduler.exchange(Priority.TELEMETRY):
+            ret = self.query_extended("AZ")
+        return _parse_azimuth(ret)
+
+    def get_position(self) -> tuple[float, float]:
+        """Get the current azimuth and elevation in a single exchange"""
+        snapshot = self._cached_telemetry()
+        if snapshot is not None:
+            return (snapshot.azimuth, snapshot.elevation)
+
+        with self._scheduler.exchange(Priority.TELEMETRY):
+            ret = self.query_many(["AZ", "EL"])
+        return (_parse_azimuth(ret["AZ"]), _parse_elevation(ret["EL"]))
 
     def set_azimuth(self, az: float) -> None:
         """Command the rotator to a given azimuth"""
         self.query_extended(f"GA{az:05.2f}")
+        self._commanded(0, az)
 
     def down(self) -> None:
         """Command the rotator to move down"""
         self.query_extended("RD")
+        self._commanded(1, direction=-1)
 
     def up(self) -> None:
         """Command the rotator to move up"""
         self.query_extended("RU")
+        self._commanded(1, direction=1)
 
     def left(self) -> None:
         """Command the rotator to move left"""
         self.query_extended("RL")
+        self._commanded(0, direction=-1)
 
     ccw = left
 
     def right(self) -> None:
         """Command the rotator to move right"""
         self.query_extended("RR")
+        self._commanded(0, direction=1)
 
     cw = right
 
+    def _commanded(
+        self, axis: int, target: Optional[float] = None, direction: int = 0
+    ) -> None:
+        """Remember which way an axis was sent, from a target or a manual direction"""
+        if target is not None:
+            previous = self._targets[axis]
+            if previous is None:
+                snapshot = self._cached_telemetry()
+                if snapshot is not None:
+                    previous = (snapshot.azimuth, snapshot.elevation)[axis]
+            if previous is not None and target != previous:
+                direction = 1 if target > previous else -1
+        if direction:
+            self._directions[axis] = direction
+        self._targets[axis] = target
+
+    @_exchange(Priority.STOP)
     def stop_azimuth(self) -> None:
         """Command the rotator to stop moving the azimuth axis"""
         self.query_extended("SA")
+        self._targets[0] = None
 
+    @_exchange(Priority.STOP)
     def stop_elevation(self) -> None:
         """Command the rotator to stop moving the elevation axis"""
         self.query_extended("SE")
+        self._targets[1] = None
 
+    @_exchange(Priority.STOP)
     def stop(self) -> None:
         """Command the rotator to stop moving all axes"""
         self.query_extended("SS")
+        self._targets = [None, None]
+
+    #  ╭──────────────────────────────────────────────────────────╮
+    #  │                        Telemetry                         │
+    #  ╰──────────────────────────────────────────────────────────╯
+
+    def start_polling(
+        self,
+        rate_hz: float = 1.0,
+        max_age: Optional[float] = None,
+        tracking: bool = True,
+    ) -> None:
+        """Poll the position (and tracking status) in the background
+
+        While polling, position and tracking status reads return the latest sample instead of
+        querying the rotator, provided it is no older than `max_age` seconds (two polling
+        periods by default).
+        """
+        self.stop_polling()
+        self.max_age = 2 / rate_hz if max_age is None else max_age
+        self._poller = TelemetryPoller(self, rate_hz, tracking, self._publish)
+        self._poller.start()
+
+    def stop_polling(self) -> None:
+        """Stop background polling, all reads go to the rotator again"""
+        if self._poller is not None:
+            self._poller.stop()
+            self._poller = None
+
+    def subscribe(
+        self,
+        callback: Callable[[dict[str, Any]], Any],
+        rate_hz: float = 1.0,
+        fields: Optional[list[str]] = None,
+    ) -> Subscription:
+        """Call `callback` with each polled sample (see `Telemetry.as_dict`), up to `rate_hz`
+
+        Starts polling if needed, and speeds it up if it is slower than the requested rate.
+        """
+        subscription = Subscription(callback, rate_hz, fields)
+        if self._poller is None or self._poller.rate_hz < rate_hz:
+            tracking = True if self._poller is None else self._poller.tracking
+            self.start_polling(rate_hz, tracking=tracking)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def _publish(self, snapshot: Telemetry) -> None:
+        """Fan a polled sample out to all subscribers"""
+        for subscription in list(self._subscriptions):
+            if subscription.active:
+                subscription.offer(snapshot)
+            else:
+                self._subscriptions.remove(subscription)
+
+    def stream_position(self, rate_hz: float = 1.0) -> Iterator[tuple[float, float]]:
+        """Yield the current azimuth and elevation at `rate_hz`"""
+        period = 1 / rate_hz
+        next_sample = time.monotonic()
+        while True:
+            yield self.get_position()
+            next_sample = max(next_sample + period, time.monotonic())
+            time.sleep(max(0.0, next_sample - time.monotonic()))
+
+    def get_telemetry(self) -> Telemetry:
+        """Get the latest position and tracking status, sampling it now if not fresh"""
+        snapshot = self._cached_telemetry()
+        if snapshot is not None:
+            return snapshot
+
+        return self._sample_telemetry(tracking=True)
+
+    def latest_telemetry(self) -> Optional[Telemetry]:
+        """Latest polled sample however old, or None if not polling, without any I/O"""
+        poller = self._poller
+        return poller.snapshot if poller is not None else None
+
+    def _cached_telemetry(self) -> Optional[Telemetry]:
+        """Latest polled sample, if polling and it is fresh enough"""
+        poller = self._poller
+        if poller is None:
+            return None
+
+        snapshot = poller.snapshot
+        if snapshot is None or snapshot.age() > self.max_age:
+            return None
+
+        return snapshot
+
+    @_exchange(Priority.TELEMETRY)
+    def _sample_telemetry(self, tracking: bool) -> Telemetry:
+        timestamp = time.time()
+        ret = self.query_many(["AZ", "EL"])
+
+        status = None
+        if tracking:
+            ret_status = self._query_tracking()
+            # Without a satellite selected there is no status to parse
+            if not _no_satellite(ret_status):
+                try:
+                    status = TrackingStatus.from_str(ret_status)
+                except (IndexError, ValueError) as ex:
+                    logger.debug("No tracking status: %s", ex)
+
+        return Telemetry(
+            timestamp=timestamp,
+            azimuth=_parse_azimuth(ret["AZ"]),
+            elevation=_parse_elevation(ret["EL"]),
+            tracking=status,
+        )
 
     #  ╭──────────────────────────────────────────────────────────╮
     #  │                       Calibration                        │
@@ -439,23 +1612,122 @@ class K3NG:
         ret = self.query_extended("AO")
         return int(ret)
 
+    def _read_axis(self, code: str) -> float:
+        """Read one axis straight from the rotator, bypassing any polled telemetry"""
+        with self._scheduler.exchange(Priority.TELEMETRY):
+            ret = self.query_extended(code)
+        return _parse_azimuth(ret) if code == "AZ" else _parse_elevation(ret)
+
+    def _sample_axis(self, code: str, duration: float) -> list[tuple[float, float]]:
+        """Read an axis as fast as the link allows for `duration` seconds"""
+        samples = []
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            samples.append((time.monotonic(), self._read_axis(code)))
+        return samples
+
+    def _settle_axis(self, code: str, timeout: float) -> float:
+        """Wait for an axis to stop moving, returning where it stopped"""
+        end = time.monotonic() + timeout
+        last = self._read_axis(code)
+        while time.monotonic() < end:
+            time.sleep(0.5)
+            position = self._read_axis(code)
+            if abs(position - last) < 0.1:
+                return position
+            last = position
+        return last
+
+    def _characterize_axis(
+        self, code: str, forward: bool, duration: float
+    ) -> AxisModel:
+        go_to: Callable[[float], None]
+        if code == "AZ":
+            ahead, back = (
+                (self.right, self.left) if forward else (self.left, self.right)
+            )
+            stop, go_to = self.stop_azimuth, self.set_azimuth
+        else:
+            ahead, back = (self.up, self.down) if forward else (self.down, self.up)
+            stop, go_to = self.stop_elevation, self.set_elevation
+
+        # Twice one way, so the second run starts with the play taken up, then back
+        fits = []
+        for move in (ahead, ahead, back):
+            start = (time.monotonic(), self._read_axis(code))
+            move()
+            samples = [start] + self._sample_axis(code, duration)
+            stop()
+            fits.append(fit_run(samples))
+            self._settle_axis(code, timeout=10.0)
+
+        rate = sum(fit[0] for fit in fits) / len(fits)
+        latency = fits[1][1]
+        backlash = max(0.0, fits[2][1] - latency) * rate
+        accels = [fit[2] for fit in fits if math.isfinite(fit[2])]
+        accel = sum(accels) / len(accels) if accels else math.inf
+
+        # How close to a target the controller considers good enough
+        position = self._read_axis(code)
+        middle = 180.0 if code == "AZ" else 45.0
+        target = position + (5.0 if position < middle else -5.0)
+        go_to(target)
+        deadband = abs(self._settle_axis(code, timeout=10.0 + 10.0 / rate) - target)
+
+        return AxisModel(rate, accel, latency, backlash, deadband)
+
+    def characterize_motion(
+        self, duration: float = 5.0, path: Optional[str] = None
+    ) -> MotionModel:
+        """Measure how fast the rotator moves, and save the model for this host
+
+        Each axis is driven for `duration` seconds twice one way and once back, starting
+        towards the side with more room, while its position is sampled as fast as the link
+        allows. The rotator is left stopped a few degrees from where it ends up. The model is
+        saved to `path` (`~/.config/k3ng/motion.json` by default) and loaded whenever a
+        `K3NG` is created.
+        """
+        azimuth, elevation = self.get_position()
+        self.motion = MotionModel(
+            self._characterize_axis("AZ", azimuth < 180.0, duration),
+            self._characterize_axis("EL", elevation < 45.0, duration),
+        )
+        self.motion.save(path)
+        logger.info("Measured rotator motion: %s", self.motion)
+        return self.motion
+
+    def estimate_move_time(self, az: float, el: float) -> float:
+        """Seconds the rotator will take to get from where it is to `az`/`el`
+
+        An axis heading back the way it was last sent takes up its backlash on the way.
+        """
+        if self.motion is None:
+            raise RuntimeError("No motion model, run characterize_motion first")
+        azimuth, elevation = self.get_position()
+        az_distance, el_distance = az - azimuth, el - elevation
+        return self.motion.move_time(
+            az_distance,
+            el_distance,
+            self._reversing(0, az_distance),
+            self._reversing(1, el_distance),
+        )
+
+    def _reversing(self, axis: int, distance: float) -> bool:
+        """Whether moving `distance` goes against the direction the axis last moved"""
+        return distance * self._directions[axis] < 0
+
     #  ╭──────────────────────────────────────────────────────────╮
     #  │                         Features                         │
     #  ╰──────────────────────────────────────────────────────────╯
 
     def park(self) -> None:
         """Command the rotator to the parked location"""
-        ret = self.query("\\P")
-        if "Parking" not in ret[0]:
-            raise RuntimeError("Not parking")
+        _check_parking(self.query("\\P", lines=1))
+        self._targets = [None, None]
 
     def get_autopark(self) -> int:
         """Determine if the rotator is in autopark or not"""
-        ret = self.query("\\Y")
-        if "Autopark is off" in ret[0]:
-            return 0
-
-        return int(ret[0].split()[4])
+        return _parse_autopark(self.query("\\Y", lines=1))
 
     # WARNING: autopark updates itself every few seconds.
     # ADC drift may cause the rotator to slightly adjust itself between updates,
@@ -464,102 +1736,106 @@ class K3NG:
         """Set the state of the autopark"""
         # set to 0 for disable
         # duration in mins
-        if duration == 0:
-            ret = self.query("\\Y0")
-            if "off" not in ret[0]:
-                raise RuntimeError(f"Autopark not set ({ret[0]})")
-        else:
-            ret = self.query(f"\\Y {duration:04d}")
-            if f"{duration} minute" not in ret[0]:
-                raise RuntimeError(f"Autopark not set ({ret[0]})")
+        ret = self.query(_autopark_command(duration), lines=1)
+        _check_autopark_set(ret, duration)
 
+    @_exchange(Priority.COMMAND)
     def set_park_location(self, az: int, el: int) -> None:
         """Set the park location to the current location"""
-        ret = self.query(f"\\PA{az:03}")
-        if str(az) not in ret[0]:
-            raise RuntimeError("Azimuth park not set")
-
-        ret = self.query(f"\\PE{el:03}")
-        if str(el) not in ret[0]:
-            raise RuntimeError("Elevation park not set")
+        _check_park_set(self.query(f"\\PA{az:03}", lines=1), "Azimuth", az)
+        _check_park_set(self.query(f"\\PE{el:03}", lines=1), "Elevation", el)
 
     def get_park_location(self) -> tuple[int, int]:
         """Set the park location to the current location"""
-        ret = self.query("\\PA")
-        ret_split = ret[0].split(" ")
-        return (int(ret_split[2]), int(ret_split[4]))
+        return _parse_park_location(self.query("\\PA", lines=1))
 
     def load_tle(self, sat: Satellite) -> None:
         """Load a TLE into the K3NG rotator controller"""
+        self.load_tles([sat.tle])
+
+    @_exchange(Priority.BULK)
+    def load_tles(self, tles: list[TLE]) -> None:
+        """Load several TLEs into the K3NG rotator controller in one upload"""
+        if not tles:
+            return
+
+        self._discard_input()
         self.write("\\#")
         time.sleep(0.5)
-        self.write(sat.tle.title)
-        self.write(sat.tle.line_one)
-        self.write(sat.tle.line_two)
+        for tle in tles:
+            self.write(tle.title)
+            self.write(tle.line_one)
+            self.write(tle.line_two)
         self.write("\r")
-        time.sleep(0.5)
+        self._wait(
+            lambda rx: len(rx) >= 1 + len(tles), timeout=5 * self.timeout * len(tles)
+        )
         ret = self.read()
 
-        if "corrupt" in ret[0]:
-            logger.critical("TLE corrupted on write")
-            logger.info(ret)
-            raise RuntimeError("TLE corrupted")
-        if "truncated" in ret[0]:
-            logger.critical("File was truncated due to lack of EEPROM storage.")
-            logger.info(ret)
-            raise RuntimeError("TLE truncated")
-        if sat.tle.title not in ret[1]:
-            logger.critical("TLE not loaded")
-            logger.info(ret)
-            raise RuntimeError("TLE not loaded")
+        _check_tles_loaded(ret, tles)
 
     def load_tle_from_file(self, tle_file: str) -> Satellite:
-        with open(tle_file, "r") as file:
-            tle_file_data = file.readlines()
-
-        sat_tle = TLE(tle_file_data[0], tle_file_data[1], tle_file_data[2])
-        sat = Satellite(0, sat_tle)
+        sat = Satellite(0, _read_tle_file(tle_file))
         self.load_tle(sat)
 
         return sat
 
+    @_exchange(Priority.BULK)
     def read_tles(self) -> list[TLE]:
         """Read the stored TLEs in the K3NG"""
-        ret = self.query("\\@")
+        # The TLE file takes a while to print at 9600 baud
+        return _parse_tles(self.query("\\@", timeout=10 * self.timeout))
 
-        tles = []
+    @_exchange(Priority.BULK)
+    def sync_tles(self, satellites: Iterable[Satellite]) -> TLESyncResult:
+        """Make sure the K3NG stores the TLEs of `satellites`, uploading only what changed
 
-        i = 1
-        while ret[i] != "":
-            tles.append(TLE(ret[i], ret[i + 1], ret[i + 2]))
-            i = i + 3
+        The stored TLEs are read once and compared by title and content. New TLEs are
+        appended in a single upload; if a stored TLE changed, the TLEs are cleared and
+        rewritten, since the firmware can't replace one in place.
+        """
+        start = time.monotonic()
+        sent = self.bytes_sent
 
-        return tles
+        upload, unchanged, clear = _plan_tle_sync(
+            self.read_tles(), [sat.tle for sat in satellites]
+        )
+        if clear:
+            self.clear_tles()
+        self.load_tles(upload)
+
+        result = TLESyncResult(
+            uploaded=[tle.title for tle in upload],
+            unchanged=[tle.title for tle in unchanged],
+            cleared=clear,
+            bytes_written=self.bytes_sent - sent,
+            elapsed=time.monotonic() - start,
+        )
+        logger.info("Synced TLEs: %s", result)
+        return result
 
     def clear_tles(self) -> None:
         """Clear the TLEs stored to the K3NG"""
-        ret = self.query("\\!")
-        if "Erased the TLE file area" not in ret[0]:
-            raise RuntimeError("Failed to clear TLEs")
+        _check_tles_cleared(self.query("\\!", lines=1))
 
+    @_exchange(Priority.BULK)
     def get_trackable(self) -> list[str]:
         """Get a list of trackable satellites"""
-        ret = self.query("\\|")
-        for i, _ in enumerate(ret):
-            ret[i] = ret[i].replace("\t", "    ")
-        return ret
+        return _parse_trackable(self.query("\\|"))
 
     def get_tracking_status(self) -> TrackingStatus:
         """Get the state of the K3NG tracking"""
-        ret = self.query("\\~")
-        return TrackingStatus.from_str(ret)
+        snapshot = self._cached_telemetry()
+        if snapshot is not None and snapshot.tracking is not None:
+            return snapshot.tracking
+
+        with self._scheduler.exchange(Priority.TELEMETRY):
+            ret = self._query_tracking()
+        return _parse_tracking_status(ret)
 
     def select_satellite(self, sat: Satellite) -> None:
         """Select a satellite to track"""
-        ret = self.query("\\$" + sat.tle.title[0:5])
-
-        if "Loading" not in ret[1]:
-            raise RuntimeError("Unable to select satellite")
+        _check_selected(self.query("\\$" + sat.tle.title[0:5], lines=2))
 
     def get_next_pass(self, sat: Satellite) -> list[str]:
         """Get the next calculated pass"""
@@ -567,17 +1843,11 @@ class K3NG:
 
     def enable_tracking(self) -> None:
         """Enable tracking of the seelected satellite"""
-        ret = self.query("\\^1")
-        if ret[0] != "Satellite tracking activated.":
-            logger.error(ret)
-            raise RuntimeError("Tracking not enabled")
+        _check_tracking_set(self.query("\\^1", lines=1), True)
 
     def disable_tracking(self) -> None:
         """Disable tracking of the seelected satellite"""
-        ret = self.query("\\^0")
-        if ret[0] != "Satellite tracking deactivated.":
-            logger.error(ret)
-            raise RuntimeError("Tracking not disabled")
+        _check_tracking_set(self.query("\\^0", lines=1), False)
 
     def load_and_track(self, sat_id: int) -> None:
         """Helper to load and begin tracking a satellite"""
@@ -591,29 +1861,9 @@ class K3NG:
 
     def get_raw_analog(self, pin: int) -> int:
         """Returns the raw ADC reading of a valid analog pin"""
-        if pin < 0 or pin > 5:
-            raise ValueError("Invalid pin number")
-
-        retval = self.query_extended(f"AR{pin:02}")
-
-        # Return value is 0{pin}XXXX where XXXX=VAL
-        return int(retval[2:])
+        _check_pin(pin)
+        return _parse_analog(self.query_extended(f"AR{pin:02}"))
 
     def get_raw_voltage(self, pin: int, vref: float = 5.0, numbits: int = 10) -> float:
         """Returns the raw voltage of a valid analog pin"""
         return self.get_raw_analog(pin) * vref / (2**numbits)
-
-
-@exposify
-class ExposedK3NG(K3NG):
-    """Exposed K3NG class for RPC"""
-
-
-class K3NGService(rpyc.Service):
-    """K3NG wrapper for a Linux service"""
-
-    DEFAULT_PORT = 18866
-
-    def __init__(self, ser_port: str) -> None:
-        self.exposed_k3ng = ExposedK3NG(ser_port)
-        self.exposed_k3ng.set_time()
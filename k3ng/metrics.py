@@ -0,0 +1,184 @@
+"""Prometheus/OpenMetrics endpoint for a K3NG, served without touching the serial port
+
+Position and tracking state come from the latest polled sample (see `K3NG.start_polling`),
+and everything else from counters the K3NG keeps anyway, so scrapes add no load on the
+rotator link however often they come.
+"""
+
+import logging
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from .k3ng import K3NG
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 9877
+
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Exposition:
+    """Collects metric families, formatting them as Prometheus text or OpenMetrics"""
+
+    def __init__(self, openmetrics: bool) -> None:
+        self.openmetrics = openmetrics
+        self.lines: list[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        """Start a metric family, with its HELP and TYPE lines"""
+        # OpenMetrics names counter families without the _total their samples have
+        if self.openmetrics and kind == "counter":
+            name = name.removesuffix("_total")
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, **labels: str) -> None:
+        """Add a sample to the current family, labels escaped as both formats require"""
+        if labels:
+            pairs = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            name = f"{name}{{{pairs}}}"
+        self.lines.append(f"{name} {_number(value)}")
+
+    def render(self) -> str:
+        """The exposition text, ended with `# EOF` for OpenMetrics"""
+        if self.openmetrics:
+            self.lines.append("# EOF")
+        return "\n".join(self.lines) + "\n"
+
+
+def render(rot: K3NG, openmetrics: bool = False) -> str:
+    """The rotator's metrics in the Prometheus text format, or OpenMetrics"""
+    out = _Exposition(openmetrics)
+
+    snapshot = rot.latest_telemetry()
+    if snapshot is not None:
+        out.family("k3ng_azimuth_degrees", "gauge", "Azimuth of the latest sample")
+        out.sample("k3ng_azimuth_degrees", snapshot.azimuth)
+        out.family("k3ng_elevation_degrees", "gauge", "Elevation of the latest sample")
+        out.sample("k3ng_elevation_degrees", snapshot.elevation)
+        out.family(
+            "k3ng_sample_age_seconds", "gauge", "Time since the latest sample was taken"
+        )
+        out.sample("k3ng_sample_age_seconds", snapshot.age())
+
+        status = snapshot.tracking
+        if status is not None:
+            out.family(
+                "k3ng_tracking_active", "gauge", "Whether the controller is tracking"
+            )
+            out.sample("k3ng_tracking_active", int(status.is_tracking))
+            out.family(
+                "k3ng_satellite_selected",
+                "gauge",
+                "Selected satellite and its signal state",
+            )
+            out.sample(
+                "k3ng_satellite_selected",
+                1,
+                satname=status.satname,
+                sat_state=status.sat_state.name,
+                next_event=status.next_event.name,
+            )
+            out.family(
+                "k3ng_next_event_minutes", "gauge", "Minutes until the next AOS or LOS"
+            )
+            out.sample("k3ng_next_event_minutes", status.next_event_mins)
+
+    counters = (
+        (
+            "k3ng_serial_sent_bytes_total",
+            rot.bytes_sent,
+            "Bytes written to the rotator",
+        ),
+        (
+            "k3ng_serial_received_bytes_total",
+            rot.bytes_received,
+            "Bytes read from the rotator",
+        ),
+        ("k3ng_timeouts_total", rot.timeouts, "Replies not received in time"),
+        (
+            "k3ng_error_responses_total",
+            rot.error_responses,
+            "Commands that failed with an error or invalid response",
+        ),
+        ("k3ng_reconnects_total", rot.reconnects, "Times the serial port was reopened"),
+    )
+    for name, value, help_text in counters:
+        out.family(name, "counter", help_text)
+        out.sample(name, value)
+
+    name = "k3ng_command_duration_seconds"
+    out.family(name, "histogram", "Time for a command's exchange with the rotator")
+    for command, (buckets, total) in sorted(rot.latency_histograms().items()):
+        for bound, count in buckets:
+            out.sample(f"{name}_bucket", count, command=command, le=_number(bound))
+        out.sample(f"{name}_sum", total, command=command)
+        out.sample(f"{name}_count", buckets[-1][1], command=command)
+
+    return out.render()
+
+
+class MetricsServer:
+    """Serves `render` over HTTP from a background thread
+
+    Binds to localhost by default; any path returns the metrics.
+    """
+
+    def __init__(self, rot: K3NG, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        self.rot = rot
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    def _handler(self) -> type:
+        rot = self.rot
+
+        class Handler(BaseHTTPRequestHandler):
+            """Answers every GET with the metrics"""
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                """Render the metrics in the format the scraper prefers"""
+                openmetrics = "application/openmetrics-text" in self.headers.get(
+                    "Accept", ""
+                )
+                body = render(rot, openmetrics).encode()
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type", OPENMETRICS_TYPE if openmetrics else PROMETHEUS_TYPE
+                )
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) -> None:  # pylint: disable=W0622
+                logger.debug(format, *args)
+
+        return Handler
+
+    def start(self) -> "MetricsServer":
+        """Start serving"""
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, name="k3ng-metrics", daemon=True
+        )
+        self._thread.start()
+        logger.info("Serving metrics on %s", self.httpd.server_address)
+        return self
+
+    def close(self) -> None:
+        """Stop serving and release the port"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,131 @@
+"""Model of how fast the rotator moves, measured by driving it around"""
+
+import itertools
+import json
+import logging
+import math
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MOTION_PATH = (
+    Path(os.environ.get("XDG_CONFIG_HOME", Path.home() / ".config"))
+    / "k3ng"
+    / "motion.json"
+)
+
+
+@dataclass
+class AxisModel:
+    """Motion of a single axis
+
+    `rate` is the top speed (deg/s) and `accel` how quickly it is reached (deg/s^2).
+    `latency` is the time from sending a command to the axis starting to move, and
+    `backlash` the extra play (deg) taken up when it reverses. Targets closer than
+    `deadband` (deg) aren't moved to at all.
+    """
+
+    rate: float
+    accel: float = math.inf
+    latency: float = 0.0
+    backlash: float = 0.0
+    deadband: float = 0.0
+
+    def move_time(self, distance: float, reversing: bool = False) -> float:
+        """Seconds to move `distance` degrees, with a trapezoidal speed profile"""
+        distance = abs(distance)
+        if distance <= self.deadband:
+            return 0.0
+        if reversing:
+            distance += self.backlash
+
+        # Too short to reach top speed: accelerate for half, then decelerate
+        if self.rate**2 / self.accel >= distance:
+            return self.latency + 2 * math.sqrt(distance / self.accel)
+        return self.latency + distance / self.rate + self.rate / self.accel
+
+
+@dataclass
+class MotionModel:
+    """Measured motion of both axes, see `K3NG.characterize_motion`"""
+
+    azimuth: AxisModel
+    elevation: AxisModel
+
+    def move_time(
+        self,
+        az_distance: float,
+        el_distance: float,
+        az_reversing: bool = False,
+        el_reversing: bool = False,
+    ) -> float:
+        """Seconds to move both axes, which move at the same time
+
+        An axis reversing the way it last moved has its backlash to take up as well.
+        """
+        return max(
+            self.azimuth.move_time(az_distance, az_reversing),
+            self.elevation.move_time(el_distance, el_reversing),
+        )
+
+    def save(self, path: Union[str, Path, None] = None) -> None:
+        """Write the model as JSON"""
+        path = Path(path) if path is not None else DEFAULT_MOTION_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(asdict(self), file, indent=2)
+
+    @classmethod
+    def load(cls, path: Union[str, Path, None] = None) -> Optional["MotionModel"]:
+        """Read a saved model, or None if there isn't one"""
+        path = Path(path) if path is not None else DEFAULT_MOTION_PATH
+        try:
+            with open(path, "r") as file:
+                data = json.load(file)
+            return cls(AxisModel(**data["azimuth"]), AxisModel(**data["elevation"]))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError, KeyError) as ex:
+            logger.warning("Ignoring unreadable motion model %s: %s", path, ex)
+            return None
+
+
+def fit_run(
+    samples: list[tuple[float, float]], resolution: float = 0.1
+) -> tuple[float, float, float]:
+    """Fit a run of (time, position) samples taken from the moment a move was commanded
+
+    Returns the top speed (deg/s, least squares over the second half of the run), the time
+    until the axis started moving and the acceleration. The acceleration comes from how far
+    the steady motion lags the start of movement: with constant acceleration `a` up to speed
+    `v`, the straight line through the steady part crosses the starting position `v / 2a`
+    after movement began.
+    """
+    if len(samples) < 6:
+        raise ValueError("Not enough samples to fit")
+
+    start_time, start_pos = samples[0]
+    moved = next(
+        (t for t, pos in samples if abs(pos - start_pos) > resolution), samples[-1][0]
+    )
+    latency = moved - start_time
+
+    steady = list(itertools.islice(samples, len(samples) // 2, None))
+    mean_t = sum(t for t, _ in steady) / len(steady)
+    mean_p = sum(pos for _, pos in steady) / len(steady)
+    var_t = sum((t - mean_t) ** 2 for t, _ in steady)
+    if var_t == 0:
+        raise ValueError("Samples must span some time")
+    slope = sum((t - mean_t) * (pos - mean_p) for t, pos in steady) / var_t
+    rate = abs(slope)
+    if rate == 0:
+        raise ValueError("The axis didn't move")
+
+    # Where the steady line crosses the start position
+    crossing = mean_t - (mean_p - start_pos) / slope
+    lag = crossing - moved
+    accel = rate / (2 * lag) if lag > 0 else math.inf
+    return rate, latency, accel
@@ -0,0 +1,425 @@
+"""Host-side pass prediction, so passes can be planned without asking the rotator
+
+Needs the `predict` extra (numpy and sgp4): `pip install k3ng[predict]`.
+"""
+
+import datetime
+import functools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+
+import numpy as np
+from sgp4.api import Satrec, SatrecArray  # type: ignore
+
+from .k3ng import TLE, PassInfo
+
+# WGS84
+EARTH_RADIUS = 6378.137
+EARTH_FLATTENING = 1 / 298.257223563
+EARTH_MU = 398600.4418
+EARTH_ROTATION = 360.0 / 86164.0905
+
+# Satellites x time steps propagated at once, bounds memory on large catalogs
+BATCH_SIZE = 1_000_000
+# Bisection steps when refining AOS/LOS, each halves the error
+REFINE_STEPS = 12
+# Below this many candidates a visibility search isn't worth starting processes for
+POOL_THRESHOLD = 2000
+# Degrees of slack on the visibility prefilters, for the simplifications they make
+PREFILTER_MARGIN = 2.0
+
+
+def grid_to_latlon(grid: str) -> tuple[float, float]:
+    """Latitude and longitude (degrees) of the centre of a Maidenhead grid square"""
+    grid = grid.strip()
+    if len(grid) < 2 or len(grid) % 2 != 0 or len(grid) > 8:
+        raise ValueError(f"Invalid grid square: {grid}")
+
+    # Field (A-R), square (0-9), subsquare (a-x), extended square (0-9)
+    lon, lat = -180.0, -90.0
+    lon_size, lat_size = 360.0, 180.0
+    for pair, divisions in enumerate((18, 10, 24, 10)[: len(grid) // 2]):
+        base = "0" if pair % 2 else "A"
+        lon_step = ord(grid[2 * pair].upper()) - ord(base)
+        lat_step = ord(grid[2 * pair + 1].upper()) - ord(base)
+        if not (0 <= lon_step < divisions and 0 <= lat_step < divisions):
+            raise ValueError(f"Invalid grid square: {grid}")
+
+        lon_size /= divisions
+        lat_size /= divisions
+        lon += lon_step * lon_size
+        lat += lat_step * lat_size
+
+    return lat + lat_size / 2, lon + lon_size / 2
+
+
+@dataclass
+class Station:
+    """Ground station location, latitude and longitude in degrees and altitude in km"""
+
+    lat: float
+    lon: float
+    alt: float = 0.0
+
+    @classmethod
+    def from_grid(cls, grid: str, alt: float = 0.0) -> "Station":
+        """Station at the centre of a Maidenhead grid square (e.g. from `K3NG.get_loc`)"""
+        return cls(*grid_to_latlon(grid), alt)
+
+    def ecef(self) -> np.ndarray:
+        """Earth-fixed position (km)"""
+        lat, lon = math.radians(self.lat), math.radians(self.lon)
+        e2 = EARTH_FLATTENING * (2 - EARTH_FLATTENING)
+        normal = EARTH_RADIUS / math.sqrt(1 - e2 * math.sin(lat) ** 2)
+        return np.array(
+            [
+                (normal + self.alt) * math.cos(lat) * math.cos(lon),
+                (normal + self.alt) * math.cos(lat) * math.sin(lon),
+                (normal * (1 - e2) + self.alt) * math.sin(lat),
+            ]
+        )
+
+    def enu(self) -> np.ndarray:
+        """Rotation from Earth-fixed offsets to local east, north, up"""
+        lat, lon = math.radians(self.lat), math.radians(self.lon)
+        return np.array(
+            [
+                [-math.sin(lon), math.cos(lon), 0.0],
+                [
+                    -math.sin(lat) * math.cos(lon),
+                    -math.sin(lat) * math.sin(lon),
+                    math.cos(lat),
+                ],
+                [
+                    math.cos(lat) * math.cos(lon),
+                    math.cos(lat) * math.sin(lon),
+                    math.sin(lat),
+                ],
+            ]
+        )
+
+
+@functools.lru_cache(maxsize=65536)
+def _satrec(line_one: str, line_two: str) -> Satrec:
+    """Parsed TLE, cached since parsing costs as much as propagating a few dozen times"""
+    return Satrec.twoline2rv(line_one, line_two)
+
+
+def _station(station: Union[Station, str]) -> Station:
+    return Station.from_grid(station) if isinstance(station, str) else station
+
+
+def _julian(times: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Julian date of unix times, split into whole and fractional days for sgp4"""
+    days = np.floor(times / 86400.0)
+    return days + 2440587.5, times / 86400.0 - days
+
+
+def _gmst(jd: np.ndarray, fr: np.ndarray) -> np.ndarray:
+    """Greenwich mean sidereal time (radians), IAU 1982, taking UT1 as UTC"""
+    t = (jd - 2451545.0 + fr) / 36525.0
+    seconds = (
+        67310.54841
+        + (876600.0 * 3600.0 + 8640184.812866) * t
+        + 0.093104 * t**2
+        - 6.2e-6 * t**3
+    )
+    return np.radians((seconds % 86400.0) / 240.0)
+
+
+def _ecef(teme: np.ndarray, jd: np.ndarray, fr: np.ndarray) -> np.ndarray:
+    """Earth-fixed positions from TEME ones with time along axis -2, ignoring polar motion"""
+    gmst = _gmst(jd, fr)
+    cos_g, sin_g = np.cos(gmst)[:, None], np.sin(gmst)[:, None]
+    x, y, z = teme[..., 0:1], teme[..., 1:2], teme[..., 2:3]
+    return np.concatenate((cos_g * x + sin_g * y, cos_g * y - sin_g * x, z), axis=-1)
+
+
+def _look(
+    teme: np.ndarray, jd: np.ndarray, fr: np.ndarray, station: Station
+) -> tuple[np.ndarray, np.ndarray]:
+    """Azimuth and elevation (degrees) of TEME positions with time along axis -2"""
+    offset = _ecef(teme, jd, fr) - station.ecef()
+
+    east, north, up = np.moveaxis(offset @ station.enu().T, -1, 0)
+    azimuth = np.degrees(np.arctan2(east, north)) % 360.0
+    elevation = np.degrees(np.arctan2(up, np.hypot(east, north)))
+    return azimuth, elevation
+
+
+def look_angles(
+    satrec: Satrec, times: np.ndarray, station: Station
+) -> tuple[np.ndarray, np.ndarray]:
+    """Azimuth and elevation (degrees) of one satellite at an array of unix times"""
+    jd, fr = _julian(np.asarray(times, dtype=float))
+    err, teme, _ = satrec.sgp4_array(jd, fr)
+    azimuth, elevation = _look(teme, jd, fr, station)
+    elevation[err != 0] = np.nan
+    return azimuth, elevation
+
+
+def elevation_grid(
+    satrecs: Sequence[Satrec], times: np.ndarray, station: Station
+) -> np.ndarray:
+    """Elevation (degrees) of every satellite at every time, NaN where sgp4 fails
+
+    Satellites are propagated together in batches of about `BATCH_SIZE` samples.
+    """
+    jd, fr = _julian(np.asarray(times, dtype=float))
+    elevations = np.empty((len(satrecs), len(times)), dtype=np.float32)
+    batch = max(1, BATCH_SIZE // max(1, len(times)))
+    for first in range(0, len(satrecs), batch):
+        last = first + batch
+        err, teme, _ = SatrecArray(list(satrecs[first:last])).sgp4(jd, fr)
+        _, elevation = _look(teme, jd, fr, station)
+        elevation[err != 0] = np.nan
+        elevations[first:last] = elevation
+    return elevations
+
+
+def _refine_crossings(
+    satrec: Satrec,
+    lo: np.ndarray,
+    hi: np.ndarray,
+    rising: np.ndarray,
+    station: Station,
+    min_el: float,
+) -> np.ndarray:
+    """Bisect to the times the elevation crosses `min_el` between `lo` and `hi`"""
+    for _ in range(REFINE_STEPS):
+        mid = (lo + hi) / 2
+        _, el_mid = look_angles(satrec, mid, station)
+        before = (el_mid < min_el) == rising
+        lo = np.where(before, mid, lo)
+        hi = np.where(before, hi, mid)
+    return (lo + hi) / 2
+
+
+def _refine_peaks(
+    satrec: Satrec, times: np.ndarray, step: float, station: Station
+) -> np.ndarray:
+    """Maximum elevation near the grid samples `times`, by parabolic interpolation"""
+    _, around = look_angles(
+        satrec, np.concatenate((times - step, times, times + step)), station
+    )
+    before, peak, after = np.split(around, 3)
+    curvature = before - 2 * peak + after
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = np.where(curvature < 0, 0.5 * (before - after) / curvature, 0.0)
+    _, refined = look_angles(satrec, times + np.clip(shift, -1, 1) * step, station)
+    return np.fmax(refined, peak)
+
+
+def _utc(timestamp: float) -> datetime.datetime:
+    """Naive UTC datetime to the second, the same as the K3NG reports"""
+    return datetime.datetime.fromtimestamp(
+        round(timestamp), datetime.timezone.utc
+    ).replace(tzinfo=None)
+
+
+def predict_passes(
+    tles: Sequence[TLE],
+    station: Union[Station, str],
+    start: Optional[float] = None,
+    days: float = 2.0,
+    min_el: float = 0.0,
+    step: float = 60.0,
+) -> list[list[PassInfo]]:
+    """Predict the passes of many satellites over the station
+
+    All satellites are propagated on a `step` second grid from `start` (a unix time, now by
+    default) for `days`, then each pass's AOS/LOS is refined by bisection and its maximum
+    elevation by interpolation. Passes shorter than `step` can be missed. Passes already in
+    progress at the start or still in progress at the end are cut to the window.
+
+    `station` is a `Station` or a Maidenhead grid square. Returns a list of passes per TLE,
+    in the order given.
+    """
+    station = _station(station)
+    start = time.time() if start is None else start
+    times = start + np.arange(0.0, days * 86400.0 + step, step)
+
+    satrecs = [_satrec(tle.line_one, tle.line_two) for tle in tles]
+    elevations = elevation_grid(satrecs, times, station)
+
+    passes: list[list[PassInfo]] = []
+    for satrec, elevation in zip(satrecs, elevations):
+        sat_above = elevation >= min_el
+        if not sat_above.any():
+            passes.append([])
+            continue
+
+        # Indices of the sample before each rise or set, refined together
+        edges = np.flatnonzero(np.diff(sat_above.astype(np.int8)))
+        rising = ~sat_above[edges]
+        crossings = _refine_crossings(
+            satrec, times[edges], times[edges + 1], rising, station, min_el
+        )
+        aos, los = crossings[rising], crossings[~rising]
+        if sat_above[0]:
+            aos = np.concatenate(([times[0]], aos))
+        if sat_above[-1]:
+            los = np.concatenate((los, [times[-1]]))
+
+        # Coarse peak of each pass, then refined around it
+        first = np.searchsorted(times, aos, side="left")
+        last = np.searchsorted(times, los, side="right")
+        filled = np.nan_to_num(elevation, nan=-90.0)
+        peaks = [lo + int(np.argmax(filled[lo:hi])) for lo, hi in zip(first, last)]
+        max_el = _refine_peaks(satrec, times[peaks], step, station)
+
+        azimuth, _ = look_angles(satrec, np.concatenate((aos, los)), station)
+        aos_az, los_az = np.split(azimuth, 2)
+        passes.append(
+            [
+                PassInfo(
+                    _utc(a), round(a_az) % 360, _utc(b), round(b_az) % 360, round(el)
+                )
+                for a, a_az, b, b_az, el in zip(aos, aos_az, los, los_az, max_el)
+            ]
+        )
+
+    return passes
+
+
+def next_pass(
+    tle: TLE,
+    station: Union[Station, str],
+    start: Optional[float] = None,
+    days: float = 2.0,
+    min_el: float = 0.0,
+) -> Optional[PassInfo]:
+    """The next pass of one satellite, or None if there isn't one within `days`"""
+    passes = predict_passes([tle], station, start, days, min_el)[0]
+    return passes[0] if passes else None
+
+
+#  ╭──────────────────────────────────────────────────────────╮
+#  │                    Visibility search                     │
+#  ╰──────────────────────────────────────────────────────────╯
+
+
+def _elements(tles: Sequence[TLE]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Inclination (degrees), eccentricity and mean motion (rev/day) from line two"""
+    inclination = np.array([float(tle.line_two[8:16]) for tle in tles])
+    eccentricity = np.array([float("0." + tle.line_two[26:33]) for tle in tles])
+    mean_motion = np.array([float(tle.line_two[52:63]) for tle in tles])
+    return inclination, eccentricity, mean_motion
+
+
+def _footprint(radius: np.ndarray, min_el: float) -> np.ndarray:
+    """Earth central angle (degrees) within which a satellite at `radius` is above `min_el`"""
+    el = math.radians(min_el)
+    ratio = np.clip(EARTH_RADIUS * math.cos(el) / radius, -1.0, 1.0)
+    return np.degrees(np.arccos(ratio) - el)
+
+
+def _prefilter(
+    tles: Sequence[TLE],
+    station: Station,
+    start: float,
+    seconds: float,
+    min_el: float,
+) -> np.ndarray:
+    """Indices of the TLEs that could possibly be above `min_el` within the window
+
+    This only looks at the orbital elements and the position at the start, so it keeps some
+    satellites that won't be visible but never drops one that will.
+    """
+    inclination, eccentricity, mean_motion = _elements(tles)
+    with np.errstate(divide="ignore"):
+        semi_major = np.cbrt(EARTH_MU / (mean_motion * 2 * np.pi / 86400.0) ** 2)
+    apogee = semi_major * (1 + eccentricity)
+    reach = _footprint(apogee, min_el) + PREFILTER_MARGIN
+
+    # The ground track never gets further from the equator than the inclination
+    max_lat = np.minimum(inclination, 180.0 - inclination)
+    keep = abs(station.lat) <= max_lat + reach
+
+    # How far the ground track can move in the window: the orbital motion, fastest at
+    # perigee, plus the Earth's rotation
+    perigee_rate = (mean_motion * 360.0 / 86400.0 * (1 + eccentricity) ** 2) / (
+        1 - eccentricity**2
+    ) ** 1.5
+    travel = (perigee_rate + EARTH_ROTATION) * seconds
+
+    candidates = np.flatnonzero(keep)
+    if not len(candidates):
+        return candidates
+
+    # Angle between the satellite and the station, seen from the centre of the Earth
+    jd, fr = _julian(np.array([start]))
+    sats = SatrecArray(
+        [_satrec(tles[int(i)].line_one, tles[int(i)].line_two) for i in candidates]
+    )
+    err, teme, _ = sats.sgp4(jd, fr)
+    position = _ecef(teme, jd, fr)[:, 0, :]
+    zenith = station.ecef() / np.linalg.norm(station.ecef())
+    with np.errstate(invalid="ignore"):
+        cos_angle = position @ zenith / np.linalg.norm(position, axis=1)
+    angle = np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+
+    # Satellites sgp4 can't place at the start are left for the full propagation
+    close = (err[:, 0] != 0) | (angle <= reach[candidates] + travel[candidates])
+    return candidates[close]
+
+
+def _max_elevations(
+    lines: list[tuple[str, str]], times: np.ndarray, station: Station
+) -> np.ndarray:
+    """Highest elevation of each satellite over `times`, run in the worker processes"""
+    satrecs = [_satrec(str(line_one), str(line_two)) for line_one, line_two in lines]
+    elevations = elevation_grid(satrecs, times, station)
+    return np.nanmax(np.nan_to_num(elevations, nan=-90.0), axis=1)
+
+
+def find_visible(
+    tles: Sequence[TLE],
+    station: Union[Station, str],
+    minutes: float = 10.0,
+    start: Optional[float] = None,
+    min_el: float = 0.0,
+    step: float = 20.0,
+    workers: Optional[int] = None,
+) -> list[tuple[TLE, float]]:
+    """Which satellites will be above `min_el` in the next `minutes`
+
+    Most of a catalog is ruled out from the orbital elements and each satellite's position
+    at the start. The rest are propagated on a `step` second grid, split over `workers`
+    processes (all CPUs by default) when there are many of them. Passes that only clip the
+    horizon for less than `step` can be missed.
+
+    Returns each visible TLE with its highest elevation in the window, highest first.
+    """
+    station = _station(station)
+    start = time.time() if start is None else start
+    seconds = minutes * 60.0
+    times = start + np.arange(0.0, seconds + step, step)
+
+    candidates = _prefilter(tles, station, start, seconds, min_el)
+    lines = [(tles[i].line_one, tles[i].line_two) for i in candidates]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(lines) >= POOL_THRESHOLD:
+        chunks = [list(part) for part in np.array_split(lines, workers)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                _max_elevations,
+                chunks,
+                [times] * len(chunks),
+                [station] * len(chunks),
+            )
+            max_el = np.concatenate(list(results))
+    elif lines:
+        max_el = _max_elevations(lines, times, station)
+    else:
+        max_el = np.empty(0)
+
+    visible = [
+        (tles[i], float(el)) for i, el in zip(candidates, max_el) if el >= min_el
+    ]
+    return sorted(visible, key=lambda item: item[1], reverse=True)
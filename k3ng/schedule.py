@@ -0,0 +1,294 @@
+"""Unattended tracking of several satellites, one pass after another
+
+Needs the `predict` extra, like `k3ng.predict`.
+"""
+
+import datetime
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Optional, Sequence, Union
+
+import numpy as np
+import serial
+
+from .k3ng import K3NG, PassInfo, Satellite
+from .predict import Station, _satrec, _station, look_angles, predict_passes
+
+logger = logging.getLogger(__name__)
+
+# Slack added to every slew estimate, for settling and the commands themselves
+SLEW_MARGIN = 20.0
+# Passes are planned this far ahead and replanned when half of it has gone by
+PLAN_HOURS = 24.0
+# Errors kept in the scheduler status
+ERROR_HISTORY = 20
+
+
+class PassStatus(str, Enum):
+    """Where a planned pass is in its execution"""
+
+    PLANNED = "planned"
+    POSITIONING = "positioning"
+    TRACKING = "tracking"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class ScheduledPass:
+    """A pass chosen to be tracked"""
+
+    satellite: Satellite
+    priority: int
+    info: PassInfo
+    status: PassStatus = PassStatus.PLANNED
+
+    def start(self) -> float:
+        """AOS as a unix time"""
+        return _timestamp(self.info.start_time)
+
+    def end(self) -> float:
+        """LOS as a unix time"""
+        return _timestamp(self.info.end_time)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Plain values only, suitable for sending to another process"""
+        return {
+            "norad_id": self.satellite.id,
+            "title": self.satellite.tle.title,
+            "priority": self.priority,
+            "status": self.status.value,
+            **self.info.as_dict(),
+        }
+
+
+def _timestamp(when: datetime.datetime) -> float:
+    # Predicted pass times are naive UTC, like the ones the K3NG reports
+    return when.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def slew_time(from_az: float, to_az: float, slew_rate: float) -> float:
+    """Seconds to slew between two azimuths without crossing the azimuth stop at north
+
+    Elevation moves at the same time and over less range, so it doesn't add to this.
+    """
+    return abs(to_az - from_az) / slew_rate + SLEW_MARGIN
+
+
+def plan_passes(
+    satellites: Sequence[tuple[Satellite, int]],
+    station: Union[Station, str],
+    start: Optional[float] = None,
+    hours: float = PLAN_HOURS,
+    min_el: float = 10.0,
+    slew_rate: float = 6.0,
+) -> list[ScheduledPass]:
+    """Choose passes to track so that they don't overlap
+
+    `satellites` pairs each satellite with a priority, lower numbers winning (like
+    `Priority`), then higher passes. Every chosen pass leaves time before it to slew from
+    where the previous one ended to its AOS azimuth. Returns the chosen passes in time order.
+    """
+    start = time.time() if start is None else start
+    predicted = predict_passes(
+        [sat.tle for sat, _ in satellites], station, start, hours / 24, min_el
+    )
+
+    candidates = [
+        ScheduledPass(sat, priority, info)
+        for (sat, priority), passes in zip(satellites, predicted)
+        for info in passes
+    ]
+    candidates.sort(key=lambda p: (p.priority, -p.info.max_el, p.start()))
+
+    chosen: list[ScheduledPass] = []
+    for candidate in candidates:
+        if all(_compatible(candidate, other, slew_rate) for other in chosen):
+            chosen.append(candidate)
+
+    return sorted(chosen, key=ScheduledPass.start)
+
+
+def _compatible(a: ScheduledPass, b: ScheduledPass, slew_rate: float) -> bool:
+    """Whether there's time to track both passes, including the slew between them"""
+    first, second = (a, b) if a.start() <= b.start() else (b, a)
+    gap = second.start() - first.end()
+    return gap >= slew_time(first.info.end_az, second.info.start_az, slew_rate)
+
+
+@dataclass
+class SchedulerStatus:
+    """What the scheduler is doing"""
+
+    running: bool
+    current: Optional[ScheduledPass] = None
+    completed: int = 0
+    failed: int = 0
+    planned_at: Optional[float] = None
+    errors: deque[str] = field(default_factory=lambda: deque(maxlen=ERROR_HISTORY))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Plain values only, suitable for sending to another process"""
+        return {
+            "running": self.running,
+            "current": self.current.as_dict() if self.current is not None else None,
+            "completed": self.completed,
+            "failed": self.failed,
+            "planned_at": self.planned_at,
+            "errors": list(self.errors),
+        }
+
+
+class PassScheduler:
+    """Tracks the passes of several satellites in turn, using the controller's tracking
+
+    The TLEs are synced to the controller and a plan is made for the next `hours`, then
+    replanned halfway through. Ahead of each pass the rotator slews to the AOS azimuth, so
+    tracking starts with the antenna already in place, then the satellite is selected and
+    tracking enabled until LOS.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        rot: K3NG,
+        satellites: Sequence[tuple[Satellite, int]],
+        station: Union[Station, str, None] = None,
+        hours: float = PLAN_HOURS,
+        min_el: float = 10.0,
+        slew_rate: Optional[float] = None,
+    ) -> None:
+        self.rot = rot
+        self.satellites = list(satellites)
+        self.station = _station(station if station is not None else rot.get_loc())
+        self.hours = hours
+        self.min_el = min_el
+        if slew_rate is None:
+            slew_rate = rot.motion.azimuth.rate if rot.motion is not None else 6.0
+        self.slew_rate = slew_rate
+
+        self.plan: list[ScheduledPass] = []
+        self.status = SchedulerStatus(running=False)
+        self._position = (0.0, 0.0)
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="k3ng-scheduler", daemon=True
+        )
+
+    def start(self) -> "PassScheduler":
+        """Load the TLEs, plan, and start working through the plan"""
+        self.rot.set_time()
+        self.rot.sync_tles([sat for sat, _ in self.satellites])
+        self._position = self.rot.get_position()
+        self.replan()
+        self.status.running = True
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop after disabling tracking, leaving the rotator where it is"""
+        self._stopping.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def replan(self) -> list[ScheduledPass]:
+        """Plan the passes from now on"""
+        now = time.time()
+        plan = plan_passes(
+            self.satellites, self.station, now, self.hours, self.min_el, self.slew_rate
+        )
+        # Predicting for many satellites takes a while, so drop anything over by now
+        plan = [p for p in plan if p.end() > time.time()]
+        self.plan = plan
+        self.status.planned_at = now
+        logger.info("Planned %s passes", len(plan))
+        return plan
+
+    def get_plan(self) -> list[dict[str, Any]]:
+        """The plan as plain values"""
+        return [scheduled.as_dict() for scheduled in self.plan]
+
+    def get_status(self) -> dict[str, Any]:
+        """The status as plain values"""
+        return self.status.as_dict()
+
+    #  ╭──────────────────────────────────────────────────────────╮
+    #  │                        Execution                         │
+    #  ╰──────────────────────────────────────────────────────────╯
+
+    def _sleep_until(self, when: float) -> bool:
+        """Wait until a unix time, returning False if stopped first"""
+        return not self._stopping.wait(max(0.0, when - time.time()))
+
+    def _next(self) -> Optional[ScheduledPass]:
+        now = time.time()
+        if self.status.planned_at is None or (
+            now - self.status.planned_at > self.hours * 3600 / 2
+        ):
+            self.replan()
+        return next(
+            (p for p in self.plan if p.status == PassStatus.PLANNED and p.end() > now),
+            None,
+        )
+
+    def _aos_elevation(self, scheduled: ScheduledPass) -> float:
+        """Elevation at AOS: `min_el`, unless the pass was already in progress when planned"""
+        tle = scheduled.satellite.tle
+        _, elevation = look_angles(
+            _satrec(tle.line_one, tle.line_two),
+            np.array([scheduled.start()]),
+            self.station,
+        )
+        return min(max(float(elevation[0]), 0.0), 90.0)
+
+    def _execute(self, scheduled: ScheduledPass) -> None:
+        info = scheduled.info
+        lead = slew_time(self._position[0], info.start_az, self.slew_rate)
+        if not self._sleep_until(scheduled.start() - lead):
+            return
+
+        scheduled.status = PassStatus.POSITIONING
+        logger.info("Positioning for %s", scheduled.as_dict())
+        self.rot.set_azimuth(info.start_az)
+        self.rot.set_elevation(self._aos_elevation(scheduled))
+        self.rot.select_satellite(scheduled.satellite)
+
+        if not self._sleep_until(scheduled.start()):
+            return
+
+        scheduled.status = PassStatus.TRACKING
+        self.rot.enable_tracking()
+        stopped = not self._sleep_until(scheduled.end())
+        self.rot.disable_tracking()
+        self._position = (info.end_az, 0.0)
+
+        if not stopped:
+            scheduled.status = PassStatus.DONE
+            self.status.completed += 1
+
+    def _run(self) -> None:
+        try:
+            while not self._stopping.is_set():
+                scheduled = self._next()
+                if scheduled is None:
+                    # Nothing left in this plan, check again once it's due a replan
+                    self._sleep_until(time.time() + 60)
+                    continue
+
+                self.status.current = scheduled
+                try:
+                    self._execute(scheduled)
+                except (RuntimeError, serial.SerialException) as ex:
+                    logger.error("Pass of %s failed: %s", scheduled.satellite.id, ex)
+                    scheduled.status = PassStatus.FAILED
+                    self.status.failed += 1
+                    self.status.errors.append(str(ex))
+                finally:
+                    self.status.current = None
+        finally:
+            self.status.running = False
@@ -0,0 +1,110 @@
+"""RPC service sharing one K3NG connection between clients, see `rpc_daemon`"""
+
+import json
+from typing import Any, Callable, Iterable, Optional
+
+import rpyc  # type: ignore
+
+from .k3ng import K3NG, Satellite, Subscription
+
+
+def exposify(cls):
+    """Decorator to append `exposed_` for all public members of a class"""
+    for key in dir(cls):
+        val = getattr(cls, key)
+        if callable(val) and not key.startswith("_"):
+            setattr(cls, "exposed_%s" % (key,), val)
+    return cls
+
+
+@exposify
+class ExposedK3NG(K3NG):
+    """Exposed K3NG class for RPC"""
+
+
+class K3NGService(rpyc.Service):
+    """K3NG wrapper for a Linux service"""
+
+    DEFAULT_PORT = 18866
+
+    def __init__(self, ser_port: str, poll_rate: Optional[float] = None) -> None:
+        self.exposed_k3ng = ExposedK3NG(ser_port)
+        self.exposed_k3ng.set_time()
+        if poll_rate:
+            self.exposed_k3ng.start_polling(poll_rate)
+        self._scheduler: Any = None
+
+    def exposed_subscribe(
+        self,
+        callback: Callable[[str], Any],
+        rate_hz: float = 1.0,
+        fields: Optional[list[str]] = None,
+    ) -> Subscription:
+        """Push telemetry samples to `callback` as JSON instead of polling
+
+        See `K3NG.subscribe`. The client must serve its connection (e.g. with
+        `rpyc.BgServingThread`) for the callbacks to run. The subscription ends when it is
+        cancelled or the callback fails.
+        """
+        # Copy out of the netref so the subscription doesn't call back for every field
+        fields = None if fields is None else list(fields)
+        return self.exposed_k3ng.subscribe(
+            lambda sample: callback(json.dumps(sample)), rate_hz, fields
+        )
+
+    def exposed_get_telemetry(self, fields: Optional[list[str]] = None) -> str:
+        """Position and tracking status in one call, as JSON
+
+        See `Telemetry.as_dict`; served from the polled snapshot when polling. rpyc passes
+        dicts by reference, so every key read would be another round trip, whereas a
+        string arrives whole in the reply.
+        """
+        fields = None if fields is None else list(fields)
+        return json.dumps(self.exposed_k3ng.get_telemetry().as_dict(fields))
+
+    def exposed_get_stats(self) -> str:
+        """Serial traffic and per-command latency as JSON, see `K3NG.get_stats`"""
+        return json.dumps(self.exposed_k3ng.get_stats())
+
+    def exposed_schedule(
+        self,
+        satellites: Iterable[tuple[int, int]],
+        hours: float = 24.0,
+        min_el: float = 10.0,
+    ) -> str:
+        """Track the passes of several satellites unattended, see `PassScheduler`
+
+        `satellites` pairs NORAD IDs with priorities (lower wins). Replaces any running
+        schedule and returns the plan, as JSON like `get_plan`.
+        """
+        # Needs the predict extra, so only import it when scheduling
+        # pylint: disable-next=import-outside-toplevel
+        from .schedule import PassScheduler
+
+        priorities = {int(sat_id): int(priority) for sat_id, priority in satellites}
+        sats = Satellite.fetch_many(list(priorities))
+
+        self.exposed_stop_schedule()
+        self._scheduler = PassScheduler(
+            self.exposed_k3ng,
+            [(sat, priorities[sat_id]) for sat_id, sat in sats.items()],
+            hours=hours,
+            min_el=min_el,
+        ).start()
+        return self.exposed_get_plan()
+
+    def exposed_stop_schedule(self) -> None:
+        """Stop the running schedule, if any"""
+        if self._scheduler is not None:
+            self._scheduler.stop()
+            self._scheduler = None
+
+    def exposed_get_plan(self) -> str:
+        """The passes the schedule will track, as a JSON list"""
+        plan = self._scheduler.get_plan() if self._scheduler is not None else []
+        return json.dumps(plan)
+
+    def exposed_get_schedule_status(self) -> str:
+        """What the schedule is doing as JSON, null if there isn't one"""
+        status = self._scheduler.get_status() if self._scheduler is not None else None
+        return json.dumps(status)
@@ -0,0 +1,232 @@
+"""Host-driven satellite tracking, pointing the rotator faster than the firmware does
+
+Needs the `predict` extra, like `k3ng.predict`.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+import serial
+
+from .k3ng import K3NG, TLE
+from .predict import Station, _satrec, _station, look_angles
+from .wrap import WrapPlan, plan_pass_wrap
+
+logger = logging.getLogger(__name__)
+
+# Longest look-ahead ever applied, so one slow exchange can't throw the pointing off
+MAX_LEAD = 10.0
+# Weight of the newest sample in the command latency estimate
+LATENCY_SMOOTHING = 0.2
+# Tracking errors kept in `HostTracker.errors`
+ERROR_HISTORY = 3600
+
+
+def _angle_diff(a: float, b: float) -> float:
+    """Signed difference between two azimuths, in (-180, 180]"""
+    return (a - b + 180.0) % 360.0 - 180.0
+
+
+@dataclass
+class TrackingError:
+    """Where the rotator was pointing compared to the satellite"""
+
+    timestamp: float
+    azimuth: float
+    elevation: float
+    az_error: float
+    el_error: float
+    lead: float
+
+
+class HostTracker:
+    """Points the rotator at a satellite computed on the host, `rate_hz` times a second
+
+    Each update reads the position, records the tracking error against where the satellite
+    is now, and commands where the satellite will be once the command has taken effect: the
+    measured command latency plus the time to slew there at `slew_rate` degrees per second
+    (by default from the rotator's motion model, see `K3NG.characterize_motion`). Targets
+    that moved less than `deadband` degrees aren't sent, to keep the serial link free.
+    Before AOS the rotator is left alone; tracking stops by itself at LOS.
+
+    Given the rotator's raw azimuth range as `az_range` (e.g. `(0, 450)` for one with 90
+    degrees of overlap), the pass is planned with `plan_pass_wrap` at AOS and commanded in
+    raw azimuths on the chosen side of the wrap, so it doesn't unwind mid-pass. Without it,
+    azimuths are commanded as 0-360.
+
+    The controller's own tracking is disabled while this runs, as both would fight over the
+    rotator.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        rot: K3NG,
+        tle: TLE,
+        station: Union[Station, str, None] = None,
+        rate_hz: float = 2.0,
+        min_el: float = 0.0,
+        slew_rate: Optional[float] = None,
+        deadband: float = 0.5,
+        az_range: Optional[tuple[float, float]] = None,
+    ) -> None:
+        if rate_hz <= 0:
+            raise ValueError("Tracking rate must be positive")
+
+        self.rot = rot
+        self.tle = tle
+        self.station = _station(station if station is not None else rot.get_loc())
+        self.rate_hz = rate_hz
+        self.min_el = min_el
+        if slew_rate is None:
+            slew_rate = rot.motion.azimuth.rate if rot.motion is not None else 6.0
+        self.slew_rate = slew_rate
+        self.deadband = deadband
+        self.az_range = az_range
+        self.wrap: Optional[WrapPlan] = None
+
+        self.latency = 0.0
+        self.errors: deque[TrackingError] = deque(maxlen=ERROR_HISTORY)
+        self.risen = False
+        self.finished = threading.Event()
+
+        self._satrec = _satrec(tle.line_one, tle.line_two)
+        self._target: Optional[tuple[float, float]] = None
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="k3ng-tracker", daemon=True
+        )
+
+    def start(self) -> "HostTracker":
+        """Start tracking"""
+        self.rot.disable_tracking()
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop tracking, leaving the rotator where it is"""
+        self._stopping.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for LOS (or `stop`), returning False on timeout"""
+        return self.finished.wait(timeout)
+
+    @property
+    def error(self) -> Optional[TrackingError]:
+        """The latest tracking error"""
+        return self.errors[-1] if self.errors else None
+
+    def rms_error(self) -> tuple[float, float]:
+        """RMS azimuth and elevation error over the recorded history"""
+        if not self.errors:
+            return (0.0, 0.0)
+        az = np.array([sample.az_error for sample in self.errors])
+        el = np.array([sample.el_error for sample in self.errors])
+        return (float(np.sqrt(np.mean(az**2))), float(np.sqrt(np.mean(el**2))))
+
+    def look(self, when: float) -> tuple[float, float]:
+        """Azimuth and elevation of the satellite at a unix time"""
+        az, el = look_angles(self._satrec, np.array([when]), self.station)
+        return (float(az[0]), float(el[0]))
+
+    def _raw(self, when: float, azimuth: float) -> float:
+        """The azimuth to command for a true azimuth"""
+        if self.wrap is None:
+            return azimuth % 360.0
+        return self.wrap.raw_azimuth(when, azimuth)
+
+    #  ╭──────────────────────────────────────────────────────────╮
+    #  │                       Update loop                        │
+    #  ╰──────────────────────────────────────────────────────────╯
+
+    def _timed(self, func, *args):
+        """Run a rotator command, folding its duration into the latency estimate"""
+        start = time.monotonic()
+        ret = func(*args)
+        elapsed = time.monotonic() - start
+        self.latency += LATENCY_SMOOTHING * (elapsed - self.latency)
+        return ret
+
+    def _update(self) -> bool:
+        """One tracking step, returning False once the pass is over"""
+        now = time.time()
+        sat_az, sat_el = self.look(now)
+        if sat_el < self.min_el:
+            if self.risen:
+                logger.info("LOS of %s, stopping tracking", self.tle.title)
+                return False
+            return True
+        if not self.risen and self.az_range is not None:
+            self.wrap = plan_pass_wrap(
+                self.rot, self.tle, now, None, *self.az_range, self.station, self.min_el
+            )
+            logger.info(
+                "Tracking %s from raw azimuth %.1f with %s unwinds",
+                self.tle.title,
+                self.wrap.start_az,
+                self.wrap.unwinds,
+            )
+        self.risen = True
+
+        azimuth, elevation = self._timed(self.rot.get_position)
+
+        # Aim where the satellite will be once the rotator gets there. With a plan that's
+        # the way round the plan goes, comparing in its turn as the rotator reports 0-360
+        if self.wrap is None:
+            az_distance = abs(_angle_diff(sat_az, azimuth))
+        else:
+            reported = self.wrap.raw_azimuth(now, azimuth)
+            az_distance = abs(self.wrap.raw_azimuth(now, sat_az) - reported)
+        distance = max(az_distance, abs(sat_el - elevation))
+        lead = min(self.latency + distance / self.slew_rate, MAX_LEAD)
+        target_az, target_el = self.look(now + lead)
+        target_az = self._raw(now + lead, target_az)
+        target_el = min(max(target_el, 0.0), 90.0)
+
+        self.errors.append(
+            TrackingError(
+                timestamp=now,
+                azimuth=azimuth,
+                elevation=elevation,
+                az_error=_angle_diff(sat_az, azimuth),
+                el_error=sat_el - elevation,
+                lead=lead,
+            )
+        )
+
+        last = self._target
+        if last is None or abs(target_az - last[0]) >= self.deadband:
+            self._timed(self.rot.set_azimuth, target_az)
+            last = (target_az, last[1] if last is not None else -1.0)
+        if abs(target_el - last[1]) >= self.deadband:
+            self._timed(self.rot.set_elevation, target_el)
+            last = (last[0], target_el)
+        self._target = last
+
+        return True
+
+    def _run(self) -> None:
+        period = 1 / self.rate_hz
+        next_update = time.monotonic()
+        try:
+            while not self._stopping.is_set():
+                try:
+                    if not self._update():
+                        return
+                except (RuntimeError, ValueError, serial.SerialException) as ex:
+                    # ValueError from a garbled position, which the next update may not get
+                    logger.warning("Tracking update failed: %s", ex)
+
+                # Don't try to catch up if an update overran its slot
+                next_update = max(next_update + period, time.monotonic())
+                self._stopping.wait(next_update - time.monotonic())
+        finally:
+            self.finished.set()
@@ -0,0 +1,162 @@
+"""Cable wrap planning, so passes crossing the azimuth stop don't unwind mid-pass
+
+Rotators turn through a fixed range of raw azimuth, `az_min` to `az_max` degrees, which may
+be more than 360 (e.g. 0 to 450, where 0-90 can also be reached as 360-450) or start
+somewhere other than north (e.g. 180 to 540 for a stop in the south). These are the limits
+set with `cal_full_ccw`/`cal_full_cw`, as configured in the firmware. Needs the `predict`
+extra, like `k3ng.predict`.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+
+from .k3ng import K3NG, TLE
+from .predict import Station, _satrec, _station, look_angles
+
+# Longest pass followed when planning without a known LOS, in seconds
+MAX_PASS = 2 * 3600.0
+
+
+@dataclass
+class WrapPlan:
+    """Raw rotator azimuths to follow a pass with
+
+    `azimuths` are raw azimuths at `times` (unix), continuous except at the `unwinds`
+    where the range forces the rotator to swing round. `az_min`/`az_max` is the range
+    planned for.
+    """
+
+    times: np.ndarray
+    azimuths: np.ndarray
+    unwinds: int
+    slew: float
+    az_min: float = 0.0
+    az_max: float = 360.0
+
+    @property
+    def start_az(self) -> float:
+        """Raw azimuth to be at for AOS"""
+        return float(self.azimuths[0])
+
+    def raw_azimuth(self, when: float, azimuth: float) -> float:
+        """The raw azimuth on the plan for a true azimuth (0-360) at a unix time
+
+        Between samples the satellite can already be past the stop the plan is about to
+        unwind at, so the result is held at the end of the range rather than beyond it.
+        """
+        # The latest planned sample rather than interpolating, which would be meaningless
+        # across an unwind
+        index = int(np.searchsorted(self.times, when, side="right")) - 1
+        planned = float(self.azimuths[min(max(index, 0), len(self.azimuths) - 1)])
+        raw = azimuth + 360.0 * round((planned - azimuth) / 360.0)
+        return min(max(raw, self.az_min), self.az_max)
+
+    def pre_position(self, rot: K3NG) -> None:
+        """Slew to the AOS azimuth on the chosen side of the wrap"""
+        rot.set_azimuth(self.start_az)
+
+
+def _offsets(azimuth: float, az_min: float, az_max: float) -> list[int]:
+    """Turns (of 360) that bring an unwrapped azimuth into the rotator's range"""
+    low = int(np.ceil((az_min - azimuth) / 360.0))
+    high = int(np.floor((az_max - azimuth) / 360.0))
+    return list(range(low, high + 1))
+
+
+def _reach(unwrapped: np.ndarray, first: int, turns: int, az_min, az_max) -> int:
+    """Index just past the last sample from `first` that stays in range at `turns`"""
+    raw = unwrapped[first:] + 360.0 * turns
+    outside = np.flatnonzero((raw < az_min) | (raw > az_max))
+    return first + (int(outside[0]) if len(outside) else len(raw))
+
+
+def _furthest(unwrapped: np.ndarray, first: int, az_min, az_max) -> int:
+    """Turns to place the track in range at `first` that keep it in range the longest"""
+
+    def reach(turns: int) -> int:
+        return _reach(unwrapped, first, turns, az_min, az_max)
+
+    return max(_offsets(float(unwrapped[first]), az_min, az_max), key=reach)
+
+
+def _cost(plan: tuple[int, float, np.ndarray]) -> tuple[int, float]:
+    """Unwinds, then slew, to compare candidate plans by"""
+    return plan[0], plan[1]
+
+
+def plan_wrap(
+    times: np.ndarray,
+    azimuths: np.ndarray,
+    current_az: float,
+    az_min: float = 0.0,
+    az_max: float = 360.0,
+) -> WrapPlan:
+    """Choose the side of the wrap to follow an azimuth track on
+
+    The track is unwrapped so it is continuous, then placed in the range with as few
+    unwinds as possible (none whenever the range allows it) and, of those, the least total
+    slew from `current_az` (raw).
+    """
+    if az_max - az_min < 360.0:
+        raise ValueError("The azimuth range must cover at least 360 degrees")
+
+    unwrapped = np.degrees(np.unwrap(np.radians(np.asarray(azimuths, dtype=float))))
+
+    plans = []
+    for start_turns in _offsets(float(unwrapped[0]), az_min, az_max):
+        turns = np.empty(len(unwrapped))
+        current, first, unwinds = start_turns, 0, 0
+        while True:
+            end = _reach(unwrapped, first, current, az_min, az_max)
+            turns[first:end] = current
+            if end == len(unwrapped):
+                break
+            # Swing round to whichever side lets the rest of the pass go furthest
+            current = _furthest(unwrapped, end, az_min, az_max)
+            first, unwinds = end, unwinds + 1
+
+        raw = unwrapped + 360.0 * turns
+        slew = abs(raw[0] - current_az) + float(np.sum(np.abs(np.diff(raw))))
+        plans.append((unwinds, slew, raw))
+
+    # The range covers 360 degrees, so there is always at least one way to start
+    unwinds, slew, raw = min(plans, key=_cost)
+    return WrapPlan(np.asarray(times, dtype=float), raw, unwinds, slew, az_min, az_max)
+
+
+def plan_pass_wrap(
+    rot: K3NG,
+    tle: TLE,
+    start: float,
+    end: Optional[float] = None,
+    az_min: float = 0.0,
+    az_max: float = 360.0,
+    station: Union[Station, str, None] = None,
+    min_el: float = 0.0,
+    step: float = 1.0,
+) -> WrapPlan:
+    """Plan the wrap for a pass from a unix time, starting from where the rotator is now
+
+    Without an `end`, the pass is followed until it sets below `min_el` (or for
+    `MAX_PASS` seconds).
+    """
+    station = _station(station if station is not None else rot.get_loc())
+    satrec = _satrec(tle.line_one, tle.line_two)
+    times = np.arange(start, start + MAX_PASS if end is None else end, step)
+    times = np.append(times, start + MAX_PASS if end is None else end)
+    azimuths, elevations = look_angles(satrec, times, station)
+
+    if end is None:
+        # Cut at the first sample after the satellite has risen and set again
+        below = elevations < min_el
+        risen = np.flatnonzero(~below)
+        if len(risen):
+            aos = int(risen[0])
+            set_after = np.flatnonzero(below[aos:])
+            if len(set_after):
+                last = aos + int(set_after[0]) + 1
+                times, azimuths = times[:last], azimuths[:last]
+
+    return plan_wrap(times, azimuths, rot.get_azimuth(), az_min, az_max)
@@ -1,12 +1,16 @@
+import asyncio
 import logging
 import signal
 import sys
 from argparse import ArgumentParser
+from typing import Optional
 
 import systemd.daemon  # type: ignore
 from rpyc.utils.server import ThreadedServer  # type: ignore
 
-from k3ng import K3NGService
+from k3ng.binrpc import BinaryRPCServer
+from k3ng.metrics import MetricsServer
+from k3ng.service import K3NGService
 
 logger = logging.getLogger(__name__)
 
@@ -17,10 +21,42 @@ def graceful_exit(signum, _):
     sys.exit(0)
 
 
-def do_daemon(ser_port: str, rpc_port: int) -> None:
+def parse_track(arg: str) -> tuple[int, int]:
+    sat_id, _, priority = arg.partition(":")
+    return (int(sat_id), int(priority or 0))
+
+
+def do_daemon(
+    ser_port: str,
+    rpc_port: Optional[int],
+    poll_rate: Optional[float],
+    track: list[tuple[int, int]],
+    binary_port: Optional[int] = None,
+    binary_socket: Optional[str] = None,
+    metrics_port: Optional[int] = None,
+) -> None:
+    service = K3NGService(ser_port, poll_rate)
+    if track:
+        service.exposed_schedule(track)
+
+    if metrics_port is not None:
+        if not poll_rate:
+            logger.warning("Position and tracking metrics need --poll-rate")
+        MetricsServer(service.exposed_k3ng, port=metrics_port).start()
+
+    if binary_port is not None or binary_socket is not None:
+        binary = BinaryRPCServer(
+            service.exposed_k3ng, port=binary_port, path=binary_socket
+        )
+        if rpc_port is None:
+            systemd.daemon.notify("READY=1")
+            asyncio.run(binary.serve())
+            return
+        binary.start()
+
     # TODO: make this more secure!
     t = ThreadedServer(
-        K3NGService(ser_port),
+        service,
         port=rpc_port,
         protocol_config={
             "allow_public_attrs": True,
@@ -50,7 +86,57 @@ if __name__ == "__main__":
         default=K3NGService.DEFAULT_PORT,
         help="Port for RPC to bind to",
     )
+    parser.add_argument(
+        "--poll-rate",
+        type=float,
+        default=None,
+        help="Poll position and tracking status in the background at this rate (Hz), "
+        "serving reads from the latest sample",
+    )
+
+    parser.add_argument(
+        "--track",
+        type=parse_track,
+        action="append",
+        default=[],
+        metavar="NORAD_ID[:PRIORITY]",
+        help="Track the passes of this satellite unattended (repeatable, lower priorities "
+        "win conflicts)",
+    )
+
+    parser.add_argument(
+        "--binary-port",
+        type=int,
+        default=None,
+        help="Also serve the binary protocol (k3ng.binrpc) on this TCP port, on localhost",
+    )
+    parser.add_argument(
+        "--binary-socket",
+        default=None,
+        help="Also serve the binary protocol on this Unix socket",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve Prometheus/OpenMetrics metrics over HTTP on this port, on localhost",
+    )
+    parser.add_argument(
+        "--no-rpyc",
+        action="store_true",
+        help="Only serve the binary protocol, not rpyc",
+    )
 
     args = parser.parse_args()
+    if args.no_rpyc and args.binary_port is None and args.binary_socket is None:
+        parser.error("--no-rpyc needs --binary-port or --binary-socket")
 
-    do_daemon(args.serial_port, args.rpc_port)
+    do_daemon(
+        args.serial_port,
+        None if args.no_rpyc else args.rpc_port,
+        args.poll_rate,
+        args.track,
+        args.binary_port,
+        args.binary_socket,
+        args.metrics_port,
+    )
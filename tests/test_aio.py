@@ -0,0 +1,76 @@
+"""Runs AsyncK3NG against the firmware emulator"""
+
+import asyncio
+from typing import Iterator
+
+import pytest
+
+from k3ng import TLE, Satellite
+from k3ng.aio import AsyncK3NG
+from k3ng.emulator import K3NGEmulator
+
+pytest.importorskip("serial_asyncio")
+
+ISS = TLE(
+    "ISS",
+    "1 25544U 98067A   24001.50000000  .00016717  00000-0  10270-3 0  9005",
+    "2 25544  51.6400 208.9163 0006317  69.9862  25.2906 15.49560532432107",
+)
+ISS_UPDATED = TLE(
+    "ISS",
+    "1 25544U 98067A   24002.50000000  .00016717  00000-0  10270-3 0  9006",
+    "2 25544  51.6400 203.9594 0006317  69.9862  25.2906 15.49560532432107",
+)
+
+
+@pytest.fixture(name="emu")
+def fixture_emu() -> Iterator[K3NGEmulator]:
+    with K3NGEmulator() as emulator:
+        yield emulator
+
+
+def test_commands(emu: K3NGEmulator) -> None:
+    async def run() -> None:
+        async with await AsyncK3NG.open(emu.port) as rot:
+            assert await rot.get_version() == K3NGEmulator.VERSION
+            assert await rot.get_position() == (0.0, 0.0)
+
+            await rot.set_time()
+            await rot.set_autopark(5)
+            assert await rot.get_autopark() == 5
+            await rot.set_park_location(90, 10)
+            assert await rot.get_park_location() == (90, 10)
+
+            with pytest.raises(RuntimeError, match="No satellite selected"):
+                await rot.get_tracking_status()
+            with pytest.raises(ValueError):
+                await rot.set_loc("abc")
+
+    asyncio.run(run())
+
+
+def test_sync_tles(emu: K3NGEmulator) -> None:
+    async def run() -> None:
+        async with await AsyncK3NG.open(emu.port) as rot:
+            await rot.load_tles([ISS])
+            assert await rot.read_tles() == [ISS]
+            assert [line.split()[0] for line in await rot.get_trackable()] == ["ISS"]
+            await rot.clear_tles()
+            assert not emu.tles
+
+    asyncio.run(run())
+
+
+def test_sync_changed(emu: K3NGEmulator) -> None:
+    async def run() -> None:
+        async with await AsyncK3NG.open(emu.port) as rot:
+            await rot.load_tles([ISS])
+            sats = [Satellite(25544, ISS_UPDATED)]
+            # Queued behind the sync, so it sees the TLEs the sync leaves
+            result, stored = await asyncio.gather(rot.sync_tles(sats), rot.read_tles())
+
+            assert result.cleared
+            assert (result.uploaded, result.unchanged) == (["ISS"], [])
+            assert stored == [ISS_UPDATED]
+
+    asyncio.run(run())
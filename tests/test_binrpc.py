@@ -0,0 +1,107 @@
+"""Runs the binary RPC server and client over a Unix socket"""
+
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from k3ng import K3NG
+from k3ng.binrpc import WORKERS, BinaryRPCClient, BinaryRPCServer
+from k3ng.emulator import K3NGEmulator
+
+
+class HeldRotator:
+    """Stands in for a K3NG whose `get_version` is held until released"""
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.running = threading.Semaphore(0)
+
+    def get_version(self) -> str:
+        self.running.release()
+        self.release.wait(10.0)
+        return "held"
+
+    def stop(self) -> None:
+        """Returns straight away, like the K3NG's does"""
+
+
+def connect(path: Path, timeout: float = 10.0) -> BinaryRPCClient:
+    """Connect once the server has started listening"""
+    deadline = time.monotonic() + 5.0
+    while True:
+        try:
+            return BinaryRPCClient(path=str(path), timeout=timeout)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.01)
+
+
+@pytest.fixture(name="rot")
+def fixture_rot() -> Iterator[K3NG]:
+    with K3NGEmulator() as emu:
+        rot = K3NG(emu.port)
+        yield rot
+        rot.close()
+
+
+def test_commands(rot: K3NG, tmp_path: Path) -> None:
+    path = tmp_path / "k3ng.sock"
+    BinaryRPCServer(rot, port=None, path=str(path)).start()
+
+    with connect(path) as client:
+        assert client.get_version() == K3NGEmulator.VERSION
+        assert client.get_position() == (0.0, 0.0)
+        client.set_park_location(90, 10)
+        assert client.get_park_location() == (90, 10)
+
+        # Errors come back as the exceptions they would be locally
+        with pytest.raises(ValueError):
+            client.set_loc("abc")
+        with pytest.raises(RuntimeError, match="No satellite selected"):
+            client.get_tracking_status()
+
+
+def test_stop_not_queued(tmp_path: Path) -> None:
+    path = tmp_path / "k3ng.sock"
+    rot = HeldRotator()
+    BinaryRPCServer(rot, port=None, path=str(path)).start()  # type: ignore[arg-type]
+
+    # Hold every worker, with more commands queued behind them
+    clients = [connect(path) for _ in range(WORKERS + 2)]
+    threads = [threading.Thread(target=client.get_version) for client in clients]
+    for thread in threads:
+        thread.start()
+    for _ in range(WORKERS):
+        assert rot.running.acquire(timeout=5.0)
+
+    try:
+        with connect(path) as client:
+            start = time.monotonic()
+            client.stop()
+            assert time.monotonic() - start < 1.0
+    finally:
+        rot.release.set()
+        for thread in threads:
+            thread.join()
+        for client in clients:
+            client.close()
+
+
+def test_timeout_reconnects(tmp_path: Path) -> None:
+    path = tmp_path / "k3ng.sock"
+    rot = HeldRotator()
+    BinaryRPCServer(rot, port=None, path=str(path)).start()  # type: ignore[arg-type]
+
+    with connect(path, timeout=0.2) as client:
+        with pytest.raises(socket.timeout):
+            client.get_version()
+
+        # The late response to that goes to the old connection, not to this call
+        rot.release.set()
+        client.stop()
+        assert client.get_version() == "held"
@@ -0,0 +1,140 @@
+"""Tests for the on-disk TLE cache and the indexed catalog reader"""
+
+import datetime
+import time
+from pathlib import Path
+
+import pytest
+
+from k3ng import TLE
+from k3ng.cache import TLECache, tle_epoch
+from k3ng.catalog import TLECatalog
+
+ISS = TLE(
+    "ISS",
+    "1 25544U 98067A   24001.50000000  .00016717  00000-0  10270-3 0  9005",
+    "2 25544  51.6400 208.9163 0006317  69.9862  25.2906 15.49560532432107",
+)
+SO50 = TLE(
+    "SO-50",
+    "1 27607U 02058C   24001.50000000  .00000733  00000-0  10896-3 0  9993",
+    "2 27607  64.5554 140.2000 0052040 280.0000  79.5000 14.79000000100000",
+)
+# Alpha-5 ID for 100001, without a title line
+ALPHA5 = TLE(
+    "",
+    "1 A0001U 24001A   24001.50000000  .00000000  00000-0  00000-0 0  9990",
+    "2 A0001  97.0000   0.0000 0001000   0.0000   0.0000 15.00000000    09",
+)
+
+
+#  ╭──────────────────────────────────────────────────────────╮
+#  │                          Cache                           │
+#  ╰──────────────────────────────────────────────────────────╯
+
+
+def test_epoch() -> None:
+    assert tle_epoch(ISS.line_one) == datetime.datetime(
+        2024, 1, 1, 12, tzinfo=datetime.timezone.utc
+    )
+    assert tle_epoch("1 00005U 58002B   58001.00000000").year == 1958
+
+
+def test_cache_round_trip(tmp_path: Path) -> None:
+    path = tmp_path / "tles.json"
+    cache = TLECache(path, max_epoch_age=float("inf"))
+    cache.put(25544, ISS.title, ISS.line_one, ISS.line_two, etag='"abc"')
+
+    loaded = TLECache(path, max_epoch_age=float("inf")).get(25544)
+    assert loaded is not None
+    assert (loaded.title, loaded.line_one, loaded.line_two) == (
+        ISS.title,
+        ISS.line_one,
+        ISS.line_two,
+    )
+    assert loaded.etag == '"abc"'
+    assert loaded.epoch == tle_epoch(ISS.line_one).timestamp()
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_cache_stale(tmp_path: Path) -> None:
+    cache = TLECache(tmp_path / "tles.json", max_age=60.0, max_epoch_age=float("inf"))
+    entry = cache.put(25544, ISS.title, ISS.line_one, ISS.line_two, save=False)
+    entry.fetched -= 120.0
+
+    assert cache.get(25544) is None
+    assert cache.get(25544, max_age=float("inf")) is entry
+    assert cache.touch(25544, save=False) is entry
+    assert cache.get(25544) is entry
+
+
+def test_cache_epoch_expired(tmp_path: Path) -> None:
+    cache = TLECache(tmp_path / "tles.json", max_epoch_age=86400.0)
+    cache.put(25544, ISS.title, ISS.line_one, ISS.line_two, save=False)
+
+    # Too old to use, however recently it was fetched
+    assert cache.get(25544) is None
+    assert cache.get(25544, max_age=float("inf")) is None
+
+
+def test_cache_eviction(tmp_path: Path) -> None:
+    cache = TLECache(tmp_path / "tles.json", max_epoch_age=float("inf"), max_entries=1)
+    cache.put(25544, ISS.title, ISS.line_one, ISS.line_two, save=False)
+    time.sleep(0.01)
+    cache.put(27607, SO50.title, SO50.line_one, SO50.line_two, save=False)
+
+    # Over max_entries, the least recently fetched goes
+    assert cache.get(25544) is None
+    assert cache.get(27607) is not None
+
+    # These epochs are long past
+    cache.max_epoch_age = 86400.0
+    assert cache.evict() == 1
+    assert cache.get(27607, max_age=float("inf")) is None
+
+
+#  ╭──────────────────────────────────────────────────────────╮
+#  │                         Catalog                          │
+#  ╰──────────────────────────────────────────────────────────╯
+
+
+@pytest.fixture(name="catalog_path")
+def fixture_catalog_path(tmp_path: Path) -> Path:
+    path = tmp_path / "catalog.txt"
+    lines = [ISS.title, ISS.line_one, ISS.line_two, ALPHA5.line_one, ALPHA5.line_two]
+    lines += [SO50.title, SO50.line_one, SO50.line_two]
+    path.write_text("\n".join(lines) + "\n", encoding="ascii")
+    return path
+
+
+def test_catalog(catalog_path: Path) -> None:
+    with TLECatalog(catalog_path) as catalog:
+        assert sorted(catalog) == [25544, 27607, 100001]
+        assert catalog.get(25544) == ISS
+        # Titled as sanitised for the K3NG
+        assert catalog.find("so-50") == TLE("SO50", SO50.line_one, SO50.line_two)
+        assert catalog.get(100001) == TLE("100001", ALPHA5.line_one, ALPHA5.line_two)
+        assert catalog.get(1) is None
+        with pytest.raises(KeyError):
+            catalog.satellite(1)
+
+
+def test_catalog_index(catalog_path: Path) -> None:
+    with TLECatalog(catalog_path):
+        pass
+    index_path = catalog_path.with_name("catalog.txt.idx")
+    assert index_path.exists()
+    assert not list(catalog_path.parent.glob("*.tmp"))
+
+    # The saved index is used as is while the catalog is unchanged...
+    with TLECatalog(catalog_path) as catalog:
+        assert catalog.find("ISS") == ISS
+        assert len(catalog) == 3
+
+    # ...and rebuilt once it changes
+    catalog_path.write_text(
+        "\n".join([SO50.title, SO50.line_one, SO50.line_two]) + "\n", encoding="ascii"
+    )
+    with TLECatalog(catalog_path) as catalog:
+        assert list(catalog) == [27607]
+        assert catalog.find("ISS") is None
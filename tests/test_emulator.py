@@ -0,0 +1,145 @@
+"""Runs K3NG against the firmware emulator, covering the serial protocol end to end"""
+
+import time
+from typing import Iterator
+
+import pytest
+
+from k3ng import K3NG, TLE, Satellite
+from k3ng.emulator import K3NGEmulator
+from k3ng.k3ng import RESPONSE_TIMEOUT
+from k3ng.motion import AxisModel, MotionModel
+
+ISS = TLE(
+    "ISS",
+    "1 25544U 98067A   24001.50000000  .00016717  00000-0  10270-3 0  9005",
+    "2 25544  51.6400 208.9163 0006317  69.9862  25.2906 15.49560532432107",
+)
+SO50 = TLE(
+    "SO-50",
+    "1 27607U 02058C   24001.50000000  .00000733  00000-0  10896-3 0  9993",
+    "2 27607  64.5554 140.2000 0052040 280.0000  79.5000 14.79000000100000",
+)
+
+
+@pytest.fixture(name="emu")
+def fixture_emu() -> Iterator[K3NGEmulator]:
+    with K3NGEmulator(az_rate=1000.0, el_rate=1000.0) as emulator:
+        yield emulator
+
+
+@pytest.fixture(name="rot")
+def fixture_rot(emu: K3NGEmulator) -> Iterator[K3NG]:
+    rot = K3NG(emu.port)
+    yield rot
+    rot.close()
+
+
+#  ╭──────────────────────────────────────────────────────────╮
+#  │                         Queries                          │
+#  ╰──────────────────────────────────────────────────────────╯
+
+
+def test_query(rot: K3NG) -> None:
+    assert rot.query("\\-", lines=1) == [
+        "K3NG Rotator Controller Emulator 2024.01.01.01"
+    ]
+    assert rot.query("\\PA") == ["Park azimuth: 0 elevation: 0"]
+
+
+def test_settings(rot: K3NG, emu: K3NGEmulator) -> None:
+    rot.set_loc("FN25dk")
+    assert emu.grid == "FN25dk"
+    assert rot.get_loc() == "FN25dk"
+
+    rot.set_park_location(180, 45)
+    assert rot.get_park_location() == (180, 45)
+
+    rot.set_autopark(5)
+    assert rot.get_autopark() == 5
+
+    rot.set_time()
+    rot.check_time()
+
+
+#  ╭──────────────────────────────────────────────────────────╮
+#  │                    Extended commands                     │
+#  ╰──────────────────────────────────────────────────────────╯
+
+
+def test_extended(rot: K3NG) -> None:
+    assert rot.get_version() == K3NGEmulator.VERSION
+    assert rot.query_extended("AZ") == "000.000000"
+    assert rot.get_raw_analog(2) == 512
+
+
+def test_extended_error(rot: K3NG) -> None:
+    with pytest.raises(RuntimeError):
+        rot.query_extended("ZZ")
+    assert rot.error_responses == 1
+
+
+def test_move(rot: K3NG, emu: K3NGEmulator) -> None:
+    rot.set_azimuth(90.0)
+    rot.set_elevation(30.0)
+    time.sleep(0.2)
+
+    assert rot.get_position() == pytest.approx((90.0, 30.0))
+    assert rot.query_many(["AZ", "EL"]) == {"AZ": "090.000000", "EL": "030.000000"}
+
+    rot.left()
+    rot.stop()
+    assert emu.azimuth.position < 90.0
+
+
+def test_move_time_backlash(rot: K3NG) -> None:
+    rot.motion = MotionModel(AxisModel(10.0, backlash=5.0), AxisModel(10.0))
+    rot.set_azimuth(45.0)
+    rot.set_azimuth(90.0)
+    time.sleep(0.2)
+
+    # Going back the way it came takes up the play first
+    assert rot.estimate_move_time(135.0, 0.0) == pytest.approx(4.5)
+    assert rot.estimate_move_time(45.0, 0.0) == pytest.approx(5.0)
+
+    rot.left()
+    rot.stop()
+    azimuth = rot.get_azimuth()
+    assert rot.estimate_move_time(135.0, 0.0) == pytest.approx((140.0 - azimuth) / 10)
+
+
+#  ╭──────────────────────────────────────────────────────────╮
+#  │                    Satellite tracking                    │
+#  ╰──────────────────────────────────────────────────────────╯
+
+
+def test_tle_upload(rot: K3NG, emu: K3NGEmulator) -> None:
+    rot.load_tles([ISS, SO50])
+
+    assert [title for title, _, _ in emu.tles] == ["ISS", "SO-50"]
+    assert rot.read_tles() == [ISS, SO50]
+    assert [line.split()[0] for line in rot.get_trackable()] == ["ISS", "SO-50"]
+
+    rot.clear_tles()
+    assert not emu.tles
+
+
+def test_tracking_status(rot: K3NG) -> None:
+    sat = Satellite(25544, ISS)
+    rot.load_tle(sat)
+    rot.select_satellite(sat)
+    rot.enable_tracking()
+
+    status = rot.get_tracking_status()
+    assert status.satname == "ISS"
+    assert status.is_tracking
+
+
+def test_no_satellite(rot: K3NG) -> None:
+    # The one line reply ends the wait, rather than the response timeout
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="No satellite selected"):
+        rot.get_tracking_status()
+    assert rot.get_telemetry().tracking is None
+    assert time.monotonic() - start < RESPONSE_TIMEOUT / 2
+    assert rot.timeouts == 0
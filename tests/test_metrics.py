@@ -0,0 +1,120 @@
+"""Tests for rendering the rotator's metrics"""
+
+from typing import Optional
+
+from k3ng.k3ng import Telemetry, TrackingStatus
+from k3ng.metrics import render
+
+
+class FixedTelemetry(Telemetry):
+    """A sample that is always 1.5s old"""
+
+    def age(self) -> float:
+        return 1.5
+
+
+class CountingRotator:
+    """Stands in for a K3NG with some traffic counted, and a sample if polling"""
+
+    bytes_sent = 120
+    bytes_received = 340
+    timeouts = 1
+    error_responses = 0
+    reconnects = 2
+
+    def __init__(self, snapshot: Optional[Telemetry] = None) -> None:
+        self.snapshot = snapshot
+
+    def latest_telemetry(self) -> Optional[Telemetry]:
+        return self.snapshot
+
+    def latency_histograms(self) -> dict[str, tuple[list[tuple[float, int]], float]]:
+        return {"AZ": ([(0.05, 3), (float("inf"), 4)], 0.25)}
+
+
+PROMETHEUS = """\
+# HELP k3ng_serial_sent_bytes_total Bytes written to the rotator
+# TYPE k3ng_serial_sent_bytes_total counter
+k3ng_serial_sent_bytes_total 120
+# HELP k3ng_serial_received_bytes_total Bytes read from the rotator
+# TYPE k3ng_serial_received_bytes_total counter
+k3ng_serial_received_bytes_total 340
+# HELP k3ng_timeouts_total Replies not received in time
+# TYPE k3ng_timeouts_total counter
+k3ng_timeouts_total 1
+# HELP k3ng_error_responses_total Commands that failed with an error or invalid response
+# TYPE k3ng_error_responses_total counter
+k3ng_error_responses_total 0
+# HELP k3ng_reconnects_total Times the serial port was reopened
+# TYPE k3ng_reconnects_total counter
+k3ng_reconnects_total 2
+# HELP k3ng_command_duration_seconds Time for a command's exchange with the rotator
+# TYPE k3ng_command_duration_seconds histogram
+k3ng_command_duration_seconds_bucket{command="AZ",le="0.05"} 3
+k3ng_command_duration_seconds_bucket{command="AZ",le="+Inf"} 4
+k3ng_command_duration_seconds_sum{command="AZ"} 0.25
+k3ng_command_duration_seconds_count{command="AZ"} 4
+"""
+
+
+def test_prometheus() -> None:
+    assert render(CountingRotator()) == PROMETHEUS  # type: ignore[arg-type]
+
+
+OPENMETRICS = """\
+# HELP k3ng_azimuth_degrees Azimuth of the latest sample
+# TYPE k3ng_azimuth_degrees gauge
+k3ng_azimuth_degrees 123.5
+# HELP k3ng_elevation_degrees Elevation of the latest sample
+# TYPE k3ng_elevation_degrees gauge
+k3ng_elevation_degrees 12.0
+# HELP k3ng_sample_age_seconds Time since the latest sample was taken
+# TYPE k3ng_sample_age_seconds gauge
+k3ng_sample_age_seconds 1.5
+# HELP k3ng_tracking_active Whether the controller is tracking
+# TYPE k3ng_tracking_active gauge
+k3ng_tracking_active 1
+# HELP k3ng_satellite_selected Selected satellite and its signal state
+# TYPE k3ng_satellite_selected gauge
+k3ng_satellite_selected{satname="ISS \\"Zarya\\"",sat_state="LOS",next_event="AOS"} 1
+# HELP k3ng_next_event_minutes Minutes until the next AOS or LOS
+# TYPE k3ng_next_event_minutes gauge
+k3ng_next_event_minutes 65
+# HELP k3ng_serial_sent_bytes Bytes written to the rotator
+# TYPE k3ng_serial_sent_bytes counter
+k3ng_serial_sent_bytes_total 120
+# HELP k3ng_serial_received_bytes Bytes read from the rotator
+# TYPE k3ng_serial_received_bytes counter
+k3ng_serial_received_bytes_total 340
+# HELP k3ng_timeouts Replies not received in time
+# TYPE k3ng_timeouts counter
+k3ng_timeouts_total 1
+# HELP k3ng_error_responses Commands that failed with an error or invalid response
+# TYPE k3ng_error_responses counter
+k3ng_error_responses_total 0
+# HELP k3ng_reconnects Times the serial port was reopened
+# TYPE k3ng_reconnects counter
+k3ng_reconnects_total 2
+# HELP k3ng_command_duration_seconds Time for a command's exchange with the rotator
+# TYPE k3ng_command_duration_seconds histogram
+k3ng_command_duration_seconds_bucket{command="AZ",le="0.05"} 3
+k3ng_command_duration_seconds_bucket{command="AZ",le="+Inf"} 4
+k3ng_command_duration_seconds_sum{command="AZ"} 0.25
+k3ng_command_duration_seconds_count{command="AZ"} 4
+# EOF
+"""
+
+
+def test_openmetrics() -> None:
+    status = TrackingStatus.from_str(
+        [
+            'Satellite:ISS "Zarya"',
+            "AZ:123 EL:12 Lat:43.65 Long:-79.38 LOS TRACKING_ACTIVE",
+            "Next AOS:2024-01-01 12:05:00 Az:120 LOS:2024-01-01 12:15:30 Az:240 Max El:45",
+            "AOS in ~1h5m",
+        ]
+    )
+    rot = CountingRotator(FixedTelemetry(0.0, 123.5, 12.0, status))
+
+    # Counter families are named without _total, the samples keep it
+    assert render(rot, openmetrics=True) == OPENMETRICS  # type: ignore[arg-type]
@@ -0,0 +1,73 @@
+"""Tests for the rotator motion model and fitting it to measured runs"""
+
+import math
+from pathlib import Path
+
+import pytest
+
+from k3ng.motion import AxisModel, MotionModel, fit_run
+
+
+def trapezoid(rate: float, accel: float, latency: float) -> list[tuple[float, float]]:
+    """Positions every 10ms of an axis starting to move `latency` after being commanded"""
+    samples = []
+    for step in range(1000):
+        t = step / 100
+        moving = max(t - latency, 0.0)
+        ramp = rate / accel
+        if moving < ramp:
+            pos = accel * moving**2 / 2
+        else:
+            pos = rate * ramp / 2 + rate * (moving - ramp)
+        samples.append((t, 100.0 - pos))
+    return samples
+
+
+def test_fit_run() -> None:
+    rate, latency, accel = fit_run(trapezoid(6.0, 4.0, 0.3), resolution=0.001)
+    assert rate == pytest.approx(6.0)
+    # Movement is only seen once it has gone past the resolution
+    assert latency == pytest.approx(0.33)
+    assert accel == pytest.approx(4.0, rel=0.05)
+
+
+def test_fit_run_invalid() -> None:
+    with pytest.raises(ValueError):
+        fit_run([(0.0, 0.0)] * 3)
+    with pytest.raises(ValueError):
+        fit_run([(step / 10, 5.0) for step in range(10)])
+
+
+def test_move_time() -> None:
+    axis = AxisModel(rate=6.0, accel=3.0, latency=0.5, deadband=1.0)
+    assert axis.move_time(0.5) == 0.0
+    # 2s to reach 6 deg/s covering 6 deg, then the same slowing down
+    assert axis.move_time(-60.0) == pytest.approx(0.5 + 10.0 + 2.0)
+    # Too short to reach top speed
+    assert axis.move_time(3.0) == pytest.approx(0.5 + 2.0)
+
+    assert AxisModel(rate=5.0).move_time(50.0) == pytest.approx(10.0)
+
+
+def test_move_time_reversing() -> None:
+    axis = AxisModel(rate=5.0, backlash=2.0)
+    assert axis.move_time(-10.0) == pytest.approx(2.0)
+    assert axis.move_time(-10.0, reversing=True) == pytest.approx(2.4)
+
+    model = MotionModel(axis, AxisModel(rate=1.0))
+    assert model.move_time(20.0, 1.0) == pytest.approx(4.0)
+    assert model.move_time(20.0, 1.0, az_reversing=True) == pytest.approx(4.4)
+
+
+def test_model_round_trip(tmp_path: Path) -> None:
+    model = MotionModel(AxisModel(6.0, 3.0, 0.5, 1.0, 0.5), AxisModel(2.0))
+    assert model.move_time(60.0, 10.0) == pytest.approx(12.5)
+
+    path = tmp_path / "motion.json"
+    model.save(path)
+    loaded = MotionModel.load(path)
+    assert loaded is not None
+    assert loaded.azimuth == model.azimuth
+    assert loaded.elevation.accel == math.inf
+
+    assert MotionModel.load(tmp_path / "missing.json") is None
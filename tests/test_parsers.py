@@ -0,0 +1,116 @@
+"""Tests for parsing the K3NG's replies, without a rotator"""
+
+import datetime
+from dataclasses import astuple
+
+import pytest
+
+from k3ng import TLE
+from k3ng.k3ng import (
+    PassInfo,
+    SignalState,
+    TrackingStatus,
+    _parse_tles,
+    _plan_tle_sync,
+    parse_status_log,
+)
+
+STATUS = [
+    "Satellite:ISS",
+    "AZ:123 EL:-4 Lat:43.65 Long:-79.38 LOS TRACKING_ACTIVE",
+    "Next AOS:2024-01-01 12:05:00 Az:120 LOS:2024-01-01 12:15:30 Az:240 Max El:45",
+    "AOS in ~1h5m",
+]
+
+ISS = TLE("ISS", "1 25544U 98067A", "2 25544  51.6400")
+SO50 = TLE("SO-50", "1 27607U 02058C", "2 27607  64.5554")
+AO7 = TLE("AO-07", "1 07530U 74089B", "2 07530 101.9903")
+
+
+#  ╭──────────────────────────────────────────────────────────╮
+#  │                     Tracking status                      │
+#  ╰──────────────────────────────────────────────────────────╯
+
+
+def test_pass_info() -> None:
+    info = PassInfo.from_status(STATUS[2])
+    assert info.start_time == datetime.datetime(2024, 1, 1, 12, 5)
+    assert info.end_time == datetime.datetime(2024, 1, 1, 12, 15, 30)
+    assert (info.start_az, info.end_az, info.max_el) == (120, 240, 45)
+
+
+def test_tracking_status() -> None:
+    status = TrackingStatus.from_str(STATUS)
+    assert status.satname == "ISS"
+    assert status.sat_state == SignalState.LOS
+    assert status.is_tracking
+    assert (status.cur_az, status.cur_el) == (123, -4)
+    assert (status.cur_lat, status.cur_long) == (43.65, -79.38)
+    assert status.next_event == SignalState.AOS
+    assert status.next_event_mins == 65
+    assert status.as_dict()["next_pass"]["start_time"] == "2024-01-01T12:05:00"
+
+
+def test_tracking_status_invalid() -> None:
+    with pytest.raises(ValueError):
+        TrackingStatus.from_str([STATUS[0], "AZ:? EL:?", STATUS[2], STATUS[3]])
+    with pytest.raises(ValueError):
+        TrackingStatus.from_str([*STATUS[:3], "Soon in 5m"])
+
+
+def test_status_log() -> None:
+    inactive = [
+        "Satellite:SO-50",
+        "AZ:10 EL:20 Lat:43.65 Long:-79.38 AOS TRACKING_INACTIVE",
+        STATUS[2],
+        "LOS in 7m",
+    ]
+    log = ["\\~", *STATUS, "garbage", *STATUS[:2], "Next AOS: ???", STATUS[3]]
+    columns = parse_status_log([*log, *inactive])
+
+    # The status with an unreadable pass is skipped
+    assert columns["satname"] == ["ISS", "SO-50"]
+    assert list(columns["sat_state"]) == [SignalState.LOS, SignalState.AOS]
+    assert list(columns["is_tracking"]) == [1, 0]
+    assert list(columns["cur_az"]) == [123.0, 10.0]
+    assert (
+        list(columns["next_pass_start"])
+        == [
+            datetime.datetime(
+                2024, 1, 1, 12, 5, tzinfo=datetime.timezone.utc
+            ).timestamp()
+        ]
+        * 2
+    )
+    assert list(columns["next_pass_max_el"]) == [45, 45]
+    assert list(columns["next_event_mins"]) == [65, 7]
+
+
+#  ╭──────────────────────────────────────────────────────────╮
+#  │                           TLEs                           │
+#  ╰──────────────────────────────────────────────────────────╯
+
+
+def test_parse_tles() -> None:
+    ret = ["\\@", *astuple(ISS), "junk", *astuple(SO50), "1 short"]
+    assert _parse_tles(ret) == [ISS, SO50]
+
+
+def test_sync_append() -> None:
+    upload, unchanged, clear = _plan_tle_sync([ISS], [ISS, SO50])
+    assert (upload, unchanged, clear) == ([SO50], [ISS], False)
+
+    assert _plan_tle_sync([ISS, SO50], [SO50]) == ([], [SO50], False)
+
+
+def test_sync_changed() -> None:
+    updated = TLE("ISS", ISS.line_one, "2 25544  51.6401")
+    upload, unchanged, clear = _plan_tle_sync([ISS, SO50], [updated, AO7])
+
+    # Everything stored is rewritten, keeping SO-50, so SO-50 is uploaded not unchanged
+    assert clear
+    assert upload == [updated, SO50, AO7]
+    assert not unchanged
+
+    upload, unchanged, clear = _plan_tle_sync([ISS, SO50], [updated, SO50])
+    assert (upload, unchanged, clear) == ([updated, SO50], [], True)
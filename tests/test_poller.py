@@ -0,0 +1,38 @@
+"""Tests for TelemetryPoller, which samples the rotator in the background"""
+
+import threading
+from typing import Iterator
+
+from k3ng.k3ng import Telemetry, TelemetryPoller
+
+
+class GarbledRotator:
+    """Stands in for a K3NG whose first reply is garbled"""
+
+    def __init__(self) -> None:
+        self.replies: Iterator[float] = iter(range(1000))
+
+    def _sample_telemetry(self, _tracking: bool) -> Telemetry:
+        azimuth = next(self.replies)
+        if azimuth == 0:
+            raise ValueError("Couldn't parse azimuth from 'A=0#'")
+        return Telemetry(0.0, azimuth, 0.0, None)
+
+
+def test_errors_keep_polling() -> None:
+    samples: list[Telemetry] = []
+    polled = threading.Event()
+
+    def on_sample(sample: Telemetry) -> None:
+        samples.append(sample)
+        if len(samples) == 3:
+            polled.set()
+        raise RuntimeError("Callback failed")
+
+    poller = TelemetryPoller(GarbledRotator(), 100.0, on_sample=on_sample)  # type: ignore[arg-type]
+    poller.start()
+    try:
+        assert polled.wait(5.0)
+    finally:
+        poller.stop()
+    assert [sample.azimuth for sample in samples[:3]] == [1, 2, 3]
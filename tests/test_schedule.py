@@ -0,0 +1,70 @@
+"""Tests for the pass scheduler, with a stand-in rotator and no waiting"""
+
+import datetime
+import time
+
+import pytest
+
+from k3ng import TLE, Satellite
+from k3ng.k3ng import PassInfo
+from k3ng.predict import predict_passes
+from k3ng.schedule import PassScheduler, PassStatus, ScheduledPass
+
+ISS = TLE(
+    "ISS",
+    "1 25544U 98067A   24001.50000000  .00016717  00000-0  10270-3 0  9005",
+    "2 25544  51.6400 208.9163 0006317  69.9862  25.2906 15.49560532432107",
+)
+# The ISS TLE's epoch
+EPOCH = datetime.datetime(2024, 1, 1, 12, tzinfo=datetime.timezone.utc).timestamp()
+
+
+class RecordingRotator:
+    """Stands in for a K3NG, recording what it's sent"""
+
+    motion = None
+
+    def __init__(self) -> None:
+        self.commands: list[tuple[str, object]] = []
+
+    def __getattr__(self, name: str):
+        return lambda *args: self.commands.append((name, *args))
+
+
+def scheduled_at(start: float, end: float) -> ScheduledPass:
+    """A pass of the ISS between two unix times"""
+
+    def naive(when: float) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(when, datetime.timezone.utc).replace(
+            tzinfo=None
+        )
+
+    info = PassInfo(naive(start), 200, naive(end), 20, 45)
+    return ScheduledPass(Satellite(25544, ISS), 0, info)
+
+
+def test_replan_drops_ended(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = time.time()
+    ended = scheduled_at(now - 600.0, now - 10.0)
+    upcoming = scheduled_at(now + 600.0, now + 1200.0)
+    monkeypatch.setattr("k3ng.schedule.plan_passes", lambda *_: [ended, upcoming])
+
+    sched = PassScheduler(RecordingRotator(), [], "FN25dk")  # type: ignore[arg-type]
+    assert sched.replan() == [upcoming]
+
+
+def test_pre_position(monkeypatch: pytest.MonkeyPatch) -> None:
+    info = predict_passes([ISS], "FN25dk", EPOCH, 1.0, min_el=10.0)[0][0]
+    scheduled = ScheduledPass(Satellite(25544, ISS), 0, info)
+
+    rot = RecordingRotator()
+    sched = PassScheduler(rot, [], "FN25dk", min_el=10.0)  # type: ignore[arg-type]
+    monkeypatch.setattr(sched, "_sleep_until", lambda _: True)
+    sched._execute(scheduled)  # pylint: disable=protected-access
+
+    # Waiting at the AOS azimuth and elevation, rather than on the horizon
+    assert rot.commands[:2] == [
+        ("set_azimuth", info.start_az),
+        ("set_elevation", pytest.approx(10.0, abs=0.1)),
+    ]
+    assert scheduled.status == PassStatus.DONE
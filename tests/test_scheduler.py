@@ -0,0 +1,74 @@
+"""Tests for CommandScheduler, the lock ordering exchanges on the serial link"""
+
+import threading
+
+import pytest
+
+from k3ng.k3ng import CommandScheduler, Priority
+
+
+def test_priority_order() -> None:
+    sched = CommandScheduler()
+    order: list[str] = []
+    holding = threading.Event()
+    release = threading.Event()
+
+    def hold() -> None:
+        with sched.exchange():
+            holding.set()
+            release.wait(5.0)
+
+    def run(name: str, priority: Priority) -> None:
+        with sched.exchange(priority):
+            order.append(name)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    holding.wait(5.0)
+
+    waiters = [
+        threading.Thread(target=run, args=("bulk", Priority.BULK)),
+        threading.Thread(target=run, args=("command", Priority.COMMAND)),
+        threading.Thread(target=run, args=("stop", Priority.STOP)),
+    ]
+    for waiter in waiters:
+        waiter.start()
+    # Let them all queue up behind the holder
+    while len(sched._waiting) < len(waiters):  # pylint: disable=protected-access
+        threading.Event().wait(0.01)
+
+    release.set()
+    for thread in [holder, *waiters]:
+        thread.join(5.0)
+    assert order == ["stop", "command", "bulk"]
+
+
+def test_reentrant() -> None:
+    sched = CommandScheduler()
+    with sched.exchange():
+        with sched.exchange(Priority.STOP):
+            pass
+
+
+def test_interrupted_wait(monkeypatch: pytest.MonkeyPatch) -> None:
+    sched = CommandScheduler()
+
+    def interrupted(*_) -> bool:
+        raise KeyboardInterrupt
+
+    # pylint: disable-next=protected-access
+    monkeypatch.setattr(sched._cond, "wait_for", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        with sched.exchange(Priority.STOP):
+            pass
+    monkeypatch.undo()
+
+    # The abandoned ticket mustn't hold up anyone else
+    done = threading.Event()
+
+    def run() -> None:
+        with sched.exchange():
+            done.set()
+
+    threading.Thread(target=run, daemon=True).start()
+    assert done.wait(2.0)
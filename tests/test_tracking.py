@@ -0,0 +1,95 @@
+"""Tests for host-driven tracking, with the satellite's position stubbed out"""
+
+import time
+
+import numpy as np
+import pytest
+
+from k3ng import TLE
+from k3ng.tracking import MAX_LEAD, HostTracker
+from k3ng.wrap import WrapPlan
+
+ISS = TLE(
+    "ISS",
+    "1 25544U 98067A   24001.50000000  .00016717  00000-0  10270-3 0  9005",
+    "2 25544  51.6400 208.9163 0006317  69.9862  25.2906 15.49560532432107",
+)
+
+
+class PointingRotator:
+    """Stands in for a K3NG, reporting azimuths 0-360 and recording what it's sent"""
+
+    motion = None
+
+    def __init__(self, azimuth: float, elevation: float) -> None:
+        self.position = (azimuth, elevation)
+        self.commands: list[tuple[str, float]] = []
+
+    def get_position(self) -> tuple[float, float]:
+        return self.position
+
+    def set_azimuth(self, azimuth: float) -> None:
+        self.commands.append(("azimuth", azimuth))
+
+    def set_elevation(self, elevation: float) -> None:
+        self.commands.append(("elevation", elevation))
+
+
+def tracker(rot: PointingRotator, azimuth: float) -> HostTracker:
+    """A tracker already past AOS, with the satellite fixed at `azimuth` and 30 degrees"""
+    ret = HostTracker(rot, ISS, "FN25dk", slew_rate=6.0)  # type: ignore[arg-type]
+    ret.look = lambda when: (azimuth, 30.0)  # type: ignore[method-assign]
+    ret.risen = True
+    return ret
+
+
+def test_lead_in_overlap() -> None:
+    # Just past north on the overlap side of a 0-450 rotator, which reports 10 for 370
+    rot = PointingRotator(10.0, 30.0)
+    track = tracker(rot, 15.0)
+    now = time.time()
+    track.wrap = WrapPlan(
+        np.array([now - 60.0, now + 60.0]),
+        np.array([360.0, 380.0]),
+        0,
+        20.0,
+        0.0,
+        450.0,
+    )
+
+    assert track._update()  # pylint: disable=protected-access
+    assert track.error is not None
+    assert track.error.lead == pytest.approx(5.0 / 6.0)
+    assert rot.commands[0] == ("azimuth", pytest.approx(375.0))
+
+
+def test_lead_across_north() -> None:
+    rot = PointingRotator(358.0, 30.0)
+    track = tracker(rot, 2.0)
+
+    assert track._update()  # pylint: disable=protected-access
+    assert track.error is not None
+    assert track.error.lead == pytest.approx(4.0 / 6.0)
+    assert track.error.lead < MAX_LEAD
+
+
+def test_garbled_position() -> None:
+    rot = PointingRotator(0.0, 30.0)
+    track = tracker(rot, 0.0)
+    calls: list[float] = []
+
+    def get_position() -> tuple[float, float]:
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise ValueError("Couldn't parse azimuth")
+        return (0.0, 30.0)
+
+    rot.get_position = get_position  # type: ignore[method-assign]
+    track.rate_hz = 20.0
+    track._thread.start()  # pylint: disable=protected-access
+    try:
+        # Carries on to the next update rather than giving up
+        assert not track.wait(0.3)
+        assert track.error is not None
+    finally:
+        track.stop()
@@ -0,0 +1,73 @@
+"""Tests for planning which side of the cable wrap to follow a pass on"""
+
+import numpy as np
+import pytest
+
+from k3ng.wrap import plan_wrap
+
+# A pass heading north-east over the stop at north
+TIMES = np.arange(0.0, 60.0, 10.0)
+ACROSS_NORTH = np.array([300.0, 320.0, 340.0, 0.0, 20.0, 40.0])
+
+
+def test_no_unwind_needed() -> None:
+    plan = plan_wrap(TIMES[:3], np.array([100.0, 120.0, 140.0]), 90.0)
+    assert plan.unwinds == 0
+    assert list(plan.azimuths) == pytest.approx([100.0, 120.0, 140.0])
+    assert plan.slew == pytest.approx(50.0)
+
+
+def test_unwind_at_stop() -> None:
+    plan = plan_wrap(TIMES, ACROSS_NORTH, 300.0)
+    assert plan.unwinds == 1
+    # Up to the stop, then swung round to carry on
+    assert list(plan.azimuths) == pytest.approx(
+        [300.0, 320.0, 340.0, 360.0, 20.0, 40.0]
+    )
+    assert plan.slew == pytest.approx(420.0)
+
+
+def test_overlap_avoids_unwind() -> None:
+    # With the overlap the pass carries on past 360 rather than swinging round
+    plan = plan_wrap(TIMES, ACROSS_NORTH, 0.0, az_max=450.0)
+    assert plan.unwinds == 0
+    assert list(plan.azimuths) == pytest.approx(
+        [300.0, 320.0, 340.0, 360.0, 380.0, 400.0]
+    )
+
+    # Starting near the other end, the least slew is from the overlap side of the stop
+    plan = plan_wrap(TIMES[:3], np.array([10.0, 20.0, 30.0]), 400.0, az_max=450.0)
+    assert plan.start_az == pytest.approx(370.0)
+
+
+def test_southern_stop() -> None:
+    plan = plan_wrap(TIMES, ACROSS_NORTH, 300.0, az_min=180.0, az_max=540.0)
+    assert plan.unwinds == 0
+    assert list(plan.azimuths) == pytest.approx(
+        [300.0, 320.0, 340.0, 360.0, 380.0, 400.0]
+    )
+
+
+def test_range_too_small() -> None:
+    with pytest.raises(ValueError):
+        plan_wrap(TIMES, ACROSS_NORTH, 0.0, az_max=350.0)
+
+
+def test_raw_azimuth() -> None:
+    plan = plan_wrap(TIMES, ACROSS_NORTH, 0.0, az_max=450.0)
+    assert plan.raw_azimuth(5.0, 305.0) == pytest.approx(305.0)
+    assert plan.raw_azimuth(45.0, 35.0) == pytest.approx(395.0)
+
+
+def test_raw_azimuth_at_stop() -> None:
+    # Unwinds between 3 and 4, with the satellite crossing north in between
+    times = np.arange(6.0)
+    plan = plan_wrap(times, np.array([357.0, 358.0, 359.0, 359.9, 0.5, 1.5]), 357.0)
+    assert plan.unwinds == 1
+
+    # Just past north before the unwind, and just short of it after, held at the stop
+    assert plan.raw_azimuth(3.5, 0.1) == pytest.approx(360.0)
+    assert plan.raw_azimuth(4.2, 359.8) == pytest.approx(0.0)
+    # Otherwise where the plan is
+    assert plan.raw_azimuth(2.5, 359.5) == pytest.approx(359.5)
+    assert plan.raw_azimuth(4.5, 1.0) == pytest.approx(1.0)